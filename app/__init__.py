@@ -16,10 +16,18 @@ db = SQLAlchemy()
 
 mail = Mail()
 
-def create_app():
+CONFIGS = {'production': ProductionConfig, 'testing': TestingConfig, 'development': DevelopmentConfig}
+
+def create_app(config_name=None):
+    """Build the app with the `config_name` config ('production', 'testing' or 'development').
+
+    Defaults to `FLASK_ENV`, and to development when that is unset or unknown.
+    """
     app = Flask(__name__)
 
-    migrate = Migrate(app, db)
+    # The search index (FTS tables, trigram indexes) lives outside the models; keep autogenerate off it
+    from app.search import include_object
+    migrate = Migrate(app, db, include_object=include_object)
 
     CORS(app)
     limiter = Limiter(get_remote_address, app=app, storage_uri="redis://localhost:6379",
@@ -30,15 +38,12 @@ def create_app():
     logging.basicConfig(level=logging.INFO)
     app.logger.setLevel(logging.INFO)
     
-    env = os.getenv('FLASK_ENV', 'development')
-    if env == 'production':
-        app.config.from_object(ProductionConfig)
-    elif env == 'testing':
-        app.config.from_object(TestingConfig)
-    else:
-        app.config.from_object(DevelopmentConfig)
-
-    db.init_app(app)
+    env = config_name or os.getenv('FLASK_ENV', 'development')
+    app.config.from_object(CONFIGS.get(env, DevelopmentConfig))
+
+    # Pool options for server databases, WAL and busy-timeout pragmas for SQLite
+    from app.database import init_app as init_database
+    init_database(app, db)
     app.config['JWT_TOKEN_LOCATION'] = ['headers']
     app.config['JWT_HEADER_TYPE'] = 'Bearer'
     app.config['JWT_HEADER_NAME'] = 'Authorization'
@@ -67,11 +72,25 @@ def create_app():
     def user_identity_lookup(user):
         return str(user) if isinstance(user, int) else user
 
+    # In-process cache of revoked token ids, checked by the jwt_required decorator
+    from app.revocation import revocation_cache
+    revocation_cache.init_app(app)
+
+    # Background writer that batches ActionLog inserts
+    from app.audit import audit_log
+    audit_log.init_app(app)
+
+    # Background worker pool for async uploads
+    from app.jobs import upload_jobs
+    upload_jobs.init_app(app)
+
     # Initialize API with app directly
     from app.routes import api
     api.init_app(app)
 
-    with app.app_context():
-        db.create_all()
+    # `flask results ...` maintenance commands
+    from app.bulk_load import results_cli
+    app.cli.add_command(results_cli)
 
+    # The schema is owned by the migrations (`flask db upgrade`), not created on every worker boot
     return app
\ No newline at end of file
@@ -0,0 +1,134 @@
+# flask-app/app/analytics.py
+"""Department-wide GPA, CGPA, class ranking and class of degree.
+
+All scores of a department are pulled as four columns in one query and reduced with
+NumPy group-bys, so a class list of thousands of students costs one round trip and a
+few vector operations instead of one `ResultsByRegistration` call per student.
+"""
+import csv
+import io
+
+import numpy as np
+from sqlalchemy import func
+
+from . import db
+from .constants import GRADE_POINTS
+from .models import Course, Result, Score, Semester, Student
+from .utils import semester_sort_key
+
+# Lower CGPA bound of each class of degree, best first (five-point scale)
+DEGREE_CLASSES = [
+    (4.50, "First Class"),
+    (3.50, "Second Class Upper"),
+    (2.40, "Second Class Lower"),
+    (1.50, "Third Class"),
+    (1.00, "Pass"),
+]
+FAIL_CLASS = "Fail"
+
+
+def class_of_degree(cgpa):
+    """Vectorised lookup of the class of degree for an array of CGPAs."""
+    bounds = np.array([bound for bound, _ in reversed(DEGREE_CLASSES)])
+    labels = np.array([FAIL_CLASS] + [label for _, label in reversed(DEGREE_CLASSES)], dtype=object)
+    return labels[np.searchsorted(bounds, cgpa, side='right')]
+
+
+def competition_rank(values):
+    """Rank values from highest to lowest; ties share the better rank ("1, 2, 2, 4")."""
+    order = np.argsort(-values, kind='stable')
+    ascending = -values[order]
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.searchsorted(ascending, ascending, side='left') + 1
+    return ranks
+
+
+def _safe_divide(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=float), where=denominator > 0)
+
+
+def department_summary(department, session=None):
+    """GPA per semester, CGPA, rank and class of degree for every student in `department`.
+
+    With `session`, only semesters up to and including that session count. Returns
+    `(students, semesters)`: one dict per student ordered by rank, and the semester names
+    found, in chronological order.
+    """
+    rows = (db.session.query(Score.student_id, Result.semester_id, Course.unit, Score.grade)
+            .join(Result, Score.result_id == Result.id)
+            .join(Course, Result.course_id == Course.id)
+            .join(Student, Score.student_id == Student.id)
+            .filter(func.upper(Student.department) == department.strip().upper())
+            .all())
+    if not rows:
+        return [], []
+
+    semester_rows = sorted(db.session.query(Semester.id, Semester.name, Semester.session, Semester.term)
+                           .filter(Semester.id.in_({row[1] for row in rows})),
+                           key=lambda row: semester_sort_key(row.session, row.term))
+    if session:
+        semester_rows = [row for row in semester_rows if row.session <= session.strip()]
+    semesters = [row.name for row in semester_rows]
+    semester_position = {row.id: position for position, row in enumerate(semester_rows)}
+
+    student_ids, semester_ids, units, grades = zip(*rows)
+    semester_index = np.array([semester_position.get(semester_id, -1) for semester_id in semester_ids])
+    keep = semester_index >= 0
+    if not keep.any():
+        return [], semesters
+
+    units = np.asarray(units, dtype=float)[keep]
+    grade_points = np.array([GRADE_POINTS.get(grade, 0) for grade in grades], dtype=float)[keep]
+    points = grade_points * units
+    semester_index = semester_index[keep]
+    student_ids, student_index = np.unique(np.asarray(student_ids)[keep], return_inverse=True)
+
+    # Per-student totals
+    credits = np.bincount(student_index, weights=units, minlength=len(student_ids))
+    total_points = np.bincount(student_index, weights=points, minlength=len(student_ids))
+    cgpa = np.round(_safe_divide(total_points, credits), 2)
+
+    # Per (student, semester) GPA on a dense students x semesters grid
+    cell = student_index * len(semesters) + semester_index
+    grid_size = len(student_ids) * len(semesters)
+    semester_credits = np.bincount(cell, weights=units, minlength=grid_size).reshape(len(student_ids), -1)
+    semester_points = np.bincount(cell, weights=points, minlength=grid_size).reshape(len(student_ids), -1)
+    semester_gpa = np.round(_safe_divide(semester_points, semester_credits), 2)
+
+    ranks = competition_rank(cgpa)
+    classes = class_of_degree(cgpa)
+
+    students = dict(db.session.query(Student.id, Student)
+                    .filter(func.upper(Student.department) == department.strip().upper()))
+    summary = []
+    for i in np.argsort(ranks, kind='stable'):
+        student = students[int(student_ids[i])]
+        summary.append({
+            "rank": int(ranks[i]),
+            "registration_number": student.registration_number,
+            "name": student.name,
+            "department": student.department,
+            "total_credit_earned": int(credits[i]),
+            "total_grade_point": int(total_points[i]),
+            "cgpa": float(cgpa[i]),
+            "class_of_degree": classes[i],
+            "semester_gpa": {
+                name: float(semester_gpa[i, j]) for j, name in enumerate(semesters) if semester_credits[i, j] > 0
+            }
+        })
+    return summary, semesters
+
+
+def department_summary_csv(students, semesters):
+    """Render a department summary as CSV, one GPA column per semester."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["Rank", "Registration Number", "Name", "Department", "Total Credit Earned",
+                     "Total Grade Point", "CGPA", "Class of Degree"] + [f"GPA {name}" for name in semesters])
+    for student in students:
+        writer.writerow([
+            student["rank"], student["registration_number"], student["name"], student["department"],
+            student["total_credit_earned"], student["total_grade_point"], f"{student['cgpa']:.2f}",
+            student["class_of_degree"]
+        ] + [student["semester_gpa"].get(name, "") for name in semesters])
+    return output.getvalue()
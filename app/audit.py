@@ -0,0 +1,161 @@
+# flask-app/app/audit.py
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from . import db
+from .models import ActionLog
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_FLUSH = object()
+
+
+class ActionLogWriter:
+    """Writes ActionLog rows off the request path.
+
+    `record()` puts an entry on a bounded queue and returns. A background thread inserts
+    queued entries with one executemany per batch, once ACTION_LOG_BATCH_SIZE entries are
+    waiting or the oldest has waited ACTION_LOG_FLUSH_INTERVAL seconds. When the queue is
+    full the entry is written on the caller's thread instead, so nothing is dropped.
+    With ACTION_LOG_ASYNC off (the testing default) every entry is committed before
+    `record()` returns, as before.
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.async_mode = app.config.get('ACTION_LOG_ASYNC', True)
+        self.batch_size = app.config.get('ACTION_LOG_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('ACTION_LOG_FLUSH_INTERVAL', 1.0)
+        self._queue = queue.Queue(maxsize=app.config.get('ACTION_LOG_QUEUE_SIZE', 10000))
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "sync_writes": 0,
+            "overflows": 0,
+            "failed": 0,
+            "max_queue_depth": 0
+        }
+        self._app = app
+        if self.async_mode:
+            self._thread = threading.Thread(target=self._run, name='action-log-writer', daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+        app.extensions['audit_log'] = self
+
+    def record(self, **fields):
+        """Log an action. Takes the ActionLog columns as keyword arguments."""
+        fields.setdefault('timestamp', datetime.utcnow())
+        if not self.async_mode:
+            self._write_now(fields)
+            return
+
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            # Backpressure: the writer is behind, so this request pays for its own insert
+            self._count(overflows=1)
+            self._write_now(fields)
+            return
+        depth = self._queue.qsize()
+        with self._lock:
+            self._stats["enqueued"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], depth)
+
+    def flush(self):
+        """Write every queued entry now, without waiting for the batch to fill, and block until done."""
+        if self._thread is not None:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def shutdown(self, timeout=10):
+        """Write out whatever is queued and stop the writer thread."""
+        thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            "mode": "async" if self.async_mode else "sync",
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval
+        })
+        return stats
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def _write_now(self, fields):
+        db.session.add(ActionLog(**fields))
+        db.session.commit()
+        self._count(sync_writes=1)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, taken = [], 0
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stopping = True
+                    break
+                if item is _FLUSH:
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self._write_batch(batch)
+            for _ in range(taken):
+                self._queue.task_done()
+
+    def _write_batch(self, batch):
+        with self._app.app_context():
+            try:
+                db.session.execute(insert(ActionLog), batch)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Failed to write %d action log entries", len(batch))
+                self._count(failed=len(batch))
+            else:
+                self._count(written=len(batch), batches=1)
+            finally:
+                db.session.remove()
+
+
+audit_log = ActionLogWriter()
@@ -0,0 +1,171 @@
+# flask-app/app/bulk_load.py
+"""`flask results bulk-load <dir>`: load archived result sheets straight into the database.
+
+Meant for onboarding a department, when years of sheets arrive at once. Sheets are parsed on
+a process pool with the upload parsers. The students of every sheet are then resolved together,
+with new students bulk inserted once, however many sheets list them. Each sheet's scores are
+bulk upserted and committed on their own, so a bad sheet is reported and skipped without
+undoing the rest. Index maintenance is deferred to the end: semester summaries are rebuilt
+once for every loaded student, and the search index stops following writes during the load
+and is rebuilt after. Searches keep working meanwhile, without the rows being loaded. If a load
+is killed before the rebuild, `flask results reindex` brings the index up to date.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from . import db
+from .extraction import extract_csv_data, extract_docx_data, extract_pdf_data, extract_xlsx_data
+from .models import User
+from .parsing import RegistrationPatterns
+from .search import SEARCH_COLUMNS, install_search_index, pause_search_index
+from .utils import (bulk_upsert_scores, create_students, find_student_ids, get_or_create_sheet_result,
+                    refresh_student_summaries)
+
+results_cli = AppGroup('results', help='Result maintenance commands.')
+
+BULK_LOAD_EXTENSIONS = ('.csv', '.xlsx', '.docx', '.pdf')
+REQUIRED_HEADER_FIELDS = ('course_code', 'session', 'semester')
+
+
+def find_result_files(directory):
+    """Every result sheet under `directory`, in a stable order; hidden directories are skipped."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        paths.extend(os.path.join(root, name) for name in sorted(files)
+                     if name.lower().endswith(BULK_LOAD_EXTENSIONS))
+    return paths
+
+
+def parse_result_file(path, registration_patterns=None):
+    """Parse one sheet into `(header_info, rows, error)`. Runs inside a worker process."""
+    patterns = RegistrationPatterns(registration_patterns)
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == '.pdf':
+            header_info, rows = extract_pdf_data(path, 1, patterns)
+        else:
+            extract = {'.csv': extract_csv_data, '.xlsx': extract_xlsx_data, '.docx': extract_docx_data}[ext]
+            header_info, rows = extract(path, patterns)
+    except Exception as e:
+        return None, [], str(e)
+
+    missing = [field for field in REQUIRED_HEADER_FIELDS if not header_info.get(field)]
+    if missing:
+        return None, [], f"Missing header fields: {', '.join(missing)}"
+    if not rows:
+        return None, [], "No student rows found"
+    return header_info, rows, None
+
+
+def reindex_search():
+    """Recreate the search index's triggers and rebuild it from the tables."""
+    connection = db.session.connection()
+    for table in SEARCH_COLUMNS:
+        install_search_index(connection, table)
+    db.session.commit()
+
+
+def bulk_load(paths, uploader_id, workers=1):
+    """Parse and load the result sheets at `paths`.
+
+    Returns a report with the number of sheets and rows loaded, students seen and created,
+    inserted/updated/unchanged score totals, `errors` by path, and the elapsed time.
+    """
+    started = time.perf_counter()
+    patterns = current_app.config.get('REGISTRATION_NUMBER_PATTERNS')
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            parsed = list(executor.map(parse_result_file, paths, [patterns] * len(paths)))
+    else:
+        parsed = [parse_result_file(path, patterns) for path in paths]
+
+    sheets, errors = [], {}
+    for path, (header_info, rows, error) in zip(paths, parsed):
+        if error:
+            errors[path] = error
+        else:
+            sheets.append((path, header_info, rows))
+
+    # Resolve every student once; the first sheet that lists a new student names them
+    students = {}
+    for _, _, rows in sheets:
+        for row in rows:
+            students.setdefault(row['registration_number'], row)
+    student_ids = find_student_ids(students)
+    new_students = {reg: row for reg, row in students.items() if reg not in student_ids}
+
+    report = {"files": 0, "rows": 0, "students": len(students), "new_students": len(new_students),
+              "inserted": 0, "updated": 0, "unchanged": 0, "errors": errors}
+    loaded_students = set()
+    connection = db.session.connection()
+    for table in SEARCH_COLUMNS:
+        pause_search_index(connection, table)
+    try:
+        if new_students:
+            student_ids.update(create_students(new_students))
+        db.session.commit()
+
+        for path, header_info, rows in sheets:
+            try:
+                result = get_or_create_sheet_result(
+                    header_info, {'filename': os.path.basename(path), 'uploader_id': uploader_id})
+                counts = bulk_upsert_scores(result, rows, student_ids, refresh_summaries=False)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                errors[path] = str(e)
+                continue
+            report["files"] += 1
+            report["rows"] += len(rows)
+            for key, value in counts.items():
+                report[key] += value
+            loaded_students.update(student_ids[row['registration_number']] for row in rows)
+
+        refresh_student_summaries(loaded_students)
+        db.session.commit()
+    finally:
+        db.session.rollback()
+        reindex_search()
+
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+@results_cli.command('bulk-load')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--uploader', required=True, help='Username recorded as the uploader of every result.')
+@click.option('--workers', type=int, default=None, help='Parser processes (default: one per CPU).')
+def bulk_load_command(directory, uploader, workers):
+    """Load every CSV, XLSX, DOCX and PDF result sheet under DIRECTORY."""
+    user = User.query.filter_by(username=uploader).first()
+    if user is None:
+        raise click.ClickException(f"No user named {uploader!r}")
+    paths = find_result_files(directory)
+    if not paths:
+        raise click.ClickException(f"No result sheets found under {directory}")
+
+    report = bulk_load(paths, user.id, workers or os.cpu_count() or 1)
+
+    rate = report["rows"] / report["seconds"] if report["seconds"] else 0
+    click.echo(f"Loaded {report['rows']} rows from {report['files']} of {len(paths)} files "
+               f"in {report['seconds']:.2f}s ({rate:.0f} rows/s)")
+    click.echo(f"Students: {report['students']} ({report['new_students']} new). Scores: "
+               f"{report['inserted']} inserted, {report['updated']} updated, {report['unchanged']} unchanged")
+    if report["errors"]:
+        click.echo(f"{len(report['errors'])} files failed:", err=True)
+        for path, message in report["errors"].items():
+            click.echo(f"  {os.path.relpath(path, directory)}: {message}", err=True)
+        raise SystemExit(1)
+
+
+@results_cli.command('reindex')
+def reindex_command():
+    """Rebuild the course and student search index, e.g. after an interrupted bulk load."""
+    reindex_search()
+    click.echo("Search index rebuilt")
@@ -0,0 +1,105 @@
+# flask-app/app/cache.py
+import os
+import uuid
+
+
+class DiskLRUCache:
+    """Size-bounded cache of byte blobs on local disk.
+
+    Entries are plain files named by their key; a file's mtime is refreshed on every
+    hit, and the least recently used files are evicted once the directory grows past
+    `max_bytes`. Keys must be filename-safe (hex digests work well).
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            pass  # Evicted by another worker in the meantime
+        return data
+
+    def open(self, key):
+        """The entry as a binary file to read in pieces, or None. The caller closes it."""
+        path = self._path(key)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            pass  # Evicted by another worker; the open file stays readable
+        return f
+
+    def set(self, key, data):
+        writer = self.writer(key)
+        writer.write(data)
+        writer.commit()
+
+    def writer(self, key):
+        """A `CacheWriter` that builds the entry for `key` piece by piece."""
+        return CacheWriter(self, key)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith('.tmp-'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+class CacheWriter:
+    """An entry being written. It is written under a temporary name, so readers never see it
+    partially; `commit()` publishes it and `discard()` drops it."""
+
+    def __init__(self, cache, key):
+        self._cache = cache
+        self._key = key
+        self._tmp_path = cache._path(f".tmp-{uuid.uuid4().hex}")
+        self._file = open(self._tmp_path, 'wb')
+
+    def write(self, data):
+        self._file.write(data)
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp_path, self._cache._path(self._key))
+        self._cache._evict()
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
@@ -2,4 +2,6 @@
 ALLOWED_ROLES = ['hod', 'exam_officer', 'lecturer']
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'csv', 'xls', 'xlsx', 'docx', 'pdf'}
-UPDATE_ROLES = ['hod', 'exam_officer']
\ No newline at end of file
+UPDATE_ROLES = ['hod', 'exam_officer']
+GRADE_POINTS = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1, 'F': 0}
+TERM_ORDER = {'FIRST': 1, 'SECOND': 2}  # Order of Semester.term values within a session
\ No newline at end of file
@@ -0,0 +1,65 @@
+# flask-app/app/database.py
+"""Per-database engine tuning applied by `create_app`.
+
+Server databases get the connection pool from `SQLALCHEMY_ENGINE_OPTIONS`. SQLite has no
+server to pool connections to, so those options are dropped for it. Instead, every new SQLite
+connection is switched to WAL journaling with `synchronous=NORMAL`, a busy timeout and a
+memory-mapped read window (`SQLITE_*` settings). Gunicorn workers then read while another
+writes, and writers queue for the lock instead of failing with "database is locked".
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Engine options that configure a QueuePool; SQLite's in-memory StaticPool rejects them
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+
+def is_sqlite(config):
+    return make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite'
+
+
+def engine_options(config):
+    """`SQLALCHEMY_ENGINE_OPTIONS` for the configured database."""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if is_sqlite(config):
+        for option in POOL_OPTIONS:
+            options.pop(option, None)
+    return options
+
+
+def sqlite_pragmas(config):
+    """`(pragma, value)` pairs to run on each new SQLite connection; unset settings are skipped."""
+    pragmas = [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS')),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE')),
+    ]
+    return [(name, value) for name, value in pragmas if value is not None and value != '']
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run `pragmas` on every connection `engine` opens from now on."""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', set_pragmas)
+
+
+def init_app(app, db):
+    """Set the engine options before `db.init_app(app)` and hook SQLite connections after it."""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+    if not is_sqlite(app.config):
+        return
+    pragmas = sqlite_pragmas(app.config)
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            install_sqlite_pragmas(engine, pragmas)
@@ -1,327 +1,164 @@
 # flask-app/app/extraction.py
-from pypdf import PdfReader
-from docx import Document
+# pypdf, python-docx and openpyxl are imported by the extractor that needs them, so importing
+# this module (and booting the app) does not pay for readers of formats it may never see.
 import csv
-from openpyxl import load_workbook
+import logging
+import threading
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # import tabula
 from typing import Tuple, Dict, List
 import re
 
-def extract_docx_data(filepath):
+from .parsing import (RegistrationPatterns, StudentRowParser, empty_header_info, is_column_header,
+                      iter_table_records, parse_header_cells, parse_lines)
+
+logger = logging.getLogger(__name__)
+
+def extract_docx_data(filepath, registration_patterns=None):
     """Extract data from DOCX file format."""
+    from docx import Document
+
     doc = Document(filepath)
-    header_info = {
-        "course_title": "",
-        "course_code": "",
-        "course_unit": 0,
-        "department": "",
-        "faculty": "",
-        "semester": "",
-        "session": "",
-        "lecturers": ""
-    }
+    registration_patterns = registration_patterns or RegistrationPatterns()
+    header_info = empty_header_info()
     results_data = []
     
-    # Process tables for both header and results
+    # Process tables for both header and results, classifying each row once
     for table in doc.tables:
+        row_parser = StudentRowParser(registration_patterns, header_info, "DOCX")
         for row in table.rows:
             cells = [cell.text.strip() for cell in row.cells]
-            
-            # Extract header information
-            if len(cells) >= 2:
-                first_cell = cells[0].strip()
+            if is_column_header(cells):
+                row_parser.column_header(cells)
+                continue
 
-                if "Title of Course" in first_cell:
-                    # in the first cell which is named "Title of Course", the course title and course code are in the same cell
-                    header_info["course_title"] = cells[1].strip()
-                    header_info["course_code"] = cells[-1].strip()
-                elif "Examination Date" in first_cell:
-                    # in the first cell which is named "Examination Date", the course unit is in the last cell
-                    try:
-                        header_info["course_unit"] = int(cells[-1].strip())
-                    except ValueError:
-                        pass
-                elif "Department" in first_cell:
-                    # in the first cell which is named "Department", the department is in the second cell
-                    header_info["department"] = cells[1].strip()
-                    header_info["semester"] = cells[-1].strip()
-                elif "Faculty" in first_cell:
-                    # in the first cell which is named "Faculty", the faculty is in the second cell
-                    header_info["faculty"] = cells[1].strip()  
-                    header_info["session"] = cells[-1].strip()           
-                elif "Name of Lecturers" in first_cell:
-                    # in the first cell which is named "Name of Lecturers", the lecturers are in the second cell
-                    header_info["lecturers"] = cells[1].strip()
-            
-            # Extract student results
-            if len(cells) >= 7 and any("/" in cell for cell in cells):
-                try:
-                    # Find registration number column
-                    reg_idx = next(i for i, cell in enumerate(cells) if "/" in cell)
-                    results_data.append({
-                        "name": cells[0].strip(),  # Name is always first column
-                        "registration_number": cells[reg_idx].strip(),
-                        "department": cells[reg_idx + 1].strip(),
-                        "level": "100",
-                        "continuous_assessment": float(cells[reg_idx + 3].strip()),
-                        "exam_score": float(cells[reg_idx + 4].strip()),
-                        "total_score": float(cells[reg_idx + 5].strip()),
-                        "grade": cells[reg_idx + 6].strip()
-                    })
-                except (ValueError, IndexError) as e:
-                    print(f"Error processing row in DOCX: {e}")
-                    continue
+            record = row_parser.parse(cells)
+            if record:
+                results_data.append(record)
+            elif len(cells) >= 2:
+                parse_header_cells(cells, header_info)
 
-    print("Docx Result \n", header_info, "\n\n\n\n" ,results_data, "\n\n\n\n")
+    logger.debug("DOCX %s: header %s, %d rows", filepath, header_info, len(results_data))
     return header_info, results_data
 
-def extract_pdf_data(filepath: str) -> Tuple[Dict, List]:
-    """Extract data from PDF using PyPDF Reader."""
-    header_info = {
-        "course_title": "",
-        "course_code": "",
-        "course_unit": 0,
-        "department": "",
-        "faculty": "",
-        "semester": "",
-        "session": "",
-        "lecturers": ""
-    }
+def _extract_pdf_page_rows(filepath: str, page_numbers: List[int], reg_pattern: re.Pattern) -> List[Dict]:
+    """Extract the student rows from a run of pages. Runs inside a worker process."""
+    from pypdf import PdfReader
+
     results_data = []
-    
-    try:
-        with open(filepath, 'rb') as file:
-            reader = PdfReader(file)
-            first_page = reader.pages[0].extract_text()
-            
-            # Preprocess text to handle line breaks and split words
-            lines = first_page.split('\n')
-            
-            # Extract header information with improved patterns
-            for line in lines:
-                if "Title of Course:" in line:
-                    match = re.search(r"Title of Course:\s*([\w\s]+)\s*Course Code:(\w+)", line)
-                    if match:
-                        header_info["course_title"] = match.group(1).strip()
-                        header_info["course_code"] = match.group(2).strip()
-                
-                elif "Course Unit:" in line:
-                    match = re.search(r"Course Unit:(\d+)", line)
-                    if match:
-                        header_info["course_unit"] = int(match.group(1))
-                
-                elif "Department:" in line:
-                    match = re.search(r"Department:\s*([\w\s]+)\s*Semester:", line)
-                    if match:
-                        header_info["department"] = match.group(1).strip()
-                
-                elif "Faculty:" in line:
-                    match = re.search(r"Faculty:\s*([\w\s]+)\s*Session:", line)
-                    if match:
-                        header_info["faculty"] = match.group(1).strip()
-                
-                elif "Semester:" in line:
-                    match = re.search(r"Semester:\s*([\w\s]+)", line)
-                    if match:
-                        header_info["semester"] = match.group(1).strip()
-                
-                elif "Session:" in line:
-                    match = re.search(r"Session:(\d+/\d+)", line)
-                    if match:
-                        header_info["session"] = match.group(1).strip()
-                
-                elif "Name of Lecturers:" in line:
-                    match = re.search(r"Name of Lecturers:\s*(.*?)\s*Page", line)
-                    if match:
-                        header_info["lecturers"] = match.group(1).strip()
+    with open(filepath, 'rb') as file:
+        reader = PdfReader(file)
+        for page_number in page_numbers:
+            lines = reader.pages[page_number].extract_text().split('\n')
+            results_data.extend(parse_lines(lines, reg_pattern=reg_pattern))
+    return results_data
 
-            # Process results
-            results_section = False
-            for line in lines:
-                if "Names" in line:
-                    results_section = True
-                    continue
-                
-                if results_section and "2019/" in line:
-                    # Split line into components
-                    parts = re.split(r'\s+', line.strip())
-                    try:
-                        # Find registration number index
-                        reg_idx = next(i for i, part in enumerate(parts) if "2019/" in part)
-                        
-                        # Extract name by joining all parts before registration number
-                        name = " ".join(parts[:reg_idx])
-                        
-                        # Extract other fields
-                        reg_no = parts[reg_idx]
-                        dept = "COMPUTER SCIENCE"  # Default value since it's consistent
-                        
-                        # Find scores and grade
-                        scores = [part for part in parts[reg_idx+1:] if part.replace('.', '').isdigit()]
-                        grade = parts[-1] if parts[-1] in ['A', 'B', 'C', 'D', 'E', 'F'] else None
-                        
-                        if len(scores) >= 3 and grade:
-                            results_data.append({
-                                "name": name.strip(),
-                                "registration_number": reg_no.strip(),
-                                "department": dept.strip(),
-                                "level": "100",
-                                "continuous_assessment": float(scores[-3]),
-                                "exam_score": float(scores[-2]),
-                                "total_score": float(scores[-1]),
-                                "grade": grade
-                            })
-                    except (ValueError, IndexError) as e:
-                        print(f"Error processing line: {line}")
-                        print(f"Error details: {e}")
-                        continue
+# PDFs with fewer pages are parsed in-process; starting work on the pool costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 8
 
-    except Exception as e:
-        print(f"Error extracting data from PDF: {e}")
-    
-    print("PDF Extraction Results:")
-    print("Header Info:", header_info)
-    print("\nResults Data:", results_data)
-    
-    return header_info, results_data
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
 
-def extract_csv_data(filepath):
-    """Extract data from CSV file format."""
-    header_info = {
-        "course_title": "",
-        "course_code": "",
-        "course_unit": 0,
-        "department": "",
-        "faculty": "",
-        "semester": "",
-        "session": "",
-        "lecturers": ""
-    }
-    results_data = []
-    
-    with open(filepath, newline='') as csvfile:
-        reader = csv.reader(csvfile)
-        rows = list(reader)
-        
-        # Process header information from first few rows
-        for row in rows[:8]:  # First 8 rows contain header info
-            if len(row) >= 2:
-                first_col = row[0].strip()
-                if "Title of Course" in first_col:
-                    header_info["course_title"] = row[1].strip()
-                elif "Course Code" in first_col:
-                    header_info["course_code"] = row[-1].strip()
-                elif "Course Unit" in first_col:
-                    try:
-                        header_info["course_unit"] = int(row[-1].strip())
-                    except ValueError:
-                        pass
-                elif "Department" in first_col:
-                    header_info["department"] = row[1].strip()
-                elif "Faculty" in first_col:
-                    header_info["faculty"] = row[1].strip()
-                elif "Semester" in first_col:
-                    header_info["semester"] = row[-1].strip()
-                elif "Session" in first_col:
-                    header_info["session"] = row[-1].strip()
-                elif "Name of Lecturers" in first_col:
-                    header_info["lecturers"] = row[1].strip()
-        
-        # Find the start of student data
+def _get_pdf_pool(max_workers):
+    """The process pool shared by every PDF extraction in this process, started on first use."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=max_workers)
+        return _pdf_pool
+
+def _discard_pdf_pool(pool):
+    """Drop a pool whose worker died, so the next extraction starts a fresh one."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False)
+
+def extract_pdf_data(filepath: str, max_workers: int = 1,
+                     registration_patterns: RegistrationPatterns = None) -> Tuple[Dict, List]:
+    """Extract data from every page of a PDF using PyPDF Reader.
+
+    PDFs of `PDF_PARALLEL_MIN_PAGES` pages or more have the pages after the first split into
+    contiguous batches and parsed on a process pool shared across requests, using up to
+    `max_workers` processes, while the first page, which carries the header, is parsed here.
+    Rows are merged back in page order. Rows are matched against every configured registration
+    pattern and then narrowed to the pattern for the faculty named in the header. A page that
+    cannot be read raises, so a partial sheet is never returned.
+    """
+    from pypdf import PdfReader
+
+    registration_patterns = registration_patterns or RegistrationPatterns()
+    candidate_pattern = registration_patterns.any
+    header_info = empty_header_info()
+
+    with open(filepath, 'rb') as file:
+        reader = PdfReader(file)
+        page_count = len(reader.pages)
+        first_page = reader.pages[0].extract_text()
+
+    # Batch the remaining pages so each worker opens the file only once
+    remaining_pages = list(range(1, page_count))
+    workers = max(1, min(max_workers or 1, len(remaining_pages)))
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        workers = 1
+    batch_size = -(-len(remaining_pages) // workers) if remaining_pages else 1
+    batches = [remaining_pages[i:i + batch_size] for i in range(0, len(remaining_pages), batch_size)]
+
+    if workers > 1:
+        pool = _get_pdf_pool(max_workers)
         try:
-            header_row_idx = next(i for i, row in enumerate(rows) if "Names" in row[0])
-            
-            # Process student results
-            for row in rows[header_row_idx + 1:]:
-                if len(row) >= 8 and "2019/" in row[1]:  # Ensure we have all required columns
-                    try:
-                        results_data.append({
-                            "name": row[0].strip(),
-                            "registration_number": row[1].strip(),
-                            "department": row[2].strip(),
-                            "level": row[3].strip(),
-                            "continuous_assessment": float(row[4].strip()),
-                            "exam_score": float(row[5].strip()),
-                            "total_score": float(row[6].strip()),
-                            "grade": row[7].strip()
-                        })
-                    except (ValueError, IndexError) as e:
-                        print(f"Error processing row in CSV: {e}")
-                        continue
-        except StopIteration:
-            print("Could not find header row in CSV file")
-    print("CSV Result \n", header_info, "\n\n\n\n" ,results_data, "\n\n\n\n")
+            futures = [pool.submit(_extract_pdf_page_rows, filepath, batch, candidate_pattern) for batch in batches]
+
+            # Header parsing only runs on page 1
+            results_data = parse_lines(first_page.split('\n'), header_info, candidate_pattern)
+
+            for future in futures:
+                results_data.extend(future.result())
+        except BrokenProcessPool:
+            _discard_pdf_pool(pool)
+            raise
+    else:
+        results_data = parse_lines(first_page.split('\n'), header_info, candidate_pattern)
+        results_data.extend(_extract_pdf_page_rows(filepath, remaining_pages, candidate_pattern))
+
+    reg_pattern = registration_patterns.for_faculty(header_info["faculty"])
+    results_data = [row for row in results_data if reg_pattern.fullmatch(row["registration_number"])]
+    logger.debug("PDF %s: header %s, %d rows", filepath, header_info, len(results_data))
+
     return header_info, results_data
 
-def extract_xlsx_data(filepath):
-    """Extract data from XLSX file format."""
-    header_info = {
-        "course_title": "",
-        "course_code": "",
-        "course_unit": 0,
-        "department": "",
-        "faculty": "",
-        "semester": "",
-        "session": "",
-        "lecturers": ""
-    }
-    results_data = []
-    
-    workbook = load_workbook(filepath)
-    sheet = workbook.active
-    rows = list(sheet.values)
-    
-    # Process header information
-    for row in rows[:8]:
-        if row and len(row) >= 2:
-            first_col = str(row[0]).strip()
-            if "Title of Course" in first_col:
-                header_info["course_title"] = str(row[1]).strip()
-            elif "Course Code" in first_col:
-                header_info["course_code"] = str(row[-1]).strip()
-            elif "Course Unit" in first_col:
-                try:
-                    header_info["course_unit"] = int(str(row[-1]).strip())
-                except ValueError:
-                    pass
-            elif "Department" in first_col:
-                header_info["department"] = str(row[1]).strip()
-            elif "Faculty" in first_col:
-                header_info["faculty"] = str(row[1]).strip()
-            elif "Semester" in first_col:
-                header_info["semester"] = str(row[-1]).strip()
-            elif "Session" in first_col:
-                header_info["session"] = str(row[-1]).strip()
-            elif "Name of Lecturers" in first_col:
-                header_info["lecturers"] = str(row[1]).strip()
-    
-    # Find header row
+def iter_csv_data(filepath, registration_patterns=None):
+    """Stream a CSV file: yields the header info first, then one result dict per student row."""
+    with open(filepath, newline='') as csvfile:
+        yield from iter_table_records(csv.reader(csvfile), registration_patterns, source="CSV")
+
+def extract_csv_data(filepath, registration_patterns=None):
+    """Extract data from CSV file format."""
+    records = iter_csv_data(filepath, registration_patterns)
+    header_info = next(records)
+    return header_info, list(records)
+
+def iter_xlsx_data(filepath, registration_patterns=None):
+    """Stream an XLSX file in read-only mode: yields the header info first, then one result dict per student row."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
     try:
-        header_row_idx = next(i for i, row in enumerate(rows) if row and "Names" in str(row[0]))
-        
-        # Process student results
-        for row in rows[header_row_idx + 1:]:
-            if row and len(row) >= 8 and "2019/" in str(row[1]):
-                try:
-                    results_data.append({
-                        "name": str(row[0]).strip(),
-                        "registration_number": str(row[1]).strip(),
-                        "department": str(row[2]).strip(),
-                        "level": str(row[3]).strip(),
-                        "continuous_assessment": float(str(row[4]).strip()),
-                        "exam_score": float(str(row[5]).strip()),
-                        "total_score": float(str(row[6]).strip()),
-                        "grade": str(row[7]).strip()
-                    })
-                except (ValueError, IndexError) as e:
-                    print(f"Error processing row in XLSX: {e}")
-                    continue
-    except StopIteration:
-        print("Could not find header row in XLSX file")
+        yield from iter_table_records(workbook.active.iter_rows(values_only=True), registration_patterns,
+                                      source="XLSX")
+    finally:
+        # Read-only workbooks keep the file handle open until closed
+        workbook.close()
 
-    return header_info, results_data
+def extract_xlsx_data(filepath, registration_patterns=None):
+    """Extract data from XLSX file format."""
+    records = iter_xlsx_data(filepath, registration_patterns)
+    header_info = next(records)
+    return header_info, list(records)
 
 def process_extracted_data(header_info, results_data, original_filename, uploader_id):
     """Process extracted data into format ready for database insertion."""
@@ -0,0 +1,146 @@
+# flask-app/app/jobs.py
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import redis
+
+from . import db
+from .utils import ingest_uploaded_file
+
+
+class InMemoryJobStore:
+    """Keeps upload job state in this process. Used for tests and single-worker deployments."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id, job):
+        with self._lock:
+            self._jobs[job_id] = dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+
+class RedisJobStore:
+    """Keeps upload job state in Redis so every gunicorn worker can report on every job."""
+
+    def __init__(self, url, ttl):
+        self._redis = redis.Redis.from_url(url)
+        self._ttl = ttl
+
+    def _key(self, job_id):
+        return f"upload_job:{job_id}"
+
+    def create(self, job_id, job):
+        self._redis.set(self._key(job_id), json.dumps(job), ex=self._ttl)
+
+    def update(self, job_id, **fields):
+        # Each job is only ever written by the worker thread running it, so read-modify-write is safe
+        job = self.get(job_id)
+        if job is not None:
+            job.update(fields)
+            self._redis.set(self._key(job_id), json.dumps(job), ex=self._ttl)
+
+    def get(self, job_id):
+        raw = self._redis.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+
+class UploadJobQueue:
+    """Runs uploaded-file extraction and database writes on a local worker pool."""
+
+    def __init__(self, app=None):
+        self.store = None
+        self._app = None
+        self._executor = None
+        self._futures = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if app.config.get('UPLOAD_JOB_BACKEND') == 'redis':
+            self.store = RedisJobStore(app.config['REDIS_URL'], app.config['UPLOAD_JOB_TTL'])
+        else:
+            self.store = InMemoryJobStore()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=app.config.get('UPLOAD_WORKERS', 2),
+                                            thread_name_prefix='upload-job')
+        self._futures = {}
+        self._app = app
+        app.extensions['upload_jobs'] = self
+
+    def submit(self, filepath, file_info):
+        """Queue a saved upload for processing and return its job id."""
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow().isoformat()
+        self.store.create(job_id, {
+            "id": job_id,
+            "status": "queued",
+            "filename": file_info['filename'],
+            "uploader_id": file_info['uploader_id'],
+            "records_processed": 0,
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "message": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        })
+        future = self._executor.submit(self._run, self._app, job_id, filepath, file_info)
+        self._futures[job_id] = future
+        # Finished jobs are reported from the store; only keep futures that can still be waited on
+        future.add_done_callback(lambda _: self._futures.pop(job_id, None))
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job submitted by this process finishes. Mostly useful in tests.
+
+        Returns the job's state right away when it has already finished.
+        """
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.get(job_id)
+
+    def _update(self, job_id, **fields):
+        self.store.update(job_id, updated_at=datetime.utcnow().isoformat(), **fields)
+
+    def _run(self, app, job_id, filepath, file_info):
+        def on_progress(counts):
+            self._update(job_id, records_processed=sum(counts.values()), **counts)
+
+        with app.app_context():
+            self._update(job_id, status="running")
+            try:
+                payload, status_code = ingest_uploaded_file(filepath, file_info, on_progress=on_progress)
+                if status_code == 200:
+                    self._update(job_id, status="completed", message=payload["message"],
+                                 records_processed=payload["records"], inserted=payload["inserted"],
+                                 updated=payload["updated"], unchanged=payload["unchanged"])
+                else:
+                    self._update(job_id, status="failed", error=payload["error"])
+            except Exception as e:
+                db.session.rollback()
+                self._update(job_id, status="failed", error=str(e))
+            finally:
+                db.session.remove()
+
+
+upload_jobs = UploadJobQueue()
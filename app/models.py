@@ -41,7 +41,7 @@ class TokenBlacklist(db.Model):
     jti = db.Column(db.String(36), nullable=False, unique=True)  # JWT ID
     token_type = db.Column(db.String(10), nullable=False)  # 'access' or 'refresh'
     user_id = db.Column(db.Integer, nullable=True)  # Optional: Associate with a user
-    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
     def __repr__(self):
         return f"<TokenBlacklist jti={self.jti} revoked_at={self.revoked_at}>"
@@ -67,8 +67,8 @@ class Course(db.Model):
     code = db.Column(db.String(20), unique=True, nullable=False)
     title = db.Column(db.String(200), nullable=False)
     unit = db.Column(db.Integer, nullable=False)
-    department = db.Column(db.String(100), nullable=False)
-    faculty = db.Column(db.String(100), nullable=False)
+    department = db.Column(db.String(100), nullable=False, index=True)
+    faculty = db.Column(db.String(100), nullable=False, index=True)
     level = db.Column(db.String(3), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -80,9 +80,13 @@ class Course(db.Model):
 class Semester(db.Model):
     """Semester model for managing semester information."""
     __tablename__ = 'semesters'
+    # Serves lookups by session alone as well as by session and term
+    __table_args__ = (db.Index('ix_semesters_session_term', 'session', 'term'),)
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(50), nullable=False)  # "<session> <term>", for display
+    session = db.Column(db.String(20), nullable=False)  # e.g. "2019/2020"
+    term = db.Column(db.String(20), nullable=False)  # Upper case, e.g. "FIRST"
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
@@ -91,12 +95,15 @@ class Semester(db.Model):
 class Result(db.Model):
     """Result metadata model."""
     __tablename__ = 'results'
+    # One result per course per semester; also serves lookups by course_id alone
+    __table_args__ = (db.UniqueConstraint('course_id', 'semester_id', name='uq_result_course_semester'),)
 
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
-    semester_id = db.Column(db.Integer, db.ForeignKey('semesters.id'), nullable=False)
+    semester_id = db.Column(db.Integer, db.ForeignKey('semesters.id'), nullable=False, index=True)
 
     original_file = db.Column(db.String(200), nullable=True)
+    file_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the last file uploaded for this result
     upload_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -117,10 +124,12 @@ class Result(db.Model):
 class Score(db.Model):
     """Score details for individual students."""
     __tablename__ = 'scores'
+    # One score per student per result; also serves lookups by result_id alone
+    __table_args__ = (db.UniqueConstraint('result_id', 'student_id', name='uq_score_result_student'),)
 
     id = db.Column(db.Integer, primary_key=True)
     result_id = db.Column(db.Integer, db.ForeignKey('results.id'), nullable=False)
-    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
     continuous_assessment = db.Column(db.Float, nullable=False)
     exam_score = db.Column(db.Float, nullable=False)
     total_score = db.Column(db.Float, nullable=False)
@@ -133,16 +142,44 @@ class Score(db.Model):
         return f"<Score ResultID={self.result_id}, Student={self.student.name}, Grade={self.grade}>"
 
 
+class StudentSemesterSummary(db.Model):
+    """Precomputed credits, grade points and GPA per student per semester, with the running CGPA.
+
+    Rebuilt from Score rows by `refresh_student_summaries` whenever a student's scores change.
+    """
+    __tablename__ = 'student_semester_summary'
+    __table_args__ = (db.UniqueConstraint('student_id', 'semester_id', name='uq_student_semester_summary'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
+    semester_id = db.Column(db.Integer, db.ForeignKey('semesters.id'), nullable=False)
+    course_count = db.Column(db.Integer, nullable=False, default=0)
+    total_credit_earned = db.Column(db.Integer, nullable=False, default=0)
+    total_grade_point = db.Column(db.Integer, nullable=False, default=0)
+    gpa = db.Column(db.Float, nullable=False, default=0)
+    # Totals over this and every earlier semester
+    cumulative_credit_earned = db.Column(db.Integer, nullable=False, default=0)
+    cumulative_grade_point = db.Column(db.Integer, nullable=False, default=0)
+    cgpa = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    student = db.relationship('Student', backref=db.backref('semester_summaries', lazy=True))
+    semester = db.relationship('Semester')
+
+    def __repr__(self):
+        return f"<StudentSemesterSummary Student={self.student_id}, Semester={self.semester_id}, GPA={self.gpa}>"
+
+
 class ActionLog(db.Model):
     """Logs all significant actions performed on the system, including result changes."""
     __tablename__ = 'action_logs'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # User performing the action
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)  # User performing the action
     action = db.Column(db.String(100), nullable=False)  # Action performed (e.g., 'update_result')
     resource = db.Column(db.String(100), nullable=True)  # Resource affected (e.g., 'Result')
     resource_id = db.Column(db.Integer, nullable=True)  # ID of the resource affected
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Action timestamp
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)  # Action timestamp
     details = db.Column(db.Text, nullable=True)  # JSON string with details about the action
     ip_address = db.Column(db.String(45), nullable=True)  # IP address of the user
     user_agent = db.Column(db.String(200), nullable=True)  # User agent of the request
@@ -151,3 +188,33 @@ class ActionLog(db.Model):
 
     def __repr__(self):
         return f"<ActionLog {self.action} by User {self.user_id} on {self.resource} ({self.resource_id})>"
+
+
+class IngestionJob(db.Model):
+    """Checkpoint of an upload written in committed chunks (`INGEST_COMMIT_CHUNK_SIZE`).
+
+    `rows_committed` rows of the parsed file are saved; an upload of the same file for the
+    same result that finds an unfinished job resumes after them. `updated_at` is the time of the
+    last checkpoint, which is also the lease of a running job.
+    """
+    __tablename__ = 'ingestion_jobs'
+    __table_args__ = (db.Index('ix_ingestion_jobs_file_hash_result', 'file_hash', 'result_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    file_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the upload; jobs without one cannot resume
+    result_id = db.Column(db.Integer, db.ForeignKey('results.id'), nullable=False)
+    uploader_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    filename = db.Column(db.String(200), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='running')  # 'running', 'failed' or 'completed'
+    rows_committed = db.Column(db.Integer, nullable=False, default=0)  # Parsed rows saved so far, in file order
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    unchanged = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    result = db.relationship('Result', backref=db.backref('ingestion_jobs', lazy=True, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f"<IngestionJob Result={self.result_id}, Rows={self.rows_committed}, Status={self.status}>"
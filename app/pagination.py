@@ -0,0 +1,153 @@
+# flask-app/app/pagination.py
+"""Offset or keyset (cursor) pagination behind one response envelope.
+
+Offset pagination (`?page=`) is the default. `?pagination=cursor` switches a listing to
+keyset pagination: each page is fetched with `WHERE (sort key) < (last key seen)` instead
+of an OFFSET, so page 5,000 costs the same as page 1, and the `next_cursor`/`prev_cursor`
+tokens in the response are passed back as `?cursor=`. The full `COUNT(*)` is skipped
+unless `include_total=true`, in which case it is cached for a few seconds.
+"""
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import tuple_
+
+_TOTAL_CACHE_SIZE = 256
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _dump(value):
+    return {"dt": value.isoformat()} if isinstance(value, datetime) else value
+
+
+def _load(value):
+    return datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+
+
+def encode_cursor(key, direction):
+    payload = json.dumps({"k": [_dump(value) for value in key], "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return `(key, direction)` from a cursor made by `encode_cursor`."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        key, direction = [_load(value) for value in payload["k"]], payload["d"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Invalid cursor")
+    if direction not in ("next", "prev"):
+        raise InvalidCursor("Invalid cursor")
+    return key, direction
+
+
+class _TotalCache:
+    """Short-lived cache of COUNT(*) results keyed by the compiled query and its parameters."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, query, ttl):
+        statement = query.order_by(None).statement.compile()
+        cache_key = (str(statement), repr(sorted(statement.params.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry[0] > now:
+                return entry[1]
+        total = query.order_by(None).count()
+        with self._lock:
+            self._entries[cache_key] = (now + ttl, total)
+            while len(self._entries) > _TOTAL_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return total
+
+
+_total_cache = _TotalCache()
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query, shaped like Flask-SQLAlchemy's `Pagination`."""
+
+    page = None
+    pages = None
+
+    def __init__(self, items, per_page, total, next_cursor, prev_cursor):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def keyset_paginate(query, columns, row_key, per_page, cursor=None, descending=False, include_total=False):
+    """Fetch one page of `query` ordered by the unique key `columns`.
+
+    `row_key(row)` returns a row's values for `columns`. The query must not be ordered already.
+    """
+    total = None
+    if include_total:
+        total = _total_cache.count(query, current_app.config.get('PAGINATION_TOTAL_CACHE_SECONDS', 30))
+
+    key, direction = decode_cursor(cursor) if cursor else (None, "next")
+    if key is not None and len(key) != len(columns):
+        raise InvalidCursor("Invalid cursor")
+
+    # Walking backwards flips the comparison and the sort, then the page is reversed
+    forward = (direction == "next") != descending
+    if key is not None:
+        lhs = tuple_(*columns) if len(columns) > 1 else columns[0]
+        rhs = tuple(key) if len(columns) > 1 else key[0]  # Bound with the columns' own types
+        query = query.filter(lhs > rhs if forward else lhs < rhs)
+    query = query.order_by(*(column.asc() if forward else column.desc() for column in columns))
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == "prev":
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == "prev" or has_more:
+            next_cursor = encode_cursor(row_key(rows[-1]), "next")
+        if (direction == "next" and key is not None) or (direction == "prev" and has_more):
+            prev_cursor = encode_cursor(row_key(rows[0]), "prev")
+    return KeysetPage(rows, per_page, total, next_cursor, prev_cursor)
+
+
+def paginate_request(query, args, columns, row_key, descending=False):
+    """Paginate `query` by offset or, when the request asks for it, by cursor.
+
+    Both modes order by `columns`, and `per_page` is clamped to 1..`PAGINATION_MAX_PER_PAGE`.
+    Raises `InvalidCursor` for a bad `cursor`.
+    """
+    per_page = min(max(args.get('per_page', 10, type=int), 1), current_app.config['PAGINATION_MAX_PER_PAGE'])
+    if args.get('cursor') or args.get('pagination') == 'cursor':
+        include_total = args.get('include_total', 'false').lower() == 'true'
+        return keyset_paginate(query, columns, row_key, per_page, args.get('cursor'), descending, include_total)
+    query = query.order_by(*(column.desc() if descending else column.asc() for column in columns))
+    return query.paginate(page=args.get('page', 1, type=int), per_page=per_page, error_out=False)
+
+
+def page_envelope(page):
+    """The pagination fields shared by every listing response."""
+    envelope = {
+        "total_results": page.total,
+        "current_page": page.page,
+        "total_pages": page.pages,
+        "per_page": page.per_page
+    }
+    if isinstance(page, KeysetPage):
+        envelope["next_cursor"] = page.next_cursor
+        envelope["prev_cursor"] = page.prev_cursor
+    return envelope
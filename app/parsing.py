@@ -0,0 +1,278 @@
+# flask-app/app/parsing.py
+"""Header-label matcher and student-row parser shared by every extractor.
+
+All patterns are compiled once at import. A line or table row is classified in a
+single pass, so extraction cost grows with the number of rows, not rows x labels.
+"""
+import logging
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Label text -> header_info key. Labels mapped to None are recognised (so their value
+# is consumed) but not stored.
+HEADER_LABELS = {
+    "title of course": "course_title",
+    "course code": "course_code",
+    "course unit": "course_unit",
+    "examination date": None,
+    "department": "department",
+    "faculty": "faculty",
+    "semester": "semester",
+    "session": "session",
+    "name of lecturers": "lecturers",
+    "page number": None,
+}
+
+_LABEL_ALTERNATION = "|".join(sorted((re.escape(label) for label in HEADER_LABELS), key=len, reverse=True))
+
+# "Label: value" pairs inside free text such as a PDF line or a merged cell
+HEADER_LABEL_RE = re.compile(rf"\b(?P<label>{_LABEL_ALTERNATION})\s*:", re.IGNORECASE)
+
+# A table cell that holds only a label; its value is in the next non-empty cell
+LABEL_CELL_RE = re.compile(rf"(?P<label>{_LABEL_ALTERNATION})\s*:?", re.IGNORECASE)
+
+# The "Names  Reg.No  Department ..." row that separates the header from student rows
+COLUMN_HEADER_RE = re.compile(r"\s*Names\b", re.IGNORECASE)
+
+_NUMBER = r"\d+(?:\.\d+)?"
+
+# Registration-number regexes per faculty (upper-cased); "default" covers every other faculty
+DEFAULT_REGISTRATION_PATTERNS = {"default": [r"\d{4}/\d+"]}
+
+# The registration-number cell of the "Names" column header row
+REG_NO_COLUMN_RE = re.compile(r"Reg(?:istration)?\.?\s*No\.?", re.IGNORECASE)
+
+
+class RegistrationPatterns:
+    """Registration-number patterns compiled once per faculty.
+
+    `patterns_by_faculty` maps a faculty name (or "default") to a list of regexes, e.g. one
+    per intake year. A cell is a registration number when it fully matches one of them.
+    """
+
+    def __init__(self, patterns_by_faculty=None):
+        patterns_by_faculty = dict(DEFAULT_REGISTRATION_PATTERNS, **(patterns_by_faculty or {}))
+        self._by_faculty = {
+            faculty.strip().upper(): self._compile(patterns)
+            for faculty, patterns in patterns_by_faculty.items()
+        }
+        self.default = self._by_faculty["DEFAULT"]
+        # Union of every faculty's patterns, for finding candidates before the faculty is known
+        self.any = self._compile([p for patterns in patterns_by_faculty.values() for p in patterns])
+
+    @staticmethod
+    def _compile(patterns):
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+    def for_faculty(self, faculty):
+        return self._by_faculty.get((faculty or "").strip().upper(), self.default)
+
+
+DEFAULT_REGISTRATION_PATTERN = RegistrationPatterns().default
+
+
+def empty_header_info():
+    return {
+        "course_title": "",
+        "course_code": "",
+        "course_unit": 0,
+        "department": "",
+        "faculty": "",
+        "semester": "",
+        "session": "",
+        "lecturers": ""
+    }
+
+
+def cell_text(value):
+    """Normalise a table cell to text; spreadsheet numbers like 100.0 become "100"."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _set_header_value(header_info, label, value):
+    key = HEADER_LABELS[label.lower()]
+    if key is None or not value:
+        return
+    if key == "course_unit":
+        try:
+            header_info[key] = int(float(value))
+        except ValueError:
+            pass
+    else:
+        header_info[key] = value
+
+
+def parse_header_text(text, header_info):
+    """Fill `header_info` from every "Label: value" pair in `text`.
+
+    Returns the label of a trailing pair with no value (its value is in the next cell), or None.
+    """
+    matches = list(HEADER_LABEL_RE.finditer(text))
+    for current, following in zip(matches, matches[1:] + [None]):
+        value = text[current.end():following.start() if following else len(text)].strip()
+        if value:
+            _set_header_value(header_info, current.group("label"), value)
+        elif following is None:
+            return current.group("label")
+    return None
+
+
+def parse_header_cells(cells, header_info):
+    """Fill `header_info` from a table row laid out as label, value, ..., label, value."""
+    pending_label = None
+    for cell in cells:
+        text = cell_text(cell)
+        if not text:
+            continue
+        label_cell = LABEL_CELL_RE.fullmatch(text)
+        if label_cell:
+            pending_label = label_cell.group("label")
+        elif HEADER_LABEL_RE.search(text):
+            pending_label = parse_header_text(text, header_info)
+        elif pending_label:
+            # Merged cells repeat the value, so only the first copy is used
+            _set_header_value(header_info, pending_label, text)
+            pending_label = None
+
+
+def is_column_header(cells):
+    return bool(cells) and bool(COLUMN_HEADER_RE.match(cell_text(cells[0])))
+
+
+def find_registration_column(cells, reg_pattern=DEFAULT_REGISTRATION_PATTERN):
+    """Index of the registration-number column, from a column header row or a student row."""
+    texts = [cell_text(cell) for cell in cells]
+    if is_column_header(cells):
+        return next((i for i, text in enumerate(texts) if REG_NO_COLUMN_RE.fullmatch(text)), None)
+    return next((i for i, text in enumerate(texts) if reg_pattern.fullmatch(text)), None)
+
+
+def parse_student_cells(cells, reg_idx, reg_pattern=DEFAULT_REGISTRATION_PATTERN, source="table"):
+    """Parse a table row laid out as name, ..., reg no, department, level, C.A., exam, total, grade.
+
+    `reg_idx` is the registration-number column found by `find_registration_column`.
+    Returns a result dict, or None when the row is not a student row.
+    """
+    if len(cells) < reg_idx + 7:
+        return None
+    registration_number = cell_text(cells[reg_idx])
+    if not reg_pattern.fullmatch(registration_number):
+        return None
+    texts = [cell_text(cell) for cell in cells[reg_idx + 1:reg_idx + 7]]
+    try:
+        return {
+            "name": cell_text(cells[0]),  # Name is always first column
+            "registration_number": registration_number,
+            "department": texts[0],
+            "level": texts[1],
+            "continuous_assessment": float(texts[2]),
+            "exam_score": float(texts[3]),
+            "total_score": float(texts[4]),
+            "grade": texts[5]
+        }
+    except ValueError as e:
+        logger.warning("Skipping unreadable row in %s: %s", source, e)
+        return None
+
+
+@lru_cache(maxsize=None)
+def _student_line_re(reg_pattern):
+    return re.compile(
+        rf"^(?P<name>.+?)\s+(?P<reg>{reg_pattern.pattern})\s+(?P<middle>.*?)\s*"
+        rf"(?P<ca>{_NUMBER})\s+(?P<exam>{_NUMBER})\s+(?P<total>{_NUMBER})\s+(?P<grade>[A-F])\s*$"
+    )
+
+
+def parse_student_line(line, reg_pattern=DEFAULT_REGISTRATION_PATTERN):
+    """Parse a PDF text line laid out as name, reg no, department, level, C.A., exam, total, grade."""
+    match = _student_line_re(reg_pattern).match(line.strip())
+    if not match:
+        return None
+    middle = match.group("middle").split()
+    level = middle.pop() if middle and middle[-1].isdigit() else "100"
+    return {
+        "name": match.group("name").strip(),
+        "registration_number": match.group("reg"),
+        "department": " ".join(middle),
+        "level": level,
+        "continuous_assessment": float(match.group("ca")),
+        "exam_score": float(match.group("exam")),
+        "total_score": float(match.group("total")),
+        "grade": match.group("grade")
+    }
+
+
+def parse_lines(lines, header_info=None, reg_pattern=DEFAULT_REGISTRATION_PATTERN):
+    """Classify each text line once: student rows are returned, header pairs go into `header_info`.
+
+    Pass `header_info=None` for pages that carry no header block.
+    """
+    results_data = []
+    for line in lines:
+        record = parse_student_line(line, reg_pattern)
+        if record:
+            results_data.append(record)
+        elif header_info is not None and HEADER_LABEL_RE.search(line):
+            parse_header_text(line, header_info)
+    return results_data
+
+
+class StudentRowParser:
+    """Parses the student rows of one table, locating the registration-number column once.
+
+    The column comes from the "Reg.No" cell of the column header row, or else from the first
+    row that parses as a student. After that each row is checked by indexing straight into it.
+    The pattern follows the faculty in `header_info`, which may fill in as the table is read.
+    """
+
+    def __init__(self, registration_patterns, header_info, source="table"):
+        self.registration_patterns = registration_patterns
+        self.header_info = header_info
+        self.source = source
+        self.reg_idx = None
+
+    def column_header(self, cells):
+        self.reg_idx = find_registration_column(cells)
+
+    def parse(self, cells):
+        reg_pattern = self.registration_patterns.for_faculty(self.header_info["faculty"])
+        if self.reg_idx is not None:
+            return parse_student_cells(cells, self.reg_idx, reg_pattern, self.source)
+
+        reg_idx = find_registration_column(cells, reg_pattern)
+        if reg_idx is None:
+            return None
+        record = parse_student_cells(cells, reg_idx, reg_pattern, self.source)
+        if record:
+            self.reg_idx = reg_idx
+        return record
+
+
+def iter_table_records(rows, registration_patterns=None, source="table"):
+    """Stream a header block followed by student rows: yields header info first, then each record."""
+    header_info = empty_header_info()
+    row_parser = StudentRowParser(registration_patterns or RegistrationPatterns(), header_info, source)
+    rows = iter(rows)
+
+    for cells in rows:
+        if is_column_header(cells):
+            row_parser.column_header(cells)
+            break
+        parse_header_cells(cells, header_info)
+    else:
+        logger.warning("Could not find the header row in %s", source)
+        yield header_info
+        return
+
+    yield header_info
+
+    for cells in rows:
+        record = row_parser.parse(cells)
+        if record:
+            yield record
@@ -0,0 +1,162 @@
+# flask-app/app/revocation.py
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import redis
+
+from . import db
+from .models import TokenBlacklist
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings. Membership may give false positives, never false negatives."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationCache:
+    """Answers "is this token revoked?" without a database query for almost every request.
+
+    Every revoked jti is added to an in-process bloom filter, refreshed incrementally from
+    `TokenBlacklist.revoked_at`. A token whose jti is not in the filter is certainly not revoked
+    as of the last refresh; a filter hit is confirmed against the database once and then kept in
+    a small LRU. With `JWT_REVOCATION_PUBSUB` enabled, logouts are fanned out over Redis so
+    every gunicorn worker learns about them immediately instead of at its next refresh.
+    """
+
+    CHANNEL = 'token_revocations'
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._pubsub_thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.refresh_interval = app.config['JWT_REVOCATION_REFRESH_SECONDS']
+        self.capacity = app.config['JWT_REVOCATION_BLOOM_CAPACITY']
+        self.confirmed_size = app.config['JWT_REVOCATION_LRU_SIZE']
+        # Tokens revoked before this window have expired, so they never need to be loaded
+        self.window = max(app.config['JWT_ACCESS_TOKEN_EXPIRES'], app.config['JWT_REFRESH_TOKEN_EXPIRES'])
+        # Rows are stamped before they commit, so each refresh re-reads a short overlap
+        self.overlap = timedelta(seconds=app.config['JWT_REVOCATION_SYNC_OVERLAP_SECONDS'])
+        self._reset()
+
+        self._redis = None
+        if app.config.get('JWT_REVOCATION_PUBSUB'):
+            self._redis = redis.Redis.from_url(app.config['REDIS_URL'])
+            self._start_listener()
+        app.extensions['revocation_cache'] = self
+
+    def _reset(self):
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity)
+            self._confirmed = OrderedDict()
+            self._synced_until = None
+            self._next_refresh = 0.0
+            # jtis in the filter that the next refresh's overlap re-reads; they are not added twice
+            self._overlap_jtis = set()
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now < self._next_refresh:
+            return
+        started_at = datetime.utcnow()
+        since = (self._synced_until - self.overlap) if self._synced_until else started_at - self.window
+        rows = (db.session.query(TokenBlacklist.jti, TokenBlacklist.revoked_at)
+                .filter(TokenBlacklist.revoked_at >= since).all())
+        with self._lock:
+            jtis = [jti for jti, _ in rows if jti not in self._overlap_jtis]
+            if self._bloom.count + len(jtis) > self.capacity:
+                # Full filters lose accuracy; rebuild from the tokens that can still be valid
+                self._bloom = BloomFilter(self.capacity)
+                rows = (db.session.query(TokenBlacklist.jti, TokenBlacklist.revoked_at)
+                        .filter(TokenBlacklist.revoked_at >= started_at - self.window).all())
+                jtis = [jti for jti, _ in rows]
+            for jti in jtis:
+                self._bloom.add(jti)
+            next_since = started_at - self.overlap
+            self._overlap_jtis = {jti for jti, revoked_at in rows if revoked_at >= next_since}
+            self._synced_until = started_at
+            self._next_refresh = now + self.refresh_interval
+
+    def _remember(self, jti):
+        with self._lock:
+            self._confirmed[jti] = True
+            self._confirmed.move_to_end(jti)
+            while len(self._confirmed) > self.confirmed_size:
+                self._confirmed.popitem(last=False)
+
+    def is_revoked(self, jti):
+        self._refresh()
+        with self._lock:
+            if jti not in self._bloom:
+                return False
+            if jti in self._confirmed:
+                self._confirmed.move_to_end(jti)
+                return True
+        # Possible false positive: confirm against the database
+        if TokenBlacklist.query.filter_by(jti=jti).scalar() is None:
+            return False
+        self._remember(jti)
+        return True
+
+    def revoke(self, jti):
+        """Record a jti that has just been committed to the blacklist."""
+        self._add_local(jti)
+        if self._redis is not None:
+            try:
+                self._redis.publish(self.CHANNEL, jti)
+            except redis.RedisError:
+                pass  # Other workers still pick it up at their next refresh
+
+    def _add_local(self, jti):
+        with self._lock:
+            if jti not in self._overlap_jtis:
+                self._bloom.add(jti)
+                # Just revoked, so the next refresh reads it again
+                self._overlap_jtis.add(jti)
+        self._remember(jti)
+
+    def _start_listener(self):
+        if self._pubsub_thread is not None:
+            return
+
+        def listen():
+            while True:
+                try:
+                    pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(self.CHANNEL)
+                    for message in pubsub.listen():
+                        self._add_local(message['data'].decode())
+                except redis.RedisError:
+                    time.sleep(5)  # Redis unavailable; refreshes from the database still apply
+
+        self._pubsub_thread = threading.Thread(target=listen, name='token-revocations', daemon=True)
+        self._pubsub_thread.start()
+
+
+revocation_cache = RevocationCache()
@@ -1,22 +1,33 @@
 # flask-app/app/routes.py
 import os
-from flask import Blueprint, request, jsonify, session, abort
+from flask import Blueprint, request, jsonify, session, abort, current_app
 from flask_jwt_extended import create_access_token, jwt_required as original_jwt_required, get_jwt_identity, get_jwt, decode_token, verify_jwt_in_request, create_refresh_token
 from .utils import (create_error_response, get_user_by_id, get_user_by_username, get_user_by_email,
                     get_student_by_registration, check_required_fields,
                     get_or_create_course, get_or_create_semester, process_result, save_file, save_results_to_db, send_otp_email,
-                    process_uploaded_file, process_scores_data)
+                    process_uploaded_file, ingest_uploaded_file, process_scores_data,
+                    get_current_user, current_user_claim, user_claims, result_summary_query,
+                    refresh_student_summaries, get_student_results, patch_result_scores, InvalidScorePatch,
+                    find_student_ids, create_students, upsert_scores)
+from .jobs import upload_jobs
+from .revocation import revocation_cache
+from .audit import audit_log
+from .pagination import InvalidCursor, paginate_request, page_envelope
+from .search import apply_search, contains_filter
+from .transcripts import (department_students, get_transcript_cache, has_session_results, render_transcript_pdf,
+                          stream_department_transcripts, transcript_etag, transcript_version)
 from .models import User, db, Result, Student, Course, Semester, ActionLog, TokenBlacklist, Score
 from .constants import ALLOWED_ROLES, UPLOAD_FOLDER
 from functools import wraps
 from flask_restx import Api, Resource, fields, Namespace
 import json
+import redis
 from sqlalchemy.orm import joinedload
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from werkzeug.http import is_resource_modified
 import random
 import string
-from flask import Response
-from fpdf import FPDF
+from flask import Response, stream_with_context
 import re
 
 import logging
@@ -140,9 +151,9 @@ def jwt_required(*args, **kwargs):
             except Exception as e:  
                 abort(401, description=str(e))  # Handle the exception and return unauthorized  
 
-            # Now that the token is verified, check if it's blacklisted  
+            # Now that the token is verified, check if it's blacklisted (usually without a database query)  
             jti = get_jwt()["jti"]  
-            if TokenBlacklist.query.filter_by(jti=jti).scalar() is not None:  
+            if revocation_cache.is_revoked(jti):  
                 abort(401, description="Token has been revoked")  # Unauthorized  
 
             return fn(*args, **kwargs)  # Call the original function  
@@ -150,18 +161,13 @@ def jwt_required(*args, **kwargs):
     return wrapper  
 
 # Authorization decorator  
-# Role-based access control decorator
+# Role-based access control decorator (expects the JWT to be verified already)
 def role_required(*roles):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Verify JWT and extract the current user's identity
-            verify_jwt_in_request()  
-            current_user_id = get_jwt_identity()
-            
-            # Fetch the current user (adjust based on your User model)
-            current_user = User.query.get(current_user_id)
-            if current_user is None or current_user.role not in roles:
+            # Role comes from the token claims or the request-scoped current user
+            if current_user_claim('role') not in roles:
                 return {"error": "You are not authorized to access this resource"}, 403
             
             return f(*args, **kwargs)
@@ -171,15 +177,14 @@ def role_required(*roles):
 # JWT role decorator (combines JWT verification and role checks)
 def jwt_role_required(*roles):
     def decorator(fn):
+        secured_function = role_required(*roles)(fn)
+
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            # Verify JWT before proceeding
+            # Verify JWT once per request; role_required reuses the decoded token
             verify_jwt_in_request()
-            
-            # Apply role-based access control
-            @role_required(*roles)
-            def secured_function(*args, **kwargs):
-                return fn(*args, **kwargs)
+            if revocation_cache.is_revoked(get_jwt()["jti"]):
+                abort(401, description="Token has been revoked")
             
             return secured_function(*args, **kwargs)
         return wrapper
@@ -222,7 +227,7 @@ class Register(Resource):
         db.session.commit()
 
         # Log action
-        log = ActionLog(
+        audit_log.record(
             user_id=None,
             action="register_user",
             resource="User",
@@ -231,8 +236,6 @@ class Register(Resource):
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(log)
-        db.session.commit()
 
         return {"message": "User registered successfully"}, 201
 
@@ -253,11 +256,11 @@ class Login(Resource):
 
         user = get_user_by_username(username) if username else get_user_by_email(email)
         if user and user.check_password(password):
-            access_token = create_access_token(identity=user.id)
+            access_token = create_access_token(identity=user.id, additional_claims=user_claims(user))
             refresh_token = create_refresh_token(identity=user.id)
 
             # Log action
-            log = ActionLog(
+            audit_log.record(
                 user_id=user.id,
                 action="login",
                 resource="User",
@@ -266,8 +269,6 @@ class Login(Resource):
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent')
             )
-            db.session.add(log)
-            db.session.commit()
 
             return {"access_token": access_token, "refresh_token": refresh_token, "role": user.role}, 200
 
@@ -282,20 +283,20 @@ class Logout(Resource):
 
         token = TokenBlacklist(jti=jti, token_type=token_type)  
 
-        # Log the action  
-        log = ActionLog(  
-            user_id=get_jwt_identity(),  
-            action="logout",  
-            resource="Token",  
-            details=json.dumps({"jti": jti}),  
-            ip_address=request.remote_addr,  
-            user_agent=request.headers.get('User-Agent')  
-        )  
-
         try:  
             db.session.add(token)  
-            db.session.add(log)  
             db.session.commit()  
+            revocation_cache.revoke(jti)  
+
+            # Log the action  
+            audit_log.record(  
+                user_id=get_jwt_identity(),  
+                action="logout",  
+                resource="Token",  
+                details=json.dumps({"jti": jti}),  
+                ip_address=request.remote_addr,  
+                user_agent=request.headers.get('User-Agent')  
+            )  
             return {"message": "Successfully logged out"}, 200  
         except Exception as e:  
             db.session.rollback()  # Rollback the session  
@@ -307,10 +308,12 @@ class RefreshToken(Resource):
     def post(self):
         """Refresh access token"""
         current_user_id = get_jwt_identity()
-        access_token = create_access_token(identity=current_user_id)  # Generate ONLY access token
+        user = get_current_user()
+        access_token = create_access_token(identity=current_user_id,
+                                           additional_claims=user_claims(user) if user else None)  # Generate ONLY access token
 
         # Log action
-        log = ActionLog(
+        audit_log.record(
             user_id=current_user_id,
             action="refresh_token",
             resource="Token",
@@ -318,8 +321,6 @@ class RefreshToken(Resource):
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(log)
-        db.session.commit()
 
         return {"access_token": access_token}, 200  # Only return access token
 
@@ -329,11 +330,11 @@ class Me(Resource):
     def get(self):
         """Get current user information"""
         current_user_id = get_jwt_identity()
-        user = get_user_by_id(current_user_id)
+        user = get_current_user()
 
         if user:
             # Log action
-            log = ActionLog(
+            audit_log.record(
                 user_id=current_user_id,
                 action="view_profile",
                 resource="User",
@@ -342,8 +343,6 @@ class Me(Resource):
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent')
             )
-            db.session.add(log)
-            db.session.commit()
 
             return {
                 "id": user.id,
@@ -383,7 +382,7 @@ class ForgotPassword(Resource):
         send_otp_email(email, otp)  
 
         # Log action  
-        log = ActionLog(  
+        audit_log.record(  
             user_id=user.id,  
             action="forgot_password",  
             resource="User",  
@@ -392,8 +391,6 @@ class ForgotPassword(Resource):
             ip_address=request.remote_addr,  
             user_agent=request.headers.get('User-Agent')  
         )  
-        db.session.add(log)  
-        db.session.commit()  
 
         return {"message": "OTP sent to your email"}, 200 
 
@@ -426,7 +423,7 @@ class ResetPassword(Resource):
             db.session.commit()  
 
             # Log the action  
-            log = ActionLog(  
+            audit_log.record(  
                 user_id=user.id,  
                 action="reset_password",  
                 resource="User",  
@@ -435,8 +432,6 @@ class ResetPassword(Resource):
                 ip_address=request.remote_addr,  
                 user_agent=request.headers.get('User-Agent')  
             )  
-            db.session.add(log)  
-            db.session.commit()  
 
             return {"message": "Password reset successfully"}, 200  
 
@@ -456,7 +451,7 @@ class UpdateUsername(Resource):
             return {"error": "New username is required"}, 400
 
         current_user_id = get_jwt_identity()
-        user = get_user_by_id(current_user_id)
+        user = get_current_user()
 
         if User.query.filter_by(username=new_username).first():
             return {"error": "Username already taken"}, 400
@@ -466,7 +461,7 @@ class UpdateUsername(Resource):
         db.session.commit()
 
         # Log action
-        log = ActionLog(
+        audit_log.record(
             user_id=current_user_id,
             action="update_username",
             resource="User",
@@ -475,8 +470,6 @@ class UpdateUsername(Resource):
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(log)
-        db.session.commit()
 
         return {"message": "Username updated successfully"}, 200
 
@@ -493,7 +486,7 @@ class UpdateEmail(Resource):
             return {"error": "New email is required"}, 400
 
         current_user_id = get_jwt_identity()
-        user = get_user_by_id(current_user_id)
+        user = get_current_user()
 
         if User.query.filter_by(email=new_email).first():
             return {"error": "Email already taken"}, 400
@@ -503,7 +496,7 @@ class UpdateEmail(Resource):
         db.session.commit()
 
         # Log action
-        log = ActionLog(
+        audit_log.record(
             user_id=current_user_id,
             action="update_email",
             resource="User",
@@ -512,8 +505,6 @@ class UpdateEmail(Resource):
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(log)
-        db.session.commit()
 
         return {"message": "Email updated successfully"}, 200
 
@@ -531,7 +522,7 @@ class ChangePassword(Resource):
             return {"error": "Old password and new password are required"}, 400
 
         current_user_id = get_jwt_identity()
-        user = get_user_by_id(current_user_id)
+        user = get_current_user()
 
         if not user.check_password(old_password):
             return {"error": "Incorrect old password"}, 400
@@ -541,7 +532,7 @@ class ChangePassword(Resource):
         db.session.commit()
 
         # Log action
-        log = ActionLog(
+        audit_log.record(
             user_id=current_user_id,
             action="change_password",
             resource="User",
@@ -550,8 +541,6 @@ class ChangePassword(Resource):
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(log)
-        db.session.commit()
 
         return {"message": "Password changed successfully"}, 200
 
@@ -571,75 +560,86 @@ class SubmitResults(Resource):
         if error_response:
             return error_response
 
+        if not isinstance(data['results'], list):
+            return create_error_response("results must be a list of score objects")
+
+        # Validate every row before writing anything; a student listed twice keeps their last row
+        required_result_fields = ['registration_number', 'ca_score', 'exam_score', 'total_score', 'grade']
+        rows_by_registration = {}
+        for result_data in data['results']:
+            if not isinstance(result_data, dict):
+                return create_error_response("Each result must be an object")
+            error_response = check_required_fields(result_data, required_result_fields)
+            if error_response:
+                return error_response
+            rows_by_registration[result_data['registration_number']] = result_data
+
+        # Resolve every student in one lookup
+        student_ids = find_student_ids(rows_by_registration)
+        new_students = {}
+        for registration_number, result_data in rows_by_registration.items():
+            if registration_number in student_ids:
+                continue
+            if not result_data.get('student_name'):
+                return create_error_response(
+                    f"Student name is required for new student with registration number {registration_number}")
+            new_students[registration_number] = {"name": result_data['student_name'], "department": data['department']}
+
         lecturer_id = get_jwt_identity()
 
-        # Fetch or create the course
-        course = get_or_create_course({
-            "code": data['course_code'],
-            "title": data['course_title'],
-            "unit": data['course_unit'],
-            "department": data['department'],
-            "faculty": data['faculty'],
-            "level": data['level']
-        })
-
-        # Fetch or create the semester
-        semester = get_or_create_semester(data['session'], data['semester_name'])
-
-        # Check if a result for this course and semester already exists
-        result = Result.query.filter_by(
-            course_id=course.id,
-            semester_id=semester.id
-        ).first()
+        try:
+            # Fetch or create the course
+            course = get_or_create_course({
+                "code": data['course_code'],
+                "title": data['course_title'],
+                "unit": data['course_unit'],
+                "department": data['department'],
+                "faculty": data['faculty'],
+                "level": data['level']
+            })
 
-        if not result:
-            # Create a new result
-            result = Result(
-                course_id=course.id,
-                semester_id=semester.id,
-                uploader_lecturer_id=lecturer_id,
-                upload_date=datetime.utcnow()
-            )
-            db.session.add(result)
-            db.session.flush()  # Get `result.id` for linking scores
+            # Fetch or create the semester
+            semester = get_or_create_semester(data['session'], data['semester_name'])
+            db.session.flush()
 
-        try:
-            # Process each score
-            for result_data in data['results']:
-                # Validate required fields in each result
-                required_result_fields = ['registration_number', 'ca_score', 'exam_score', 'total_score', 'grade']
-                error_response = check_required_fields(result_data, required_result_fields)
-                if error_response:
-                    return error_response
-
-                # Fetch or create the student
-                student = get_student_by_registration(result_data['registration_number'])
-                if not student:
-                    student = Student(
-                        registration_number=result_data['registration_number'],
-                        name=result_data['student_name'],
-                        department=data['department']
-                    )
-                    db.session.add(student)
-                    db.session.flush()  # Ensure `student.id` is available
-
-                # Save the score linked to the result
-                score = Score(
-                    result_id=result.id,  # Link the score to the shared result
-                    student_id=student.id,
-                    continuous_assessment=result_data['ca_score'],
-                    exam_score=result_data['exam_score'],
-                    total_score=result_data['total_score'],
-                    grade=result_data['grade']
+            # Check if a result for this course and semester already exists
+            result = Result.query.filter_by(
+                course_id=course.id,
+                semester_id=semester.id
+            ).first()
+
+            if not result:
+                # Create a new result
+                result = Result(
+                    course_id=course.id,
+                    semester_id=semester.id,
+                    uploader_lecturer_id=lecturer_id,
+                    upload_date=datetime.utcnow()
                 )
-                db.session.add(score)
+                db.session.add(result)
+                db.session.flush()  # Get `result.id` for linking scores
+
+            if new_students:
+                student_ids.update(create_students(new_students))
+
+            # A resubmitted student replaces their score
+            upsert_scores(result.id, [{
+                "student_id": student_ids[registration_number],
+                "continuous_assessment": result_data['ca_score'],
+                "exam_score": result_data['exam_score'],
+                "total_score": result_data['total_score'],
+                "grade": result_data['grade']
+            } for registration_number, result_data in rows_by_registration.items()])
+
+            # Keep the per-student GPA summaries in step with the new scores
+            refresh_student_summaries(student_ids.values())
 
             # Commit all changes
             db.session.commit()
 
             # Log action for submitting results
             current_user_id = get_jwt_identity()
-            log = ActionLog(
+            audit_log.record(
                 user_id=current_user_id,
                 action="submit_result",
                 resource="Result",
@@ -648,8 +648,6 @@ class SubmitResults(Resource):
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent')
             )
-            db.session.add(log)
-            db.session.commit()
 
             return {"message": "Results submitted successfully", "result": result.id}, 200
         except Exception as e:
@@ -661,12 +659,16 @@ class ResultListView(Resource):
     @results_ns.doc(params={
         'department': 'Filter by department (optional)',
         'course_code': 'Filter by course code (optional)',
-        'semester': 'Filter by semester (optional)',
-        'session': 'Filter by academic session (optional)',
+        'semester': 'Filter by semester term, e.g. FIRST (optional, exact match)',
+        'session': 'Filter by academic session, e.g. 2019/2020 (optional, exact match)',
         'page': 'Page number for pagination (optional, default=1)',
-        'per_page': 'Number of results per page (optional, default=10)'
+        'per_page': 'Number of results per page (optional, default=10)',
+        'pagination': "Set to 'cursor' for cursor pagination (optional)",
+        'cursor': 'next_cursor or prev_cursor from a previous page (optional)',
+        'include_total': 'Include total_results in cursor mode (optional, default=false)'
     })
     @results_ns.response(200, 'Results list retrieved successfully')
+    @results_ns.response(400, 'Invalid cursor')
     @results_ns.doc(security='Bearer')
     @jwt_role_required('hod', 'exam_officer', 'lecturer')
     def get(self):
@@ -676,27 +678,24 @@ class ResultListView(Resource):
         course_code = request.args.get('course_code')
         semester = request.args.get('semester')
         session = request.args.get('session')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
 
-        # Initialize query
-        query = Result.query
+        # Initialize query (course, semester, uploader and score count in one statement)
+        query = result_summary_query()
 
         # Apply filters
         if department:
-            query = query.join(Course).filter(Course.department.ilike(f"%{department}%"))
+            query = query.filter(contains_filter(Course.department, department))
         if course_code:
-            query = query.join(Course).filter(Course.code.ilike(f"%{course_code}%"))
+            query = query.filter(contains_filter(Course.code, course_code))
         if semester:
-            query = query.join(Semester).filter(Semester.name.ilike(f"%{semester}%"))
+            query = query.filter(Semester.term == semester.strip().upper())
         if session:
-            query = query.join(Semester).filter(Semester.name.ilike(f"%{session}%"))
+            query = query.filter(Semester.session == session.strip())
 
         # Access Control: Lecturers can only view results they've submitted or the ones associated with courses they teach
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
 
-        if current_user.role == 'lecturer':
+        if current_user_claim('role') == 'lecturer':
             # Check results that the lecturer has submitted or courses they are teaching
             query = query.filter(
                 (Result.uploader_lecturer_id == current_user_id) |  # Submitted by lecturer
@@ -704,30 +703,30 @@ class ResultListView(Resource):
             )
 
         # Fetch paginated results
-        results = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            results = paginate_request(query, request.args, (Result.id,), lambda row: (row[0].id,))
+        except InvalidCursor as e:
+            return {"error": str(e)}, 400
 
         # Prepare metadata for each result
         result_list = []
-        for result in results.items:
+        for result, num_scores in results.items:
             result_list.append({
                 "id": result.id,
                 "course_code": result.course.code,
                 "course_title": result.course.title,
-                "semester": result.semester.name.split()[1],
-                "session": result.semester.name.split()[0],
+                "semester": result.semester.term,
+                "session": result.semester.session,
                 "uploaded_by": result.uploader.username,
                 "upload_date": result.upload_date.isoformat() if result.upload_date else None,
                 "department": result.course.department,
                 "faculty": result.course.faculty,
-                "num_scores": len(result.scores)  # Count of scores associated with the result
+                "num_scores": num_scores  # Count of scores associated with the result
             })
 
         return {
             "results": result_list,
-            "total_results": results.total,
-            "current_page": results.page,
-            "total_pages": results.pages,
-            "per_page": results.per_page
+            **page_envelope(results)
         }, 200
 
 @results_ns.route('/<int:result_id>')
@@ -744,9 +743,9 @@ class ResultDetailView(Resource):
 
         # Access Control: Lecturers can only view results they've submitted or courses they teach
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
 
-        if current_user.role == 'lecturer':
+        if current_user_claim('role') == 'lecturer':
+            current_user = get_current_user()
             if result.uploader_lecturer_id != current_user_id and current_user not in result.course.lecturers:
                 return {"error": "You are not authorized to view this result"}, 403
 
@@ -758,8 +757,8 @@ class ResultDetailView(Resource):
             "id": result.id,
             "course_code": result.course.code,
             "course_title": result.course.title,
-            "semester": result.semester.name.split()[1],
-            "session": result.semester.name.split()[0],
+            "semester": result.semester.term,
+            "session": result.semester.session,
             "uploaded_by": result.uploader.username,
             "upload_date": result.upload_date.isoformat() if result.upload_date else None,  # Serialize datetime
             "department": result.course.department,
@@ -777,7 +776,7 @@ class ResultDetailView(Resource):
         }
 
         # Log the action for viewing result details
-        log = ActionLog(
+        audit_log.record(
             user_id=current_user_id,
             action="view_result_detail",
             resource="Result",
@@ -786,8 +785,6 @@ class ResultDetailView(Resource):
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(log)
-        db.session.commit()
 
         return response, 200
 
@@ -795,7 +792,8 @@ class ResultDetailView(Resource):
 class ResultsByRegistration(Resource):
     @results_ns.doc(params={
         'registration_number': 'Student registration number (required)',
-        'session': 'Academic session (optional)'
+        'session': 'Academic session (optional)',
+        'detail': 'Include course lines for each semester (optional, default=true)'
     })
     @results_ns.response(200, 'Results retrieved successfully')
     @results_ns.response(404, 'Student not found')
@@ -807,6 +805,7 @@ class ResultsByRegistration(Resource):
         # Get query parameters
         registration_number = request.args.get('registration_number')
         session = request.args.get('session')
+        detail = request.args.get('detail', 'true').lower() != 'false'
 
         # Validate the registration number
         if not registration_number:
@@ -817,24 +816,14 @@ class ResultsByRegistration(Resource):
         if not student:
             return {"error": f"Student with registration number '{registration_number}' not found."}, 404
 
-        # Query scores and join with related models
-        query = Score.query.options(
-            joinedload(Score.result).joinedload(Result.course),
-            joinedload(Score.result).joinedload(Result.semester)
-        ).filter(Score.student_id == student.id)
-
-        if session:
-            query = query.join(Result.semester).filter(Semester.name.like(f'{session}%'))
-
-        scores = query.all()
+        # Precomputed semester totals, plus course lines when detail is requested
+        grouped_results, total_credit_earned, total_grade_point, results_count = get_student_results(
+            student.id, session, detail)
 
         # Handle case where no results are found
-        if not scores:
+        if not grouped_results:
             return {"error": f"No results found for student '{registration_number}'."}, 404
 
-        # Process scores data grouped by session and semester
-        grouped_results, total_credit_earned, total_grade_point = process_scores_data(scores)
-
         session_results = []
         for session_name, session_data in grouped_results.items():
             session_results.append({
@@ -853,7 +842,7 @@ class ResultsByRegistration(Resource):
 
         # Log the action
         current_user_id = get_jwt_identity()
-        log = ActionLog(
+        audit_log.record(
             user_id=current_user_id,
             action="view_results_by_registration",
             resource="Score",
@@ -861,14 +850,12 @@ class ResultsByRegistration(Resource):
             details=json.dumps({
                 "registration_number": registration_number,
                 "session": session,
-                "results_count": len(scores),
+                "results_count": results_count,
                 "cgpa": cgpa
             }),
             ip_address=request.remote_addr,
             user_agent=request.headers.get('User-Agent')
         )
-        db.session.add(log)
-        db.session.commit()
 
         # Prepare response data
         return {
@@ -889,6 +876,7 @@ class DownloadStudentTranscript(Resource):
         'session': 'Academic session (optional)'
     })
     @results_ns.response(200, 'Transcript generated successfully')
+    @results_ns.response(304, 'Transcript not modified since the ETag or date sent')
     @results_ns.response(404, 'Student not found')
     @results_ns.response(400, 'Missing required parameters')
     @results_ns.produces(['application/pdf'])
@@ -905,82 +893,137 @@ class DownloadStudentTranscript(Resource):
         if not student:
             return {"error": f"Student with registration number '{registration_number}' not found."}, 404
 
-        query = Score.query.options(
-            joinedload(Score.result).joinedload(Result.course),
-            joinedload(Score.result).joinedload(Result.semester)
-        ).filter(Score.student_id == student.id)
-
-        if session:
-            query = query.join(Result.semester).filter(Semester.name.like(f'{session}%'))
+        last_modified = transcript_version(student.id)
+        if last_modified is None:
+            # Backfills summaries that predate the summary table
+            get_student_results(student.id, session, detail=False)
+            last_modified = transcript_version(student.id)
+        if last_modified is None or (session and not has_session_results(student.id, session)):
+            return {"error": f"No results found for student '{registration_number}'."}, 404
 
-        scores = query.all()
+        etag = transcript_etag(student, session, last_modified)
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+            response = Response(status=304)
+        else:
+            # Rendered PDFs are reused until the student's scores change
+            cache = get_transcript_cache()
+            pdf = cache.get(etag)
+            if pdf is None:
+                grouped_results, total_credit_earned, total_grade_point, _ = get_student_results(student.id, session)
+                if not grouped_results:
+                    return {"error": f"No results found for student '{registration_number}'."}, 404
+
+                pdf = render_transcript_pdf(student.name, student.registration_number, session, grouped_results,
+                                            total_credit_earned, total_grade_point)
+                cache.set(etag, pdf)
+
+            # Output as a response
+            response = Response(pdf, mimetype='application/pdf')
+            response.headers['Content-Disposition'] = f'attachment; filename={student.registration_number}_transcript.pdf'
+
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
 
-        if not scores:
-            return {"error": f"No results found for student '{registration_number}'."}, 404
+@results_ns.route('/transcripts/bulk')
+class DownloadBulkTranscripts(Resource):
+    @results_ns.doc(params={
+        'department': 'Student department (required)',
+        'session': 'Academic session (optional)'
+    })
+    @results_ns.response(200, 'ZIP archive of transcripts, streamed')
+    @results_ns.response(404, 'No students found in the department')
+    @results_ns.response(400, 'Missing required parameters')
+    @results_ns.produces(['application/zip'])
+    @results_ns.doc(security='Bearer')
+    @jwt_role_required('hod', 'exam_officer')
+    def get(self):
+        """Download a ZIP with the transcript PDF of every student in a department"""
+        department = request.args.get('department')
+        session = request.args.get('session')
 
-        # Process data
-        grouped_results, total_credit_earned, total_grade_point = process_scores_data(scores)
+        if not department:
+            return {"error": "Missing required query parameter: department"}, 400
 
-        # Debugging: Print grouped_results structure
-        print("DEBUG: grouped_results structure:", grouped_results)
+        students = department_students(department)
+        if not students:
+            return {"error": f"No students found in department '{department}'."}, 404
 
-        # Ensure safe defaults for total_credit_earned & total_grade_point
-        total_credit_earned = total_credit_earned or 0
-        total_grade_point = total_grade_point or 0
-        cgpa = round(total_grade_point / total_credit_earned, 2) if total_credit_earned > 0 else 0
+        # Log the action
+        audit_log.record(
+            user_id=get_jwt_identity(),
+            action="download_bulk_transcripts",
+            resource="Student",
+            details=json.dumps({"department": department, "session": session, "students_count": len(students)}),
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
 
-        # Create PDF
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-        pdf.set_font("Arial", style='B', size=16)
-        pdf.cell(200, 10, "Student Transcript", ln=True, align='C')
-        pdf.ln(10)
-
-        # Student Details
-        pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, f"Name: {student.name}", ln=True)
-        pdf.cell(0, 10, f"Registration Number: {student.registration_number}", ln=True)
-        pdf.cell(0, 10, f"Session: {session if session else 'All Sessions'}", ln=True)
-        pdf.cell(0, 10, f"CGPA: {cgpa}", ln=True)
-        pdf.ln(10)
-
-        # Results with CA Score, Exam Score, and Semester GPA
-        for session_name, session_data in grouped_results.items():  
-            pdf.set_font("Arial", style='B', size=12)
-            pdf.cell(0, 10, f"Session: {session_name}", ln=True)
-            pdf.set_font("Arial", size=11)
-
-            for semester, semester_data in session_data.get("results_by_semester", {}).items():
-                semester_gpa = semester_data.get("GPA", round(semester_data["total_grade_point"] / semester_data["total_credit_earned"], 2) if semester_data["total_credit_earned"] > 0 else 0)
-
-                pdf.cell(0, 8, f"  Semester: {semester} (GPA: {semester_gpa})", ln=True)
-                pdf.cell(30, 8, "Course Code", border=1)
-                pdf.cell(70, 8, "Course Title", border=1)
-                pdf.cell(20, 8, "CA Score", border=1)
-                pdf.cell(20, 8, "E.Score", border=1)
-                pdf.cell(20, 8, "T.Score", border=1)
-                pdf.cell(20, 8, "Grade", border=1)
-                pdf.ln()
-
-                for course in semester_data["courses"]:
-                    pdf.cell(30, 8, course["course_code"], border=1)
-                    pdf.cell(70, 8, course["course_title"], border=1)
-                    pdf.cell(20, 8, str(course["ca_score"]), border=1)
-                    pdf.cell(20, 8, str(course["exam_score"]), border=1)
-                    pdf.cell(20, 8, str(course["total_score"]), border=1)
-                    pdf.cell(20, 8, course["grade"], border=1)
-                    pdf.ln()
-
-                pdf.cell(0, 8, f"  Total Credit Earned: {semester_data['total_credit_earned']}", ln=True)
-                pdf.cell(0, 8, f"  Total Grade Point: {semester_data['total_grade_point']}", ln=True)
-                pdf.ln(5)
-
-        # Output as a response
-        response = Response(pdf.output(dest='S').encode('latin1'), mimetype='application/pdf')
-        response.headers['Content-Disposition'] = f'attachment; filename={student.registration_number}_transcript.pdf'
+        archive = stream_department_transcripts(
+            students, session,
+            workers=current_app.config.get('TRANSCRIPT_RENDER_WORKERS', 1),
+            batch_size=current_app.config.get('TRANSCRIPT_BATCH_SIZE', 50)
+        )
+        response = Response(stream_with_context(archive), mimetype='application/zip')
+        filename = re.sub(r'[^A-Za-z0-9]+', '_', f"{department} {session or 'all'}").strip('_')
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}_transcripts.zip'
         return response
 
+@results_ns.route('/department-summary')
+class DepartmentSummary(Resource):
+    @results_ns.doc(params={
+        'department': 'Student department (required)',
+        'session': 'Only count semesters up to and including this session (optional)',
+        'format': "'json' (default) or 'csv'"
+    })
+    @results_ns.response(200, 'Department summary generated successfully')
+    @results_ns.response(400, 'Missing or invalid parameters')
+    @results_ns.produces(['application/json', 'text/csv'])
+    @results_ns.doc(security='Bearer')
+    @jwt_role_required('hod', 'exam_officer')
+    def get(self):
+        """Class list with GPA, CGPA, rank and class of degree for every student in a department"""
+        department = request.args.get('department')
+        session = request.args.get('session')
+        output_format = request.args.get('format', 'json').lower()
+
+        if not department:
+            return {"error": "Missing required query parameter: department"}, 400
+        if output_format not in ('json', 'csv'):
+            return {"error": "format must be 'json' or 'csv'"}, 400
+
+        # Deferred so NumPy is only loaded by workers that serve this report
+        from .analytics import department_summary, department_summary_csv
+
+        students, semesters = department_summary(department, session)
+
+        # Log the action
+        audit_log.record(
+            user_id=get_jwt_identity(),
+            action="view_department_summary",
+            resource="Student",
+            details=json.dumps({"department": department, "session": session, "students_count": len(students)}),
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
+
+        if output_format == 'csv':
+            response = Response(department_summary_csv(students, semesters), mimetype='text/csv')
+            filename = re.sub(r'[^A-Za-z0-9]+', '_', f"{department} {session or 'all'}").strip('_')
+            response.headers['Content-Disposition'] = f'attachment; filename={filename}_summary.csv'
+            return response
+
+        return {
+            "department": department,
+            "session": session if session else "All Sessions",
+            "semesters": semesters,
+            "total_students": len(students),
+            "students": students
+        }, 200
+
 @results_ns.route('/<int:result_id>/update-scores')
 class UpdateOrCreateScores(Resource):
     @results_ns.expect([score_update_model])  # Expecting a list of score update models
@@ -1001,59 +1044,20 @@ class UpdateOrCreateScores(Resource):
             return {"error": f"Result with ID {result_id} not found"}, 404
 
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = get_current_user()
 
         # Ensure the lecturer is either the uploader or affiliated with the course
         # if result.uploader_lecturer_id != current_user_id or current_user not in result.course.lecturers:
         #     return {"error": "You are not authorized to update this result."}, 403
 
         try:
-            for item in data:
-                registration_number = item.get("registration_number")
-                if not registration_number:
-                    return {"error": "Registration number is required for each score object"}, 400
-
-                # Fetch or create the student
-                student = Student.query.filter_by(registration_number=registration_number).first()
-                if not student:
-                    if not item.get("student_name"):
-                        return {"error": f"Student name is required for new student with registration number {registration_number}"}, 400
-                    student = Student(
-                        registration_number=registration_number,
-                        name=item["student_name"],
-                        department=result.course.department
-                    )
-                    db.session.add(student)
-                    db.session.flush()  # Get the `student.id` before proceeding
-
-                # Fetch or create the score
-                score = Score.query.filter_by(result_id=result.id, student_id=student.id).first()
-                if not score:
-                    score = Score(
-                        result_id=result.id,
-                        student_id=student.id
-                    )
-                    db.session.add(score)
-
-                # Update fields if provided in the payload
-                if "ca_score" in item:
-                    score.continuous_assessment = item["ca_score"]
-                if "exam_score" in item:
-                    score.exam_score = item["exam_score"]
-                if "total_score" in item:
-                    score.total_score = item["total_score"]
-                else:
-                    # Calculate total_score automatically if ca_score or exam_score is updated
-                    score.total_score = score.continuous_assessment + score.exam_score
-
-                if "grade" in item:
-                    score.grade = item["grade"]
+            outcome = patch_result_scores(result, data)
 
             # Commit changes after processing all items
             db.session.commit()
 
             # Log the action
-            log = ActionLog(
+            audit_log.record(
                 user_id=current_user_id,
                 action="update_or_create_scores",
                 resource="Score",
@@ -1062,11 +1066,12 @@ class UpdateOrCreateScores(Resource):
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent')
             )
-            db.session.add(log)
-            db.session.commit()
 
-            return {"message": "Scores updated or created successfully"}, 200
+            return dict(outcome, message="Scores updated or created successfully"), 200
 
+        except InvalidScorePatch as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
         except Exception as e:
             db.session.rollback()
             return {"error": f"An error occurred: {str(e)}"}, 500
@@ -1106,12 +1111,8 @@ class UpdateResultMeta(Resource):
 
             # Handle semester update or creation
             if "semester_name" in data and "session" in data:
-                semester_name = f"{data['session']} {data['semester_name']}"  # Format: 2019/2020 Second
-                semester = Semester.query.filter_by(name=semester_name).first()
-                if not semester:
-                    semester = Semester(name=semester_name)
-                    db.session.add(semester)
-                    db.session.flush()
+                semester = get_or_create_semester(data['session'], data['semester_name'])
+                db.session.flush()
                 result.semester_id = semester.id
 
             # Update course title and unit
@@ -1131,11 +1132,20 @@ class UpdateResultMeta(Resource):
             if "original_file" in data:
                 result.original_file = data["original_file"]
 
+            # A new course, title, unit or semester changes the grade points (or the transcripts) of everyone on the course
+            if {"course_code", "course_title", "course_unit", "semester_name", "session"} & data.keys():
+                db.session.flush()
+                refresh_student_summaries(
+                    student_id for (student_id,) in db.session.query(Score.student_id)
+                    .join(Result, Score.result_id == Result.id)
+                    .filter(Result.course_id == result.course_id).distinct()
+                )
+
             # Commit changes
             db.session.commit()
 
             # Log the action
-            log = ActionLog(
+            audit_log.record(
                 user_id=uploader_lecturer_id,
                 action="update_result_meta",
                 resource="Result",
@@ -1144,8 +1154,6 @@ class UpdateResultMeta(Resource):
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent')
             )
-            db.session.add(log)
-            db.session.commit()
 
             return {"message": "Result metadata updated successfully"}, 200
 
@@ -1156,14 +1164,19 @@ class UpdateResultMeta(Resource):
 @results_ns.route('/search')
 class SearchResults(Resource):
     @results_ns.doc(params={
+        'q': 'Free text matched against course code and title, student name and registration number; '
+             'tolerates typos and sorts results by relevance',
         'course_code': 'Course code to filter results',
         'department': 'Department to filter results',
         'faculty': 'Faculty to filter results',
-        'semester_name': 'Semester name to filter results',
-        'session': 'Session to filter results',
+        'semester_name': 'Semester term to filter results, e.g. FIRST (exact match)',
+        'session': 'Session to filter results, e.g. 2019/2020 (exact match)',
         'registration_number': 'Student registration number to filter results',
         'page': 'Page number for pagination',
-        'per_page': 'Number of results per page'
+        'per_page': 'Number of results per page',
+        'pagination': "Set to 'cursor' for cursor pagination",
+        'cursor': 'next_cursor or prev_cursor from a previous page',
+        'include_total': 'Include total_results in cursor mode'
     })
     @results_ns.response(200, 'Search results retrieved successfully')
     @results_ns.response(400, 'Invalid request parameters')
@@ -1178,52 +1191,57 @@ class SearchResults(Resource):
         semester_name = request.args.get('semester_name')
         session = request.args.get('session')
         registration_number = request.args.get('registration_number')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
+        q = (request.args.get('q') or '').strip()
 
-        # Initialize query
-        query = Result.query.join(Course).join(Semester).join(Score)
+        # Initialize query; only results that have scores are searched
+        query = result_summary_query().filter(Result.scores.any())
+        relevance = None
+        if q:
+            query, relevance = apply_search(query, q)
 
         # Apply filters
         if course_code:
-            query = query.filter(Course.code.ilike(f"%{course_code}%"))
+            query = query.filter(contains_filter(Course.code, course_code))
         if department:
-            query = query.filter(Course.department.ilike(f"%{department}%"))
+            query = query.filter(contains_filter(Course.department, department))
         if faculty:
-            query = query.filter(Course.faculty.ilike(f"%{faculty}%"))
+            query = query.filter(contains_filter(Course.faculty, faculty))
         if semester_name:
-            query = query.filter(Semester.name.ilike(f"%{semester_name}%"))
+            query = query.filter(Semester.term == semester_name.strip().upper())
         if session:
-            query = query.filter(Semester.name.like(f"{session} %"))
+            query = query.filter(Semester.session == session.strip())
         if registration_number:
-            query = query.join(Score).filter(Score.student_id == Student.query.filter_by(
-                registration_number=registration_number).with_entities(Student.id))
+            query = query.filter(Result.scores.any(Score.student_id.in_(Student.query.filter_by(
+                registration_number=registration_number).with_entities(Student.id))))
 
-        # Paginate results
-        results = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Paginate results, best matches first when searching by text
+        try:
+            if relevance is not None:
+                results = paginate_request(query, request.args, (relevance, Result.id), lambda row: (row[2], row[0].id))
+            else:
+                results = paginate_request(query, request.args, (Result.id,), lambda row: (row[0].id,))
+        except InvalidCursor as e:
+            return {"error": str(e)}, 400
 
         # Prepare response data
         search_results = []
-        for result in results.items:
+        for result, num_scores, *_ in results.items:
             search_results.append({
                 "id": result.id,
                 "course_code": result.course.code,
                 "course_title": result.course.title,
-                "semester": result.semester.name.split()[1],
-                "session": result.semester.name.split()[0],
+                "semester": result.semester.term,
+                "session": result.semester.session,
                 "department": result.course.department,
                 "faculty": result.course.faculty,
                 "upload_date": result.upload_date.isoformat() if result.upload_date else None,
-                "num_scores": len(result.scores)
+                "num_scores": num_scores
             })
 
         # Return paginated results
         return {
             "search_results": search_results,
-            "total_results": results.total,
-            "current_page": results.page,
-            "total_pages": results.pages,
-            "per_page": results.per_page
+            **page_envelope(results)
         }, 200
 
 @results_ns.route('/delete/<int:result_id>')
@@ -1253,16 +1271,18 @@ class DeleteResult(Resource):
             semester_name = result.semester.name if result.semester else None
 
             # Delete all associated scores
+            student_ids = {score.student_id for score in scores}
             for score in scores:
                 db.session.delete(score)
 
             # Delete the result
             db.session.delete(result)
+            refresh_student_summaries(student_ids)
             db.session.commit()
 
             # Log the action
             current_user_id = get_jwt_identity()
-            log = ActionLog(
+            audit_log.record(
                 user_id=current_user_id,
                 action="delete_result",
                 resource="Result",
@@ -1276,8 +1296,6 @@ class DeleteResult(Resource):
                 ip_address=request.remote_addr,
                 user_agent=request.headers.get('User-Agent')
             )
-            db.session.add(log)
-            db.session.commit()
 
             return {
                 "message": "Result and its associated scores deleted successfully",
@@ -1307,56 +1325,61 @@ class UploadResults(Resource):
             return {"error": "No file part"}, 400
 
         file = request.files['file']
-        filepath, error = save_file(file)
+        filepath, file_hash, error = save_file(file)
         if error:
             return {"error": error}, 400
 
-        try:
-            # Process the file
-            extraction_result, message = process_uploaded_file(filepath)
-            if extraction_result is None:
-                return {"error": message}, 400
-
-            header_info, results_data = extraction_result
-            uploader_id = get_jwt_identity()
+        file_info = {
+            'filename': file.filename,
+            'uploader_id': get_jwt_identity(),
+            'file_hash': file_hash
+        }
 
-            # Fetch or create the course
-            course = Course.query.filter_by(code=header_info['course_code']).first()
-
-            if not course:
-                # If course doesn't exist, create it
-                course = Course(
-                    code=header_info['course_code'],
-                    title=header_info['course_title'],
-                    unit=header_info['course_unit'],
-                    department=header_info['department'],
-                    faculty=header_info['faculty'],
-                    level='100'  # You can adjust this based on your payload data
-                )
-                db.session.add(course)
-                db.session.flush()  # Ensure the course ID is available
+        # Opt-in background processing: hand the saved file to the job queue and return at once
+        run_async = request.args.get('async', str(current_app.config.get('UPLOAD_ASYNC', False)))
+        if run_async.lower() in ('1', 'true', 'yes'):
+            try:
+                job_id = upload_jobs.submit(filepath, file_info)
+            except Exception as e:
+                # Nothing will process the saved file, so do not leave it behind
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+                if isinstance(e, redis.RedisError):
+                    return {"error": f"The upload queue is unavailable, try again later: {str(e)}"}, 503
+                return {"error": f"An error occurred while queueing the upload: {str(e)}"}, 500
+            return {
+                "message": "File accepted for processing",
+                "job_id": job_id,
+                "status_url": api.url_for(UploadJobStatus, job_id=job_id)
+            }, 202
 
-            current_user = User.query.get(uploader_id)
-            if current_user.role == 'lecturer' and current_user not in course.lecturers:
-                return {"error": "You are not authorized to upload results for this course."}, 403
+        try:
+            return ingest_uploaded_file(filepath, file_info)
 
-            # Save extracted data to the database
-            file_info = {
-                'filename': file.filename,
-                'uploader_id': uploader_id
-            }
+        except Exception as e:
+            return {"error": str(e)}, 500
 
-            success, db_message = save_results_to_db(header_info, results_data, file_info)
-            if not success:
-                return {"error": db_message}, 500
+@results_ns.route('/upload/<string:job_id>')
+class UploadJobStatus(Resource):
+    @results_ns.response(200, 'Upload job status retrieved successfully')
+    @results_ns.response(404, 'Upload job not found')
+    @results_ns.response(503, 'Upload job store unavailable')
+    @results_ns.doc(security='Bearer')
+    @jwt_role_required('hod', 'exam_officer', 'lecturer')
+    def get(self, job_id):
+        """Get the progress of a background upload job"""
+        try:
+            job = upload_jobs.get(job_id)
+        except redis.RedisError as e:
+            return {"error": f"The upload queue is unavailable, try again later: {str(e)}"}, 503
+        if not job:
+            return {"error": f"Upload job '{job_id}' not found"}, 404
 
-            return {
-                "message": "File processed and results saved successfully",
-                "records": len(results_data)
-            }, 200
+        # Lecturers can only follow their own uploads
+        if current_user_claim('role') == 'lecturer' and str(job["uploader_id"]) != str(get_jwt_identity()):
+            return {"error": "You are not authorized to view this upload job"}, 403
 
-        except Exception as e:
-            return {"error": str(e)}, 500
+        return job, 200
 
 
 
@@ -1366,21 +1389,23 @@ from sqlalchemy.orm import joinedload
 class ActionLogView(Resource):
     @results_ns.doc(params={
         'page': 'Page number for pagination (optional, default=1)',
-        'per_page': 'Number of results per page (optional, default=10)'
+        'per_page': 'Number of results per page (optional, default=10)',
+        'pagination': "Set to 'cursor' for cursor pagination (optional)",
+        'cursor': 'next_cursor or prev_cursor from a previous page (optional)',
+        'include_total': 'Include total_results in cursor mode (optional, default=false)'
     })
     @security_ns.response(200, 'Action logs retrieved successfully')
+    @security_ns.response(400, 'Invalid cursor')
     @security_ns.response(403, 'Forbidden')
     @security_ns.doc(security='Bearer')
     @jwt_role_required('hod', 'admin')  # Only HODs and Admins can access this
     def get(self):
         """Get all action logs."""
-        # Pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-
         try:
             # Fetch paginated action logs and ensure the 'user' relationship is eagerly loaded
-            action_logs = ActionLog.query.options(joinedload(ActionLog.user)).order_by(ActionLog.timestamp.desc()).paginate(page=page, per_page=per_page, error_out=False)
+            action_logs = paginate_request(ActionLog.query.options(joinedload(ActionLog.user)), request.args,
+                                           (ActionLog.timestamp, ActionLog.id), lambda log: (log.timestamp, log.id),
+                                           descending=True)
 
             # Prepare the response data
             logs_data = []
@@ -1401,15 +1426,24 @@ class ActionLogView(Resource):
             # Return the action logs with pagination info
             return {
                 "action_logs": logs_data,
-                "total_results": action_logs.total,
-                "current_page": action_logs.page,
-                "total_pages": action_logs.pages,
-                "per_page": action_logs.per_page
+                **page_envelope(action_logs)
             }, 200
 
+        except InvalidCursor as e:
+            return {"error": str(e)}, 400
         except Exception as e:
             return {"error": str(e)}, 500
 
+@security_ns.route('/action-logs/metrics')
+class ActionLogMetrics(Resource):
+    @security_ns.response(200, 'Action log writer metrics retrieved successfully')
+    @security_ns.response(403, 'Forbidden')
+    @security_ns.doc(security='Bearer')
+    @jwt_role_required('hod', 'admin')
+    def get(self):
+        """Get queue depth and throughput of the background action log writer."""
+        return audit_log.metrics(), 200
+
 
 # Protected Route Example
 @auth_ns.route('/protected')
@@ -1420,7 +1454,7 @@ class Protected(Resource):
     def get(self):
         """Test protected route"""
         current_user_id = get_jwt_identity()
-        user = get_user_by_id(current_user_id)
+        user = get_current_user()
         return {
             "logged_in_as": user.username,
             "role": user.role
@@ -0,0 +1,202 @@
+# flask-app/app/search.py
+"""Indexed substring, prefix and fuzzy search over courses and students.
+
+On SQLite, `course_search` and `student_search` are FTS5 tables with the trigram tokenizer,
+kept in step with `courses` and `students` by triggers, so every write (ORM or bulk insert)
+updates the index. A quoted phrase matches any field containing it, case-insensitively,
+which makes a `MATCH` a drop-in, indexed replacement for `ILIKE '%term%'`. Free-text queries
+are split into trigrams and OR-ed together to find candidates, so a query with a typo still
+finds its target, and candidates are ranked by the share of the query's trigrams they contain.
+
+On PostgreSQL the same columns get pg_trgm GIN indexes, which serve `ILIKE '%term%'` directly,
+and free-text queries rank by `word_similarity`. Other databases fall back to plain `ILIKE`.
+Terms shorter than three characters have no trigrams and also use `ILIKE`.
+"""
+import sqlite3
+
+from sqlalchemy import Engine, event, func, literal, or_, select, text
+
+from . import db
+from .models import Course, Result, Score, Student
+
+MIN_TERM_LENGTH = 3  # Trigram indexes cannot answer shorter terms
+MAX_HITS = 500  # Best-ranked courses and students considered per free-text query
+MAX_CANDIDATES = 2000  # FTS rows scored per free-text query on SQLite
+MIN_SIMILARITY = 0.5  # Share of query trigrams a match must contain (PostgreSQL uses pg_trgm's threshold)
+
+# Indexed columns per table, in FTS column order
+SEARCH_COLUMNS = {
+    'courses': ('code', 'title', 'department', 'faculty'),
+    'students': ('registration_number', 'name'),
+}
+FTS_TABLES = {'courses': 'course_search', 'students': 'student_search'}
+SQLITE_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)  # First release with the trigram tokenizer
+
+
+def _sqlite_ddl(table):
+    fts, columns = FTS_TABLES[table], SEARCH_COLUMNS[table]
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _postgres_ddl(table):
+    return ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)"
+        for column in SEARCH_COLUMNS[table]
+    ]
+
+
+def install_search_index(connection, table):
+    """Create (or rebuild) the search index of `table` on `connection`'s database."""
+    dialect = connection.dialect.name
+    statements = []
+    if dialect == 'sqlite' and SQLITE_TRIGRAM:
+        statements = _sqlite_ddl(table)
+    elif dialect == 'postgresql':
+        statements = _postgres_ddl(table)
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def pause_search_index(connection, table):
+    """Stop keeping the search index of `table` in step with writes, for the length of a bulk load.
+
+    On SQLite the sync triggers are dropped and the FTS table stays, so searches keep working
+    and only miss rows written while paused. `install_search_index` recreates the triggers and
+    rebuilds the index. Other databases keep maintaining their indexes.
+    """
+    if connection.dialect.name == 'sqlite':
+        fts = FTS_TABLES[table]
+        for suffix in ('ai', 'ad', 'au'):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+
+
+def drop_search_index(connection, table):
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        fts = FTS_TABLES[table]
+        for suffix in ('ai', 'ad', 'au'):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts}")
+    elif dialect == 'postgresql':
+        for column in SEARCH_COLUMNS[table]:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS ix_{table}_{column}_trgm")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Alembic autogenerate filter: the search index is not declared by the models, so skip it."""
+    return not (reflected and name and (name.startswith(tuple(FTS_TABLES.values())) or name.endswith('_trgm')))
+
+
+# `db.create_all()` builds the index along with its table; migrations call install_search_index
+for _table in (Course.__table__, Student.__table__):
+    event.listen(_table, 'after_create', lambda target, connection, **kw: install_search_index(connection, target.name))
+
+
+def _dialect():
+    dialect = db.session.get_bind().dialect.name
+    return 'sqlite-fts' if dialect == 'sqlite' and SQLITE_TRIGRAM else dialect
+
+
+def _phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def contains_filter(column, term):
+    """Case-insensitive "column contains `term`" for a column in `SEARCH_COLUMNS`, answered from the index."""
+    term = term.strip()
+    table = column.class_.__tablename__
+    if _dialect() != 'sqlite-fts' or len(term) < MIN_TERM_LENGTH:
+        return column.ilike(f"%{term}%")
+    fts = FTS_TABLES[table]
+    matches = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :{column.key}_match").bindparams(
+        **{f"{column.key}_match": f"{column.key} : {_phrase(term)}"})
+    return column.class_.id.in_(matches)
+
+
+def _trigram_set(value):
+    words = [word for word in (value or "").lower().split() if len(word) >= MIN_TERM_LENGTH]
+    return {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+
+
+def word_similarity(query, value):
+    """Share of the query's trigrams found in `value`, from 0 to 1.
+
+    Registered as an SQLite function under pg_trgm's name, so ranking reads the same on both.
+    """
+    trigrams = _trigram_set(query)
+    return len(trigrams & _trigram_set(value)) / len(trigrams) if trigrams else 0.0
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("word_similarity", 2, word_similarity, deterministic=True)
+
+
+def _hits(table, query):
+    """`(id, rank)` of the best matching rows of `table`; a lower rank is a better match."""
+    model = Course if table == 'courses' else Student
+    columns = [getattr(model, name) for name in SEARCH_COLUMNS[table] if name not in ('department', 'faculty')]
+    dialect = _dialect()
+    trigrams = sorted(_trigram_set(query))
+    greatest = func.greatest if dialect == 'postgresql' else func.max
+
+    if dialect == 'sqlite-fts' and trigrams:
+        # Rows sharing any trigram with the query are candidates; rank keeps the close ones
+        fts = FTS_TABLES[table]
+        match = " OR ".join(f"{{{' '.join(column.key for column in columns)}}} : {_phrase(trigram)}"
+                            for trigram in trigrams)
+        # Course and student hits share one statement, so their parameter names must differ
+        candidates = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :{fts}_match "
+                          f"ORDER BY bm25({fts}) LIMIT :{fts}_limit").bindparams(
+            **{f"{fts}_match": match, f"{fts}_limit": MAX_CANDIDATES})
+        similarity = greatest(*(func.word_similarity(query, column) for column in columns))
+        condition = model.id.in_(candidates) & (similarity >= MIN_SIMILARITY)
+    elif dialect == 'postgresql' and trigrams:
+        similarity = greatest(*(func.word_similarity(query, column) for column in columns))
+        condition = or_(*(literal(query).op('<%')(column) for column in columns))
+    else:
+        # Short queries, and databases without a trigram index, fall back to a prefix match
+        similarity = literal(1.0)
+        condition = or_(*(column.ilike(f"{word}%") for word in query.split() for column in columns))
+    rank = -similarity
+    return (select(model.id.label('id'), rank.label('rank'))
+            .where(condition).order_by(rank).limit(MAX_HITS)
+            .subquery(f"{table}_hits"))
+
+
+def apply_search(query, q):
+    """Restrict a `result_summary_query()` to results matching the free-text `q`.
+
+    A result matches when its course code or title, or the name or registration number of
+    one of its students, matches `q`. Returns `(query, relevance)`, where `relevance` is the
+    selected rank column: lower is better, so order by it ascending.
+    """
+    course_hits = _hits('courses', q)
+    student_hits = _hits('students', q)
+    student_rank = (select(Score.result_id.label('result_id'), func.min(student_hits.c.rank).label('rank'))
+                    .join(student_hits, Score.student_id == student_hits.c.id)
+                    .group_by(Score.result_id)
+                    .subquery('student_rank'))
+
+    least = func.least if _dialect() == 'postgresql' else func.min
+    relevance = least(func.coalesce(course_hits.c.rank, 0.0), func.coalesce(student_rank.c.rank, 0.0)).label('relevance')
+    query = (query
+             .outerjoin(course_hits, Result.course_id == course_hits.c.id)
+             .outerjoin(student_rank, Result.id == student_rank.c.result_id)
+             .filter(or_(course_hits.c.id.isnot(None), student_rank.c.result_id.isnot(None)))
+             .add_columns(relevance))
+    return query, relevance
@@ -0,0 +1,204 @@
+# flask-app/app/transcripts.py
+"""Transcript PDFs, one at a time or streamed as a ZIP for a whole department.
+
+`render_transcript_pdf` is a pure function of plain data so it can run in a worker
+process. `stream_department_transcripts` prefetches score data for a batch of students
+at a time, renders them on a `ProcessPoolExecutor` with a bounded number of students in
+flight, and yields the ZIP archive piece by piece as each transcript is added, so memory
+stays flat however large the class is.
+
+Single transcripts are cached on disk under a key derived from the student, the session
+filter and the student's data version: the newest `updated_at` of their semester summaries,
+which every score write rebuilds. A changed score therefore changes the key (and the ETag)
+instead of requiring the cache to be purged.
+"""
+import hashlib
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app
+from sqlalchemy import func
+
+from . import db
+from .cache import DiskLRUCache
+from .models import Semester, Student, StudentSemesterSummary
+from .utils import get_students_results
+
+
+def render_transcript_pdf(name, registration_number, session, grouped_results,
+                          total_credit_earned, total_grade_point):
+    """Render one transcript, including CA score, exam score and semester GPA, as PDF bytes."""
+    from fpdf import FPDF  # Imported on first render rather than at app boot
+
+    # Ensure safe defaults for total_credit_earned & total_grade_point
+    total_credit_earned = total_credit_earned or 0
+    total_grade_point = total_grade_point or 0
+    cgpa = round(total_grade_point / total_credit_earned, 2) if total_credit_earned > 0 else 0
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", style='B', size=16)
+    pdf.cell(200, 10, "Student Transcript", ln=True, align='C')
+    pdf.ln(10)
+
+    # Student Details
+    pdf.set_font("Arial", size=12)
+    pdf.cell(0, 10, f"Name: {name}", ln=True)
+    pdf.cell(0, 10, f"Registration Number: {registration_number}", ln=True)
+    pdf.cell(0, 10, f"Session: {session if session else 'All Sessions'}", ln=True)
+    pdf.cell(0, 10, f"CGPA: {cgpa}", ln=True)
+    pdf.ln(10)
+
+    # Results with CA Score, Exam Score, and Semester GPA
+    for session_name, session_data in grouped_results.items():
+        pdf.set_font("Arial", style='B', size=12)
+        pdf.cell(0, 10, f"Session: {session_name}", ln=True)
+        pdf.set_font("Arial", size=11)
+
+        for semester, semester_data in session_data.get("results_by_semester", {}).items():
+            semester_gpa = semester_data.get("GPA", round(semester_data["total_grade_point"] / semester_data["total_credit_earned"], 2) if semester_data["total_credit_earned"] > 0 else 0)
+
+            pdf.cell(0, 8, f"  Semester: {semester} (GPA: {semester_gpa})", ln=True)
+            pdf.cell(30, 8, "Course Code", border=1)
+            pdf.cell(70, 8, "Course Title", border=1)
+            pdf.cell(20, 8, "CA Score", border=1)
+            pdf.cell(20, 8, "E.Score", border=1)
+            pdf.cell(20, 8, "T.Score", border=1)
+            pdf.cell(20, 8, "Grade", border=1)
+            pdf.ln()
+
+            for course in semester_data["courses"]:
+                pdf.cell(30, 8, course["course_code"], border=1)
+                pdf.cell(70, 8, course["course_title"], border=1)
+                pdf.cell(20, 8, str(course["ca_score"]), border=1)
+                pdf.cell(20, 8, str(course["exam_score"]), border=1)
+                pdf.cell(20, 8, str(course["total_score"]), border=1)
+                pdf.cell(20, 8, course["grade"], border=1)
+                pdf.ln()
+
+            pdf.cell(0, 8, f"  Total Credit Earned: {semester_data['total_credit_earned']}", ln=True)
+            pdf.cell(0, 8, f"  Total Grade Point: {semester_data['total_grade_point']}", ln=True)
+            pdf.ln(5)
+
+    return pdf.output(dest='S').encode('latin1')
+
+
+def transcript_filename(registration_number):
+    """A flat file name for a student's transcript; registration numbers contain slashes."""
+    return re.sub(r'[^A-Za-z0-9]+', '_', registration_number).strip('_') + '_transcript.pdf'
+
+
+def get_transcript_cache():
+    """Disk cache of rendered transcript PDFs keyed by `transcript_etag`, shared per app."""
+    cache = current_app.extensions.get('transcript_cache')
+    if cache is None:
+        cache = DiskLRUCache(current_app.config['TRANSCRIPT_CACHE_FOLDER'], current_app.config['TRANSCRIPT_CACHE_MAX_BYTES'])
+        current_app.extensions['transcript_cache'] = cache
+    return cache
+
+
+def transcript_version(student_id):
+    """When the student's results last changed, or None if they have no semester summaries."""
+    return (db.session.query(func.max(StudentSemesterSummary.updated_at))
+            .filter(StudentSemesterSummary.student_id == student_id)
+            .scalar())
+
+
+def has_session_results(student_id, session):
+    """Whether the student has a semester summary in `session`."""
+    return db.session.query(
+        db.session.query(StudentSemesterSummary.id)
+        .join(Semester, StudentSemesterSummary.semester_id == Semester.id)
+        .filter(StudentSemesterSummary.student_id == student_id, Semester.session == session.strip())
+        .exists()).scalar()
+
+
+def transcript_etag(student, session, version):
+    """Hex digest identifying one rendering of a student's transcript; also its cache key."""
+    key = "|".join([str(student.id), student.registration_number, student.name or "",
+                    session or "", version.isoformat()])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _render_archive_entry(entry):
+    """Render one `(name, registration_number, session, grouped_results, credits, points)` entry
+    into `(file name, PDF bytes)`. Runs inside a worker process."""
+    return transcript_filename(entry[1]), render_transcript_pdf(*entry)
+
+
+class _ArchiveStream:
+    """Write-only sink for `zipfile`: collects what is written until `drain` hands it out.
+
+    It has no `tell`/`seek`, so `zipfile` writes entries with trailing data descriptors
+    instead of seeking back to patch their headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def department_students(department):
+    """`(id, name, registration_number)` of every student in `department`, by registration number."""
+    return (db.session.query(Student.id, Student.name, Student.registration_number)
+            .filter(func.upper(Student.department) == department.strip().upper())
+            .order_by(Student.registration_number)
+            .all())
+
+
+def stream_department_transcripts(students, session=None, workers=1, batch_size=50):
+    """Yield a ZIP archive holding one transcript PDF per student, a piece at a time.
+
+    `students` are `(id, name, registration_number)` rows as returned by `department_students`;
+    students without results (in `session`, if given) are skipped. Score data is fetched
+    `batch_size` students at a time and at most `2 * workers` transcripts are rendering or
+    waiting to be written at once. With `workers` <= 1 transcripts are rendered in this process.
+    """
+    stream = _ArchiveStream()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    in_flight = deque()
+    try:
+        with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            def write_oldest():
+                filename, pdf = in_flight.popleft().result()
+                archive.writestr(filename, pdf)
+                return stream.drain()
+
+            for i in range(0, len(students), batch_size):
+                batch = students[i:i + batch_size]
+                results = get_students_results([student_id for student_id, _, _ in batch], session)
+                for student_id, name, registration_number in batch:
+                    if student_id not in results:
+                        continue
+                    grouped_results, total_credit_earned, total_grade_point, _ = results.pop(student_id)
+                    entry = (name, registration_number, session, grouped_results, total_credit_earned, total_grade_point)
+                    if executor is None:
+                        filename, pdf = _render_archive_entry(entry)
+                        archive.writestr(filename, pdf)
+                        yield stream.drain()
+                        continue
+                    in_flight.append(executor.submit(_render_archive_entry, entry))
+                    if len(in_flight) >= 2 * workers:
+                        yield write_oldest()
+
+            while in_flight:
+                yield write_oldest()
+        # Closing the archive writes the central directory
+        yield stream.drain()
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -1,15 +1,25 @@
 # flask-app/app/utils.py
-import pypdf
-from docx import Document
-from openpyxl import load_workbook
 import csv
-from flask import jsonify, current_app
-from .models import User, Course, Semester, Student, Result, Score
+from flask import jsonify, current_app, g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from .models import User, Course, Semester, Student, Result, Score, StudentSemesterSummary, IngestionJob
+from .constants import GRADE_POINTS, TERM_ORDER
 from . import db
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
-from werkzeug.utils import secure_filename
-from .extraction import *
+import hashlib
+import json
+import math
+import time
+import uuid
+from itertools import islice
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import contains_eager
+from .extraction import (extract_csv_data, extract_docx_data, extract_pdf_data, extract_xlsx_data, iter_csv_data,
+                         iter_xlsx_data)
+from .parsing import RegistrationPatterns
+from .cache import DiskLRUCache
 from app import mail
 from flask_mail import Message
 from flask import render_template
@@ -18,15 +28,7 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv', 'xls', 'xlsx', 'docx', 'pdf'}
 
 def calc_point(grade, course_unit):
-    grade_points = {
-        'A': 5,
-        'B': 4,
-        'C': 3,
-        'D': 2,
-        'E': 1,
-        'F': 0
-    }
-    return grade_points.get(grade, 0) * course_unit
+    return GRADE_POINTS.get(grade, 0) * course_unit
 
 def create_error_response(message, status_code=400):
     response = jsonify({"error": message})
@@ -37,6 +39,31 @@ def create_error_response(message, status_code=400):
 def get_user_by_id(user_id):
     return User.query.get(user_id)
 
+def user_claims(user):
+    """Claims added to a user's access tokens so role checks can skip the database."""
+    return {"role": user.role, "department": user.department}
+
+def get_current_user():
+    """The User behind the verified JWT, loaded at most once per request and kept on `g`."""
+    jti = get_jwt()["jti"]
+    cached = g.get('current_user')
+    if cached is None or cached[0] != jti:
+        cached = g.current_user = (jti, db.session.get(User, int(get_jwt_identity())))
+    return cached[1]
+
+def current_user_claim(name):
+    """The current user's `role` or `department`.
+
+    Taken from the signed token while it is younger than JWT_ROLE_CLAIMS_TTL seconds,
+    otherwise (or with the TTL set to 0) from the database via `get_current_user`.
+    """
+    ttl = current_app.config.get('JWT_ROLE_CLAIMS_TTL', 0)
+    claims = get_jwt()
+    if ttl and name in claims and time.time() - claims["iat"] < ttl:
+        return claims[name]
+    user = get_current_user()
+    return getattr(user, name) if user else None
+
 def get_user_by_username(username):
     return User.query.filter_by(username=username).first()
 
@@ -46,6 +73,24 @@ def get_user_by_email(email):
 def get_student_by_registration(registration_number):
     return Student.query.filter_by(registration_number=registration_number).first()
 
+def result_summary_query():
+    """Query of `(Result, num_scores)` rows with course, semester and uploader joined in.
+
+    The score count is a correlated subquery evaluated only for the rows returned, so a
+    page of results costs the same however many scores each result has.
+    """
+    num_scores = (select(func.count(Score.id))
+                  .where(Score.result_id == Result.id)
+                  .correlate(Result)
+                  .scalar_subquery())
+    return (db.session.query(Result, num_scores.label('num_scores'))
+            .join(Result.course)
+            .join(Result.semester)
+            .join(Result.uploader)
+            .options(contains_eager(Result.course),
+                     contains_eager(Result.semester),
+                     contains_eager(Result.uploader)))
+
 def check_required_fields(data, required_fields):
     missing_fields = [field for field in required_fields if not data.get(field)]
     if missing_fields:
@@ -68,10 +113,10 @@ def get_or_create_course(data):
     return course
 
 def get_or_create_semester(session, semester_name):
-    semester_full_name = f"{session} {semester_name}"
-    semester = Semester.query.filter_by(name=semester_full_name).first()
+    session, term = session.strip(), semester_name.strip().upper()
+    semester = Semester.query.filter_by(session=session, term=term).first()
     if not semester:
-        semester = Semester(name=semester_full_name)
+        semester = Semester(name=f"{session} {term}", session=session, term=term)
         db.session.add(semester)
     return semester
 
@@ -118,113 +163,817 @@ def process_result(result_data, course, semester, lecturer_id):
 
     return None
 
+def get_registration_patterns():
+    """Registration-number patterns from `REGISTRATION_NUMBER_PATTERNS`, compiled once per app."""
+    patterns = current_app.extensions.get('registration_patterns')
+    if patterns is None:
+        patterns = RegistrationPatterns(current_app.config.get('REGISTRATION_NUMBER_PATTERNS'))
+        current_app.extensions['registration_patterns'] = patterns
+    return patterns
+
 def process_uploaded_file(filepath):
     """Process an uploaded file to extract results."""
     try:
         ext = os.path.splitext(filepath)[-1].lower()
         if ext == ".docx":
-            return extract_docx_data(filepath), "DOCX file processed"
+            return extract_docx_data(filepath, get_registration_patterns()), "DOCX file processed"
         elif ext == ".pdf":
-            return extract_pdf_data(filepath), "PDF file processed"
+            return extract_pdf_data(filepath, current_app.config.get('PDF_EXTRACT_WORKERS', 1),
+                                    get_registration_patterns()), "PDF file processed"
         elif ext == ".csv":
-            return extract_csv_data(filepath), "CSV file processed"
+            return extract_csv_data(filepath, get_registration_patterns()), "CSV file processed"
         elif ext == ".xlsx":
-            return extract_xlsx_data(filepath), "XLSX file processed"
+            return extract_xlsx_data(filepath, get_registration_patterns()), "XLSX file processed"
         else:
             return None, "Unsupported file format"  
     except Exception as e:
         return None, str(e)
 
-def save_results_to_db(header_info, results_data, file_info):
+def stream_uploaded_file(filepath):
+    """Like `process_uploaded_file`, but returns `(header_info, records)` with records as a lazy iterator.
+
+    CSV and XLSX sheets are streamed row by row; the other formats are parsed up front.
+    """
     try:
-        # Get or create course
-        course = Course.query.filter_by(code=header_info['course_code']).first()
-        if not course:
-            course = Course(
-                code=header_info['course_code'],
-                title=header_info['course_title'],
-                unit=header_info['course_unit'],
-                department=header_info['department'],
-                faculty=header_info['faculty'],
-                level='100'  # You can adjust this based on your payload data
-            )
-            db.session.add(course)
-            db.session.flush()
-
-        # Get or create semester
-        semester_name = f"{header_info['session']} {header_info['semester']}"
-        semester = Semester.query.filter_by(name=semester_name).first()
-        if not semester:
-            semester = Semester(name=semester_name)
-            db.session.add(semester)
-            db.session.flush()
-
-        # Process each result
-        for result in results_data:
-            # Get or create student
-            student = Student.query.filter_by(
-                registration_number=result['registration_number']
-            ).first()
-
-            if not student:
-                student = Student(
-                    registration_number=result['registration_number'],
-                    name=result['name'],
-                    department=result['department']
-                )
-                db.session.add(student)
-                db.session.flush()
-
-            # Create or update result metadata
-            result_metadata = Result.query.filter_by(
-                course_id=course.id,
-                semester_id=semester.id,
-            ).first()
-
-            if not result_metadata:
-                result_metadata = Result(
-                    course_id=course.id,
-                    semester_id=semester.id,
-                    original_file=file_info['filename'],
-                    upload_date=datetime.utcnow(),
-                    uploader_lecturer_id=file_info['uploader_id']
-                )
-                db.session.add(result_metadata)
-                db.session.flush()
-
-            # Create or update score
-            score = Score.query.filter_by(result_id=result_metadata.id, student_id=student.id).first()
-            if score:
-                score.continuous_assessment = result['continuous_assessment']
-                score.exam_score = result['exam_score']
-                score.total_score = result['total_score']
-                score.grade = result['grade']
-            else:
-                score = Score(
-                    result_id=result_metadata.id,
-                    student_id=student.id,
-                    continuous_assessment=result['continuous_assessment'],
-                    exam_score=result['exam_score'],
-                    total_score=result['total_score'],
-                    grade=result['grade']
-                )
-                db.session.add(score)
+        ext = os.path.splitext(filepath)[-1].lower()
+        if ext == ".csv":
+            records, message = iter_csv_data(filepath, get_registration_patterns()), "CSV file processed"
+        elif ext == ".xlsx":
+            records, message = iter_xlsx_data(filepath, get_registration_patterns()), "XLSX file processed"
+        else:
+            extraction_result, message = process_uploaded_file(filepath)
+            if extraction_result is None:
+                return None, message
+            header_info, results_data = extraction_result
+            return (header_info, iter(results_data)), message
+
+        header_info = next(records)
+        return (header_info, records), message
+    except Exception as e:
+        return None, str(e)
+
+UPLOAD_READ_CHUNK_SIZE = 64 * 1024
+
+# SQLite caps bound parameters per statement, so large IN lists are chunked.
+IN_CLAUSE_CHUNK_SIZE = 500
+
+SCORE_FIELDS = ('continuous_assessment', 'exam_score', 'total_score', 'grade')
+
+def _chunked(items, size=IN_CLAUSE_CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _score_changed(existing, new_values):
+    return (
+        float(existing.continuous_assessment) != float(new_values['continuous_assessment'])
+        or float(existing.exam_score) != float(new_values['exam_score'])
+        or float(existing.total_score) != float(new_values['total_score'])
+        or existing.grade != new_values['grade']
+    )
+
+def find_student_ids(registration_numbers):
+    """Map the registration numbers that belong to existing students to their ids."""
+    student_ids = {}
+    for chunk in _chunked(dict.fromkeys(registration_numbers)):
+        student_ids.update(
+            db.session.query(Student.registration_number, Student.id)
+            .filter(Student.registration_number.in_(chunk))
+            .all()
+        )
+    return student_ids
+
+def create_students(rows_by_registration):
+    """Bulk insert students and return their ids by registration number.
+
+    `rows_by_registration` maps a registration number to a row carrying `name` and `department`.
+    """
+    db.session.execute(insert(Student), [
+        {
+            "registration_number": reg,
+            "name": row['name'],
+            "department": row['department']
+        } for reg, row in rows_by_registration.items()
+    ])
+    return find_student_ids(rows_by_registration)
+
+def resolve_student_ids(rows_by_registration):
+    """Map registration numbers to student ids, bulk inserting students that don't exist yet.
+
+    `rows_by_registration` maps a registration number to a row carrying `name` and `department`.
+    """
+    student_ids = find_student_ids(rows_by_registration)
+    missing = {reg: row for reg, row in rows_by_registration.items() if reg not in student_ids}
+    if missing:
+        student_ids.update(create_students(missing))
+    return student_ids
+
+def mark_scores_written(result_id):
+    """Record a write to the scores of a result.
+
+    Clears `Result.file_hash`, so a re-upload of the last sheet is applied again instead of being
+    skipped as already applied, and bumps `last_updated`. Every score write path calls this;
+    `save_results_to_db` sets the hash again once a whole sheet is saved.
+    """
+    db.session.execute(update(Result).where(Result.id == result_id)
+                       .values(file_hash=None, last_updated=datetime.utcnow()))
+
+def bulk_upsert_scores(result_metadata, results_data, student_ids=None, refresh_summaries=True):
+    """Insert or update the scores of one result using a fixed number of statements.
+
+    `student_ids` may map every registration number in `results_data` to its student id,
+    when the caller has already resolved them. With `refresh_summaries` false the caller must
+    call `refresh_student_summaries` for the affected students itself.
+    Returns a dict with the number of inserted, updated and unchanged score rows.
+    """
+    # Later rows win when a registration number appears more than once in a sheet
+    rows_by_registration = {row['registration_number']: row for row in results_data}
+    if student_ids is None:
+        student_ids = resolve_student_ids(rows_by_registration)
+    else:
+        student_ids = {reg: student_ids[reg] for reg in rows_by_registration}
+
+    score_query = db.session.query(
+        Score.id, Score.student_id, Score.continuous_assessment,
+        Score.exam_score, Score.total_score, Score.grade
+    ).filter(Score.result_id == result_metadata.id)
+    if len(student_ids) <= IN_CLAUSE_CHUNK_SIZE:
+        score_query = score_query.filter(Score.student_id.in_(student_ids.values()))
+    existing_scores = {score.student_id: score for score in score_query}
+
+    inserts, updates, unchanged = [], [], 0
+    changed_students = []
+    for registration_number, row in rows_by_registration.items():
+        values = {field: row[field] for field in SCORE_FIELDS}
+        student_id = student_ids[registration_number]
+        existing = existing_scores.get(student_id)
+        if existing is None:
+            inserts.append(dict(values, result_id=result_metadata.id, student_id=student_id))
+        elif _score_changed(existing, values):
+            updates.append(dict(values, id=existing.id))
+            changed_students.append(student_id)
+        else:
+            unchanged += 1
+
+    if inserts:
+        db.session.execute(insert(Score), inserts)
+    if updates:
+        db.session.execute(update(Score), updates)
+    if inserts or updates:
+        mark_scores_written(result_metadata.id)
+    if refresh_summaries:
+        refresh_student_summaries([row['student_id'] for row in inserts] + changed_students)
+
+    return {"inserted": len(inserts), "updated": len(updates), "unchanged": unchanged}
+
+def upsert_scores(result_id, rows):
+    """Insert or replace the scores of one result, keyed on `(result_id, student_id)`.
+
+    `rows` carry `student_id` and the `SCORE_FIELDS`. All rows go to the database as one
+    batched `INSERT ... ON CONFLICT DO UPDATE` (`ON DUPLICATE KEY UPDATE` on MySQL), backed by
+    the `uq_score_result_student` constraint. Other databases get a prefetch followed by one
+    bulk insert and one bulk update.
+    """
+    values = [dict(row, result_id=result_id) for row in rows]
+    if not values:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        statement = (sqlite if dialect == 'sqlite' else postgresql).insert(Score)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Score.result_id, Score.student_id],
+            set_={field: statement.excluded[field] for field in SCORE_FIELDS}
+        )
+        db.session.execute(statement, values)
+    elif dialect in ('mysql', 'mariadb'):
+        statement = mysql.insert(Score)
+        statement = statement.on_duplicate_key_update({field: statement.inserted[field] for field in SCORE_FIELDS})
+        db.session.execute(statement, values)
+    else:
+        existing = {}
+        for chunk in _chunked(row['student_id'] for row in values):
+            existing.update(db.session.query(Score.student_id, Score.id)
+                            .filter(Score.result_id == result_id, Score.student_id.in_(chunk)))
+        inserts = [row for row in values if row['student_id'] not in existing]
+        updates = [dict(row, id=existing[row['student_id']]) for row in values if row['student_id'] in existing]
+        if inserts:
+            db.session.execute(insert(Score), inserts)
+        if updates:
+            db.session.execute(update(Score), updates)
+    mark_scores_written(result_id)
+
+class InvalidScorePatch(ValueError):
+    pass
+
+# Score patch payload keys and the Score columns they set
+PATCH_FIELDS = {'ca_score': 'continuous_assessment', 'exam_score': 'exam_score',
+                'total_score': 'total_score', 'grade': 'grade'}
+
+def _patch_values(item, registration_number):
+    """The Score columns an item sets, with scores coerced to floats; raises `InvalidScorePatch`."""
+    values = {}
+    for key, field in PATCH_FIELDS.items():
+        if key not in item:
+            continue
+        value = item[key]
+        if field == 'grade':
+            if not isinstance(value, str) or not 0 < len(value.strip()) <= 2:
+                raise InvalidScorePatch(f"grade must be a letter grade (registration number {registration_number})")
+            values[field] = value.strip().upper()
+            continue
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            value = float(value)
+        except (TypeError, ValueError):
+            value = None
+        if value is None or not math.isfinite(value):
+            raise InvalidScorePatch(f"{key} must be a number (registration number {registration_number})")
+        values[field] = value
+    return values
+
+def patch_result_scores(result, items):
+    """Apply a partial score update for many students of one result with a fixed number of statements.
+
+    Each item names a student by `registration_number` and may set `ca_score`, `exam_score`,
+    `total_score` and `grade`; without `total_score` the total is recomputed as CA plus exam.
+    Unknown students are created from `student_name`, and items for the same student apply in
+    order. Students and scores are prefetched, diffed in memory and written with one bulk insert
+    and one bulk update, skipping unchanged scores. Scores must be numbers (numeric strings are
+    coerced) and grades one or two letters. An invalid item raises `InvalidScorePatch` before
+    anything is written.
+
+    Returns the inserted/updated/unchanged score counts and, under `rows`, the outcome of each
+    item in payload order.
+    """
+    registrations, item_values = [], []
+    for item in items:
+        registration_number = item.get("registration_number") if isinstance(item, dict) else None
+        if not registration_number:
+            raise InvalidScorePatch("Registration number is required for each score object")
+        registrations.append(registration_number)
+        item_values.append(_patch_values(item, registration_number))
+
+    student_ids = find_student_ids(registrations)
+    new_students = {}
+    for item, registration_number in zip(items, registrations):
+        if registration_number in student_ids or registration_number in new_students:
+            continue
+        if not item.get("student_name"):
+            raise InvalidScorePatch(f"Student name is required for new student with registration number {registration_number}")
+        new_students[registration_number] = {"name": item["student_name"], "department": result.course.department}
+
+    existing_scores = {}
+    for chunk in _chunked(student_ids.values()):
+        existing_scores.update(
+            (score.student_id, score) for score in db.session.query(
+                Score.id, Score.student_id, Score.continuous_assessment,
+                Score.exam_score, Score.total_score, Score.grade
+            ).filter(Score.result_id == result.id, Score.student_id.in_(chunk))
+        )
+
+    # Replay the items over the stored values
+    patched = {}
+    for item, registration_number, item_fields in zip(items, registrations, item_values):
+        values = patched.get(registration_number)
+        if values is None:
+            score = existing_scores.get(student_ids.get(registration_number))
+            values = {field: getattr(score, field) if score else None for field in SCORE_FIELDS}
+        values.update(item_fields)
+        if "total_score" not in item and None not in (values['continuous_assessment'], values['exam_score']):
+            values['total_score'] = values['continuous_assessment'] + values['exam_score']
+        patched[registration_number] = values
+
+    for registration_number, values in patched.items():
+        if None in values.values():
+            raise InvalidScorePatch(f"ca_score, exam_score and grade are required for a new score "
+                                    f"(registration number {registration_number})")
+
+    if new_students:
+        student_ids.update(create_students(new_students))
+
+    inserts, updates, outcomes = [], [], {}
+    for registration_number, values in patched.items():
+        student_id = student_ids[registration_number]
+        existing = existing_scores.get(student_id)
+        if existing is None:
+            inserts.append(dict(values, result_id=result.id, student_id=student_id))
+            outcomes[registration_number] = "inserted"
+        elif _score_changed(existing, values):
+            updates.append(dict(values, id=existing.id))
+            outcomes[registration_number] = "updated"
+        else:
+            outcomes[registration_number] = "unchanged"
+
+    if inserts:
+        db.session.execute(insert(Score), inserts)
+    if updates:
+        db.session.execute(update(Score), updates)
+    if inserts or updates:
+        mark_scores_written(result.id)
+    refresh_student_summaries([row['student_id'] for row in inserts] + [
+        student_ids[reg] for reg, outcome in outcomes.items() if outcome == "updated"])
+
+    return {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "unchanged": len(outcomes) - len(inserts) - len(updates),
+        "rows": [{"registration_number": reg, "status": outcomes[reg]} for reg in registrations]
+    }
+
+def semester_sort_key(session, term):
+    """Chronological sort key for a semester's session and term."""
+    return session, TERM_ORDER.get(term, len(TERM_ORDER) + 1), term
+
+def refresh_student_summaries(student_ids):
+    """Rebuild the `student_semester_summary` rows of `student_ids` from their scores.
+
+    Runs inside the caller's transaction: call it after writing scores, before committing.
+    Only the given students are recomputed, with one grouped query per chunk of students.
+    Every rebuilt row gets the same `updated_at`, which serves as the students' data version.
+    """
+    student_ids = set(student_ids)
+    refreshed_at = datetime.utcnow()
+    points = case(GRADE_POINTS, value=Score.grade, else_=0) * Course.unit
+    totals = []
+    for chunk in _chunked(student_ids):
+        totals.extend(
+            db.session.query(Score.student_id, Semester.id, Semester.session, Semester.term, func.count(Score.id),
+                             func.sum(Course.unit), func.sum(points))
+            .join(Result, Score.result_id == Result.id)
+            .join(Course, Result.course_id == Course.id)
+            .join(Semester, Result.semester_id == Semester.id)
+            .filter(Score.student_id.in_(chunk))
+            .group_by(Score.student_id, Semester.id, Semester.session, Semester.term)
+            .all()
+        )
+        db.session.execute(
+            delete(StudentSemesterSummary).where(StudentSemesterSummary.student_id.in_(chunk)),
+            execution_options={"synchronize_session": False}
+        )
+
+    summaries, cumulative = [], {}
+    for student_id, semester_id, _, _, course_count, credits, grade_points in sorted(
+            totals, key=lambda row: (row[0], semester_sort_key(row[2], row[3]))):
+        credits, grade_points = credits or 0, grade_points or 0
+        cumulative_credits, cumulative_points = cumulative.get(student_id, (0, 0))
+        cumulative_credits += credits
+        cumulative_points += grade_points
+        cumulative[student_id] = (cumulative_credits, cumulative_points)
+        summaries.append({
+            "student_id": student_id,
+            "semester_id": semester_id,
+            "course_count": course_count,
+            "total_credit_earned": credits,
+            "total_grade_point": grade_points,
+            "gpa": grade_points / credits if credits > 0 else 0,
+            "cumulative_credit_earned": cumulative_credits,
+            "cumulative_grade_point": cumulative_points,
+            "cgpa": cumulative_points / cumulative_credits if cumulative_credits > 0 else 0,
+            "updated_at": refreshed_at
+        })
+    if summaries:
+        db.session.execute(insert(StudentSemesterSummary), summaries)
+
+def get_students_results(student_ids, session=None, detail=True):
+    """Results of many students grouped by session and semester, read from `student_semester_summary`.
+
+    Returns `{student_id: (grouped_results, total_credit_earned, total_grade_point, course_count)}`,
+    where `grouped_results` has the shape built by `process_scores_data`; students without
+    results are left out. Summaries and course lines are fetched with one query each per chunk
+    of students, and course lines only when `detail` is true. Students whose summaries predate
+    the table are backfilled.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
 
+    def load_summaries(ids):
+        rows = []
+        for chunk in _chunked(ids):
+            query = (db.session.query(StudentSemesterSummary, Semester.session, Semester.term)
+                     .join(Semester, StudentSemesterSummary.semester_id == Semester.id)
+                     .filter(StudentSemesterSummary.student_id.in_(chunk)))
+            if session:
+                query = query.filter(Semester.session == session.strip())
+            rows.extend(query.all())
+        return rows
+
+    rows = load_summaries(student_ids)
+    found = {summary.student_id for summary, _, _ in rows}
+    missing = [student_id for student_id in student_ids if student_id not in found]
+    if missing:
+        has_summary = (select(StudentSemesterSummary.id)
+                       .where(StudentSemesterSummary.student_id == Score.student_id).exists())
+        stale = set()
+        for chunk in _chunked(missing):
+            stale.update(row[0] for row in db.session.query(Score.student_id)
+                         .filter(Score.student_id.in_(chunk), ~has_summary).distinct())
+        if stale:
+            refresh_student_summaries(stale)
+            db.session.commit()
+            rows.extend(load_summaries(stale))
+
+    results, semesters = {}, {}
+    for summary, session_name, semester_name in sorted(rows, key=lambda row: semester_sort_key(row[1], row[2])):
+        semester_data = {
+            "total_credit_earned": summary.total_credit_earned,
+            "total_grade_point": summary.total_grade_point,
+            "GPA": summary.gpa,
+            "CGPA": summary.cgpa
+        }
+        if detail:
+            semester_data["courses"] = []
+        grouped_results, total_credit_earned, total_grade_point, course_count = results.get(
+            summary.student_id, ({}, 0, 0, 0))
+        grouped_results.setdefault(session_name, {"results_by_semester": {}})["results_by_semester"][semester_name] = semester_data
+        results[summary.student_id] = (grouped_results,
+                                       total_credit_earned + summary.total_credit_earned,
+                                       total_grade_point + summary.total_grade_point,
+                                       course_count + summary.course_count)
+        semesters[summary.student_id, summary.semester_id] = semester_data
+
+    if detail and semesters:
+        semester_ids = {semester_id for _, semester_id in semesters}
+        for chunk in _chunked(list(results)):
+            course_lines = (db.session.query(Score, Course, Result.semester_id)
+                            .join(Result, Score.result_id == Result.id)
+                            .join(Course, Result.course_id == Course.id)
+                            .filter(Score.student_id.in_(chunk), Result.semester_id.in_(semester_ids))
+                            .order_by(Course.code))
+            for score, course, semester_id in course_lines:
+                semester_data = semesters.get((score.student_id, semester_id))
+                if semester_data is None:
+                    continue
+                semester_data["courses"].append({
+                    "course_code": course.code,
+                    "course_title": course.title,
+                    "course_unit": course.unit,
+                    "ca_score": score.continuous_assessment,
+                    "exam_score": score.exam_score,
+                    "total_score": score.total_score,
+                    "grade": score.grade,
+                    "point": calc_point(score.grade, course.unit)
+                })
+
+    return results
+
+def get_student_results(student_id, session=None, detail=True):
+    """One student's results as `(grouped_results, total_credit_earned, total_grade_point, course_count)`.
+
+    See `get_students_results`.
+    """
+    return get_students_results([student_id], session, detail).get(student_id, ({}, 0, 0, 0))
+
+def get_or_create_sheet_result(header_info, file_info):
+    """The `Result` a parsed sheet belongs to, creating its course, semester and result as needed."""
+    # Get or create course
+    course = Course.query.filter_by(code=header_info['course_code']).first()
+    if not course:
+        course = Course(
+            code=header_info['course_code'],
+            title=header_info['course_title'],
+            unit=header_info['course_unit'],
+            department=header_info['department'],
+            faculty=header_info['faculty'],
+            level='100'  # You can adjust this based on your payload data
+        )
+        db.session.add(course)
+        db.session.flush()
+
+    # Get or create semester
+    semester = get_or_create_semester(header_info['session'], header_info['semester'])
+    db.session.flush()
+
+    # Get or create result metadata once for the whole sheet
+    result_metadata = Result.query.filter_by(
+        course_id=course.id,
+        semester_id=semester.id,
+    ).first()
+
+    if not result_metadata:
+        result_metadata = Result(
+            course_id=course.id,
+            semester_id=semester.id,
+            original_file=file_info['filename'],
+            upload_date=datetime.utcnow(),
+            uploader_lecturer_id=file_info['uploader_id']
+        )
+        db.session.add(result_metadata)
+        db.session.flush()
+    return result_metadata
+
+class IngestionInProgress(RuntimeError):
+    """Another upload of the same file for the same result is writing its chunks right now."""
+
+def _ingestion_checkpoint(result_metadata, file_info):
+    """Claim the `IngestionJob` this upload checkpoints to, and commit.
+
+    The latest unfinished job of the same file for the same result is resumed. If the result's
+    scores were written after that job's last checkpoint, its progress is thrown away and the
+    file is written from the start. Jobs are claimed with a conditional UPDATE, so only one
+    upload runs a job at a time. A running job that has not checkpointed for
+    `INGEST_JOB_LEASE_SECONDS` is taken over as abandoned. Raises `IngestionInProgress` while
+    another upload is running the job.
+    """
+    now = datetime.utcnow()
+    lease_expired = now - timedelta(seconds=current_app.config.get('INGEST_JOB_LEASE_SECONDS', 300))
+    file_hash = file_info.get('file_hash')
+    job = None
+    if file_hash:
+        job = (IngestionJob.query
+               .filter(IngestionJob.file_hash == file_hash,
+                       IngestionJob.result_id == result_metadata.id,
+                       IngestionJob.status != 'completed')
+               .order_by(IngestionJob.id.desc())
+               .first())
+
+    if job is not None:
+        if job.status == 'running' and job.updated_at >= lease_expired:
+            db.session.rollback()
+            raise IngestionInProgress("This file is already being uploaded for this result")
+        claim = {"status": 'running', "error": None, "updated_at": now}
+        last_written = db.session.query(Result.last_updated).filter(Result.id == result_metadata.id).scalar()
+        if last_written is not None and last_written > job.updated_at:
+            # Scores changed since the checkpoint, so the rows it skips may no longer be saved
+            claim.update(rows_committed=0, inserted=0, updated=0, unchanged=0)
+        claimed = db.session.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job.id, IngestionJob.status == job.status,
+                   IngestionJob.updated_at == job.updated_at)
+            .values(**claim)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            raise IngestionInProgress("This file is already being uploaded for this result")
+        db.session.commit()
+        return job
+
+    job = IngestionJob(file_hash=file_hash, result_id=result_metadata.id, status='running',
+                       uploader_id=file_info['uploader_id'], filename=file_info['filename'],
+                       created_at=now, updated_at=now)
+    db.session.add(job)
+    db.session.commit()
+    if file_hash:
+        # Two first uploads of a file can both get here; the earlier job wins
+        earlier = (db.session.query(IngestionJob.id)
+                   .filter(IngestionJob.file_hash == file_hash,
+                           IngestionJob.result_id == result_metadata.id,
+                           IngestionJob.id < job.id,
+                           IngestionJob.status == 'running',
+                           IngestionJob.updated_at >= lease_expired)
+                   .first())
+        if earlier is not None:
+            _fail_ingestion_job(job.id, "Superseded by a concurrent upload of the same file")
+            raise IngestionInProgress("This file is already being uploaded for this result")
+    return job
+
+def _fail_ingestion_job(job_id, error):
+    """Mark a job failed without moving `updated_at`, which stays the time of its last checkpoint."""
+    try:
+        db.session.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id)
+            .values(status='failed', error=error, updated_at=IngestionJob.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+def save_results_to_db(header_info, results_data, file_info, chunk_size=None, on_progress=None,
+                       commit_chunk_size=None):
+    """Save extracted results for one course/semester.
+
+    `results_data` may be any iterable, including the lazy iterators from `stream_uploaded_file`;
+    it is consumed `chunk_size` rows at a time so large sheets are never held in memory whole.
+    `on_progress`, if given, is called with the running counts after every chunk.
+
+    By default the whole upload is one transaction. With `commit_chunk_size` (default
+    `INGEST_COMMIT_CHUNK_SIZE`) rows are committed that many at a time and an `IngestionJob`
+    records how many are saved, so other writers get in between chunks and a failed upload of
+    the same file resumes after the last committed chunk instead of starting over.
+    Returns `(success, message, counts)` where counts holds inserted/updated/unchanged score totals.
+    """
+    chunk_size = chunk_size or current_app.config.get('INGEST_CHUNK_SIZE', IN_CLAUSE_CHUNK_SIZE)
+    if commit_chunk_size is None:
+        commit_chunk_size = current_app.config.get('INGEST_COMMIT_CHUNK_SIZE', 0)
+    job = None
+    try:
+        result_metadata = get_or_create_sheet_result(header_info, file_info)
+
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        records = iter(results_data)
+        if commit_chunk_size:
+            chunk_size = commit_chunk_size
+            job = _ingestion_checkpoint(result_metadata, file_info)
+            if job.rows_committed:
+                # Rows up to the checkpoint are already saved
+                counts.update(inserted=job.inserted, updated=job.updated, unchanged=job.unchanged)
+                records = islice(records, job.rows_committed, None)
+
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            for key, value in bulk_upsert_scores(result_metadata, chunk).items():
+                counts[key] += value
+            if job is not None:
+                job.rows_committed += len(chunk)
+                job.inserted, job.updated, job.unchanged = counts["inserted"], counts["updated"], counts["unchanged"]
+                # Set after the chunk's writes, so later writes to the result are newer than the checkpoint
+                job.updated_at = datetime.utcnow()
+                db.session.commit()
+            if on_progress:
+                on_progress(dict(counts))
+
+        # Only a finished upload marks the file as applied to this result
+        if file_info.get('file_hash'):
+            result_metadata.file_hash = file_info['file_hash']
+        if job is not None:
+            job.status = 'completed'
         db.session.commit()
-        return True, "Results saved successfully"
+        return True, "Results saved successfully", counts
 
+    except IngestionInProgress:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
-        return False, str(e)
+        if job is not None:
+            _fail_ingestion_job(job.id, str(e))
+        return False, str(e), None
+
+def get_parsed_upload_cache():
+    """Disk cache of parsed uploads keyed by `parsed_upload_key`, shared per app.
+
+    An entry is JSON lines: the header info, then one line per student row.
+    """
+    cache = current_app.extensions.get('parsed_upload_cache')
+    if cache is None:
+        cache = DiskLRUCache(current_app.config['UPLOAD_CACHE_FOLDER'], current_app.config['UPLOAD_CACHE_MAX_BYTES'])
+        current_app.extensions['parsed_upload_cache'] = cache
+    return cache
+
+def parsed_upload_key(file_hash):
+    """Parse-cache key of an upload: its hash plus the registration patterns it is parsed with."""
+    patterns = json.dumps(current_app.config.get('REGISTRATION_NUMBER_PATTERNS'), sort_keys=True, default=str)
+    return f"{file_hash}-{hashlib.sha256(patterns.encode()).hexdigest()[:16]}.jsonl"
+
+def _cached_rows(cache_file):
+    for line in cache_file:
+        yield json.loads(line)
+
+class CachingRows:
+    """Iterates the rows of a fresh parse once, appending each to a parse-cache entry.
+
+    Rows are passed on as they are parsed, so the upload is never held in memory whole. The
+    entry is published only when every row has been read; a parse that fails or is abandoned
+    part way leaves no entry. A parser error is kept in `error` and re-raised.
+    """
+
+    def __init__(self, records, writer):
+        self._records = records
+        self._writer = writer
+        self.error = None
+
+    def __iter__(self):
+        try:
+            for row in self._records:
+                self._writer.write(json.dumps(row).encode() + b"\n")
+                yield row
+        except Exception as e:
+            self.error = e
+            self.close()
+            raise
+        self._writer.commit()
+        self._writer = None
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.discard()
+            self._writer = None
+
+def ingest_uploaded_file(filepath, file_info, on_progress=None):
+    """Extract a saved upload and write its results. Returns `(payload, status_code)`.
+
+    Rows stream from the extractor to the database writer. When `file_info` carries a
+    `file_hash`, they are also written to the parse cache on the way, and a later upload of the
+    same file is read back from the cache instead of parsed. A byte-identical re-upload for the
+    same result returns without touching the scores table, provided nothing else has written
+    the result's scores since (see `mark_scores_written`).
+    """
+    file_hash = file_info.get('file_hash')
+    cache = get_parsed_upload_cache() if file_hash else None
+    cache_file = cache.open(parsed_upload_key(file_hash)) if cache else None
+    rows = None
+    try:
+        if cache_file:
+            header_info = json.loads(cache_file.readline())
+            records = _cached_rows(cache_file)
+        else:
+            extraction_result, message = stream_uploaded_file(filepath)
+            if extraction_result is None:
+                return {"error": message}, 400
+            header_info, records = extraction_result
+            if cache:
+                cache_writer = cache.writer(parsed_upload_key(file_hash))
+                cache_writer.write(json.dumps(header_info).encode() + b"\n")
+                rows = CachingRows(records, cache_writer)
+                records = iter(rows)
+        return _ingest_records(header_info, records, rows, file_info, on_progress)
+    finally:
+        if rows is not None:
+            rows.close()
+        if cache_file:
+            cache_file.close()
+
+def _ingest_records(header_info, records, rows, file_info, on_progress):
+    """Write the parsed `records` of an upload; `rows` is the `CachingRows` behind them, if any."""
+    file_hash = file_info.get('file_hash')
+    uploader_id = file_info['uploader_id']
+
+    # Fetch or create the course
+    course = Course.query.filter_by(code=header_info['course_code']).first()
+
+    if not course:
+        # If course doesn't exist, create it
+        course = Course(
+            code=header_info['course_code'],
+            title=header_info['course_title'],
+            unit=header_info['course_unit'],
+            department=header_info['department'],
+            faculty=header_info['faculty'],
+            level='100'  # You can adjust this based on your payload data
+        )
+        db.session.add(course)
+        db.session.flush()  # Ensure the course ID is available
+
+    current_user = User.query.get(uploader_id)
+    if current_user.role == 'lecturer' and current_user not in course.lecturers:
+        db.session.rollback()
+        return {"error": "You are not authorized to upload results for this course."}, 403
+
+    if file_hash:
+        existing_result = Result.query.join(Semester).filter(
+            Result.course_id == course.id,
+            Semester.session == header_info['session'].strip(),
+            Semester.term == header_info['semester'].strip().upper()
+        ).first()
+        if existing_result and existing_result.file_hash == file_hash:
+            # The hash is cleared by any other write, so every student of the sheet still has its score
+            db.session.rollback()
+            try:
+                records_count = len({row['registration_number'] for row in records})
+            except Exception as e:
+                return {"error": str(e)}, 400
+            return {
+                "message": "No changes: this file was already uploaded for this result",
+                "records": records_count,
+                "inserted": 0,
+                "updated": 0,
+                "unchanged": records_count
+            }, 200
+
+    try:
+        success, db_message, counts = save_results_to_db(header_info, records, file_info, on_progress=on_progress)
+    except IngestionInProgress as e:
+        return {"error": str(e)}, 409
+    if not success:
+        # An unreadable row is the file's fault, not the server's
+        return {"error": db_message}, 400 if rows is not None and rows.error else 500
+
+    return {
+        "message": "File processed and results saved successfully",
+        "records": sum(counts.values()),
+        "inserted": counts["inserted"],
+        "updated": counts["updated"],
+        "unchanged": counts["unchanged"]
+    }, 200
 
 def save_file(file):
-    """saving the file to the upload folder. This may be removed later since we are apporaching this based on database not file system"""
+    """saving the file to the upload folder. This may be removed later since we are apporaching this based on database not file system
+
+    The upload is hashed (SHA-256) while it is streamed to disk and stored under its hash, so
+    identical uploads share one file. Returns `(filepath, file_hash, error)`.
+    """
     if not file or not allowed_file(file.filename):
-        return None, "Invalid file format"
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-    file.save(filepath)
-    return filepath, None
+        return None, None, "Invalid file format"
+    # allowed_file checked the raw name; secure_filename drops non-ASCII names to a bare extension
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    os.makedirs(upload_folder, exist_ok=True)
+
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(upload_folder, f".upload-{uuid.uuid4().hex}")
+    with open(tmp_path, 'wb') as out:
+        for chunk in iter(lambda: file.stream.read(UPLOAD_READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            out.write(chunk)
+
+    file_hash = digest.hexdigest()
+    filepath = os.path.join(upload_folder, f"{file_hash}.{ext}")
+    os.replace(tmp_path, filepath)
+    return filepath, file_hash, None
 
 def process_scores_data(scores):
     grouped_scores = {}
@@ -240,8 +989,7 @@ def process_scores_data(scores):
         course = result.course
         semester = result.semester
 
-        # Extract session and semester names
-        session_name, semester_name = semester.name.split(" ")
+        session_name, semester_name = semester.session, semester.term
 
         # Initialize session data if not present
         if session_name not in grouped_scores:
@@ -0,0 +1,84 @@
+"""Cold-start benchmark for the app factory.
+
+Times `from app import create_app; create_app()` in fresh interpreters, the cost every
+Gunicorn worker and every test pays on boot, and reports which optional heavy modules
+were imported along the way (they should be loaded on first use instead).
+
+    python benchmarks/cold_start.py                 # 10 runs, median/min/max
+    python benchmarks/cold_start.py --importtime 15 # plus the slowest imports
+    python benchmarks/cold_start.py --max-ms 1500   # exit 1 if the median is slower
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by extraction, transcripts and analytics; none of them should load at boot
+LAZY_MODULES = ('pypdf', 'docx', 'openpyxl', 'fpdf', 'numpy')
+
+_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+create_app()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _environ():
+    return dict(os.environ, FLASK_ENV=os.environ.get('FLASK_ENV', 'testing'))
+
+
+def measure_cold_start():
+    """Boot the app once in a fresh interpreter; returns `{"seconds": float, "loaded": [module, ...]}`."""
+    output = subprocess.run([sys.executable, '-c', _PROBE], cwd=ROOT, env=_environ(),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit):
+    """`(cumulative microseconds, module)` of the `limit` slowest imports made by the probe or by the
+    packages it imports directly, from `-X importtime`."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE], cwd=ROOT, env=_environ(),
+                            capture_output=True, text=True, check=True).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('     '):  # Nesting is shown as two spaces per level
+            timings.append((int(cumulative), name.strip()))
+    return sorted(timings, reverse=True)[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help='also list the N slowest imports')
+    parser.add_argument('--max-ms', type=float, help='fail when the median cold start is slower than this')
+    args = parser.parse_args(argv)
+
+    samples = [measure_cold_start() for _ in range(args.runs)]
+    times = sorted(sample['seconds'] * 1000 for sample in samples)
+    median = statistics.median(times)
+    print(f"create_app() cold start over {args.runs} runs: "
+          f"median {median:.0f} ms, min {times[0]:.0f} ms, max {times[-1]:.0f} ms")
+    loaded = sorted({module for sample in samples for module in sample['loaded']})
+    print(f"Optional modules loaded at boot: {', '.join(loaded) if loaded else 'none'}")
+
+    for cumulative, name in slowest_imports(args.importtime) if args.importtime else []:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Median cold start {median:.0f} ms exceeds the {args.max_ms:.0f} ms budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Mixed read/write throughput of a file-backed SQLite database under concurrent workers.
+
+Runs reader and writer processes against one database file, the way Gunicorn workers share
+it. Readers build students' result sheets and writers patch scores and record an action log
+entry, each in its own transaction. The tuned defaults (WAL, `synchronous=NORMAL`, busy
+timeout, mmap) are compared against SQLite's stock settings (rollback journal,
+`synchronous=FULL`, pysqlite's 5 s timeout).
+
+    python benchmarks/db_concurrency.py                          # 4 readers, 2 writers, 10 s per run
+    python benchmarks/db_concurrency.py --readers 8 --writers 4 --seconds 20
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    'stock': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+              'SQLITE_BUSY_TIMEOUT_MS': '5000', 'SQLITE_MMAP_SIZE': '0'},
+    'tuned': {},  # The config defaults
+}
+STUDENTS = 300
+COURSES = ('COS101', 'COS102', 'MTH101', 'PHY101')
+PATCH_SIZE = 20  # Scores changed per write transaction
+
+
+def _app(db_path, profile):
+    """Create the app against `db_path` with `profile`'s SQLite settings.
+
+    Call before importing anything from `app`: the config reads the environment on import.
+    """
+    os.environ.update(PROFILES[profile], FLASK_ENV='development', DEV_DATABASE_URL=f'sqlite:///{db_path}')
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    return create_app()
+
+
+def _registration(i):
+    return f"2019/{240000 + i}"
+
+
+def seed(db_path, profile):
+    app = _app(db_path, profile)
+    from app import db
+    from app.models import User
+    from app.utils import save_results_to_db
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password='x', role='hod', department='CS')
+        db.session.add(user)
+        db.session.commit()
+        rows = [{"name": f"STUDENT {i}", "registration_number": _registration(i), "department": "CS",
+                 "level": "100", "continuous_assessment": 20.0, "exam_score": 50.0, "total_score": 70.0,
+                 "grade": "A"} for i in range(STUDENTS)]
+        for code in COURSES:
+            header = {"course_title": code, "course_code": code, "course_unit": 2, "department": "CS",
+                      "faculty": "SCI", "semester": "FIRST", "session": "2019/2020", "lecturers": ""}
+            save_results_to_db(header, rows, {'filename': f'{code}.csv', 'uploader_id': user.id})
+
+
+def work(db_path, profile, role, seconds, seed_value):
+    """Run `role` ('read' or 'write') transactions for `seconds`; returns `(ops, locked_errors)`."""
+    from sqlalchemy.exc import OperationalError
+
+    app = _app(db_path, profile)
+    from app import db
+    from app.models import ActionLog, Result, Student
+    from app.utils import get_student_results, patch_result_scores
+
+    rng = random.Random(seed_value)
+    ops = locked = 0
+    with app.app_context():
+        student_ids = [student_id for student_id, in db.session.query(Student.id)]
+        result_ids = [result_id for result_id, in db.session.query(Result.id)]
+        db.session.rollback()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            try:
+                if role == 'read':
+                    get_student_results(rng.choice(student_ids))
+                    db.session.rollback()
+                else:
+                    result = db.session.get(Result, rng.choice(result_ids))
+                    patch_result_scores(result, [
+                        {"registration_number": _registration(i), "exam_score": rng.randint(30, 70)}
+                        for i in rng.sample(range(STUDENTS), PATCH_SIZE)])
+                    db.session.commit()
+                    db.session.add(ActionLog(action='update_scores', resource='Result', resource_id=result.id))
+                    db.session.commit()
+                ops += 1
+            except OperationalError as e:
+                db.session.rollback()
+                if 'locked' not in str(e):
+                    raise
+                locked += 1
+    return ops, locked
+
+
+def run(profile, readers, writers, seconds):
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'bench.db')
+        context = multiprocessing.get_context('spawn')  # Each worker configures its own app
+        with context.Pool(1) as pool:
+            pool.apply(seed, (db_path, profile))
+        roles = ['read'] * readers + ['write'] * writers
+        with context.Pool(len(roles)) as pool:
+            outcomes = pool.starmap(work, [(db_path, profile, role, seconds, i) for i, role in enumerate(roles)])
+
+    totals = {'read': [0, 0], 'write': [0, 0]}
+    for role, (ops, locked) in zip(roles, outcomes):
+        totals[role][0] += ops
+        totals[role][1] += locked
+    return {role: (ops / seconds, locked) for role, (ops, locked) in totals.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--profile', choices=sorted(PROFILES), action='append',
+                        help='profiles to run (default: all)')
+    args = parser.parse_args(argv)
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f} s per profile")
+    for profile in args.profile or PROFILES:
+        report = run(profile, args.readers, args.writers, args.seconds)
+        (reads, read_errors), (writes, write_errors) = report['read'], report['write']
+        print(f"{profile:>6}: {reads:8.1f} reads/s  {writes:7.1f} writes/s  "
+              f"{reads + writes:8.1f} ops/s  {read_errors + write_errors} 'database is locked' errors")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
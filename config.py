@@ -1,13 +1,73 @@
 # flask-app/config.py
 import os
+import json
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-default-secret-key')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///result-database.db')
+    # Connection pool for server databases (PostgreSQL, MySQL); dropped for SQLite, see app/database.py
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': 30,  # Seconds a request waits for a free connection
+        'pool_recycle': 1800,  # Replace connections before server-side idle timeouts close them
+        'pool_pre_ping': True,  # Test connections on checkout so a restarted server is not an error
+    }
+    # SQLite pragmas applied to every new connection. WAL lets readers run alongside the single
+    # writer, and the busy timeout makes a writer wait for the lock instead of failing with
+    # "database is locked". Ignored for other databases.
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # Durable in WAL mode up to the last checkpoint
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # Bytes of the file read through mmap
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key')
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     ALLOWED_EXTENSIONS = {'csv', 'xls', 'xlsx', 'docx', 'pdf'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload size
+    UPLOAD_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, '.parse-cache')  # Parsed uploads keyed by SHA-256
+    UPLOAD_CACHE_MAX_BYTES = int(os.getenv('UPLOAD_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    TRANSCRIPT_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, '.transcript-cache')  # Rendered transcript PDFs
+    TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv('TRANSCRIPT_CACHE_MAX_BYTES', 128 * 1024 * 1024))
+    INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', 500))  # Rows written per bulk statement on upload
+    # Rows committed per transaction on upload, with a resumable checkpoint in ingestion_jobs.
+    # 0 writes the whole upload in one transaction.
+    INGEST_COMMIT_CHUNK_SIZE = int(os.getenv('INGEST_COMMIT_CHUNK_SIZE', 0))
+    # Seconds without a checkpoint after which a running chunked upload counts as abandoned and can be resumed
+    INGEST_JOB_LEASE_SECONDS = int(os.getenv('INGEST_JOB_LEASE_SECONDS', 300))
+    # Registration-number regexes per faculty, e.g. '{"ENGINEERING": ["2019/\\d{6}", "2020/\\d{6}"]}'.
+    # Faculties without an entry use "default", which accepts any intake year.
+    REGISTRATION_NUMBER_PATTERNS = json.loads(os.getenv('REGISTRATION_NUMBER_PATTERNS', '{}'))
+    PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', 4))  # Processes used to parse multi-page PDFs
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+
+    # Token revocation cache (bloom filter + LRU in front of token_blacklist)
+    JWT_REVOCATION_REFRESH_SECONDS = float(os.getenv('JWT_REVOCATION_REFRESH_SECONDS', 5))  # Max delay before another worker's logout is seen without pub/sub
+    JWT_REVOCATION_SYNC_OVERLAP_SECONDS = 60
+    JWT_REVOCATION_BLOOM_CAPACITY = 100000
+    JWT_REVOCATION_LRU_SIZE = 1024
+    JWT_REVOCATION_PUBSUB = os.getenv('JWT_REVOCATION_PUBSUB', 'false').lower() == 'true'  # Fan out logouts over Redis
+    # Trust the role/department claims of access tokens younger than this many seconds instead of
+    # loading the user; role changes then take up to this long to apply. 0 always reads the database.
+    JWT_ROLE_CLAIMS_TTL = int(os.getenv('JWT_ROLE_CLAIMS_TTL', 0))
+
+    # Background upload processing (POST /results/upload?async=true)
+    UPLOAD_ASYNC = os.getenv('UPLOAD_ASYNC', 'false').lower() == 'true'  # Make async the default for uploads
+    UPLOAD_JOB_BACKEND = os.getenv('UPLOAD_JOB_BACKEND', 'redis')  # 'redis' or 'memory' (single process only)
+    UPLOAD_WORKERS = int(os.getenv('UPLOAD_WORKERS', 2))
+    UPLOAD_JOB_TTL = 24 * 60 * 60  # Seconds a finished job stays queryable in Redis
+
+    # Action log writer: entries are queued and bulk-inserted by a background thread
+    ACTION_LOG_ASYNC = os.getenv('ACTION_LOG_ASYNC', 'true').lower() == 'true'  # 'false' commits each entry in the request
+    ACTION_LOG_QUEUE_SIZE = int(os.getenv('ACTION_LOG_QUEUE_SIZE', 10000))  # Past this, requests write their own entry
+    ACTION_LOG_BATCH_SIZE = 200
+    ACTION_LOG_FLUSH_INTERVAL = float(os.getenv('ACTION_LOG_FLUSH_INTERVAL', 1.0))  # Max seconds an entry waits in the queue
+
+    PAGINATION_MAX_PER_PAGE = int(os.getenv('PAGINATION_MAX_PER_PAGE', 100))  # Larger per_page values are clamped to this
+    PAGINATION_TOTAL_CACHE_SECONDS = 30  # How long a cursor-paginated listing's total_results is reused
+
+    # Bulk transcript downloads (GET /results/transcripts/bulk)
+    TRANSCRIPT_RENDER_WORKERS = int(os.getenv('TRANSCRIPT_RENDER_WORKERS', 4))  # Processes rendering PDFs; 1 renders in the request
+    TRANSCRIPT_BATCH_SIZE = 50  # Students whose score data is fetched per query
 
 
 class DevelopmentConfig(Config):
@@ -18,9 +78,15 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # In-memory database for tests
+    SQLALCHEMY_ENGINE_OPTIONS = {}
     JWT_SECRET_KEY = 'test-jwt-secret-key'
+    UPLOAD_JOB_BACKEND = 'memory'
+    ACTION_LOG_ASYNC = False  # Entries are committed before the request returns
 
 
 class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///prod-database.db')
+    SQLALCHEMY_ENGINE_OPTIONS = dict(Config.SQLALCHEMY_ENGINE_OPTIONS,
+                                     pool_size=int(os.getenv('DB_POOL_SIZE', 10)),
+                                     max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 20)))
@@ -0,0 +1,49 @@
+"""semester session and term columns
+
+Splits `semesters.name` ("2019/2020 First") into indexed `session` and upper-case `term`
+columns so filters are equality lookups. `name` is kept for display.
+
+Revision ID: c72d5e0f9a14
+Revises: 8b4e6d21c5a3
+Create Date: 2026-10-17 04:08:10.648395
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c72d5e0f9a14'
+down_revision = '8b4e6d21c5a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('session', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('term', sa.String(length=20), nullable=True))
+
+    # Backfill from the name; the semesters table is small enough to split in Python
+    connection = op.get_bind()
+    semesters = sa.table('semesters', sa.column('id', sa.Integer), sa.column('name', sa.String),
+                         sa.column('session', sa.String), sa.column('term', sa.String))
+    rows = connection.execute(sa.select(semesters.c.id, semesters.c.name)).all()
+    for semester_id, name in rows:
+        session, _, term = name.strip().partition(" ")
+        connection.execute(semesters.update().where(semesters.c.id == semester_id)
+                           .values(session=session, term=term.strip().upper()))
+
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.alter_column('session', existing_type=sa.String(length=20), nullable=False)
+        batch_op.alter_column('term', existing_type=sa.String(length=20), nullable=False)
+        batch_op.drop_index(batch_op.f('ix_semesters_name'))
+        batch_op.create_index('ix_semesters_session_term', ['session', 'term'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('semesters', schema=None) as batch_op:
+        batch_op.drop_index('ix_semesters_session_term')
+        batch_op.create_index(batch_op.f('ix_semesters_name'), ['name'], unique=False)
+        batch_op.drop_column('term')
+        batch_op.drop_column('session')
@@ -0,0 +1,30 @@
+"""search index
+
+Full-text search over courses and students: FTS5 trigram tables kept current by triggers on
+SQLite, pg_trgm GIN indexes on PostgreSQL (see app/search.py). Existing rows are indexed here.
+
+Revision ID: e41b7c3a6d28
+Revises: c72d5e0f9a14
+Create Date: 2026-10-17 04:31:42.118204
+
+"""
+from alembic import op
+
+from app.search import drop_search_index, install_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41b7c3a6d28'
+down_revision = 'c72d5e0f9a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('courses', 'students'):
+        install_search_index(op.get_bind(), table)
+
+
+def downgrade():
+    for table in ('courses', 'students'):
+        drop_search_index(op.get_bind(), table)
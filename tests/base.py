@@ -1,4 +1,7 @@
+import os
+import tempfile
 import unittest
+from flask_jwt_extended import create_access_token
 from app import create_app, db
 from app.models import User, Course, Student, Result, Semester
 
@@ -35,4 +38,34 @@ class BaseTestCase(unittest.TestCase):
             'username': username,
             'password': password
         })
-        return response.json['access_token'] 
\ No newline at end of file
+        return response.json['access_token'] 
+
+class DatabaseTestCase(unittest.TestCase):
+    """Test case with an in-memory database and a lecturer to attach uploads to."""
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.upload_dir = tempfile.TemporaryDirectory()
+        self.app.config['UPLOAD_FOLDER'] = self.upload_dir.name
+        self.app.config['UPLOAD_CACHE_FOLDER'] = os.path.join(self.upload_dir.name, '.parse-cache')
+        self.app.config['TRANSCRIPT_CACHE_FOLDER'] = os.path.join(self.upload_dir.name, '.transcript-cache')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.lecturer = User(username='lecturer1', email='lecturer1@example.com',
+                             role='lecturer', department='Computer Science')
+        self.lecturer.set_password('password')
+        db.session.add(self.lecturer)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.upload_dir.cleanup()
+
+    def auth_headers(self, user=None):
+        token = create_access_token(identity=(user or self.lecturer).id)
+        return {'Authorization': f'Bearer {token}'}
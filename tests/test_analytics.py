@@ -0,0 +1,78 @@
+import csv
+import io
+import unittest
+
+import numpy as np
+
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.analytics import class_of_degree, competition_rank, department_summary
+from app.utils import save_results_to_db
+
+SUMMARY_URL = '/api/v1/results/department-summary'
+
+
+class TestRanking(unittest.TestCase):
+    def test_ties_share_the_better_rank(self):
+        ranks = competition_rank(np.array([3.2, 4.5, 3.2, 1.0]))
+        self.assertEqual(ranks.tolist(), [2, 1, 2, 4])
+
+    def test_class_of_degree_bounds(self):
+        classes = class_of_degree(np.array([4.5, 4.49, 3.5, 2.4, 1.5, 1.0, 0.99]))
+        self.assertEqual(classes.tolist(), ["First Class", "Second Class Upper", "Second Class Upper",
+                                            "Second Class Lower", "Third Class", "Pass", "Fail"])
+
+
+class TestDepartmentSummary(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'exam_officer'
+        db.session.commit()
+        self.headers = self.auth_headers()
+
+        file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        # Student i gets grade A, B, C, ... in the first semester and B for everyone in the next session
+        first = make_rows(4)
+        for row, grade in zip(first, "ABCF"):
+            row["grade"] = grade
+        save_results_to_db(dict(HEADER_INFO, course_code="COS101", course_unit=3, session="2019/2020",
+                                semester="FIRST"), first, file_info)
+        save_results_to_db(dict(HEADER_INFO, course_code="COS201", course_unit=2, session="2020/2021",
+                                semester="FIRST"), make_rows(4), file_info)
+
+    def test_gpa_cgpa_and_rank(self):
+        students, semesters = department_summary("computer science")
+        self.assertEqual(semesters, ["2019/2020 FIRST", "2020/2021 FIRST"])
+        self.assertEqual([s["rank"] for s in students], [1, 2, 3, 4])
+
+        best = students[0]
+        self.assertEqual(best["registration_number"], "2019/240000")
+        self.assertEqual(best["total_credit_earned"], 5)
+        self.assertEqual(best["total_grade_point"], 23)  # 3 x A + 2 x B
+        self.assertEqual(best["cgpa"], 4.6)
+        self.assertEqual(best["class_of_degree"], "First Class")
+        self.assertEqual(best["semester_gpa"], {"2019/2020 FIRST": 5.0, "2020/2021 FIRST": 4.0})
+        self.assertEqual(students[-1]["cgpa"], 1.6)  # 3 x F + 2 x B
+
+    def test_session_limits_semesters(self):
+        students, semesters = department_summary("COMPUTER SCIENCE", session="2019/2020")
+        self.assertEqual(semesters, ["2019/2020 FIRST"])
+        self.assertEqual(students[0]["cgpa"], 5.0)
+
+    def test_endpoint_json_and_csv(self):
+        response = self.client.get(SUMMARY_URL, headers=self.headers, query_string={'department': 'Computer Science'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["total_students"], 4)
+
+        response = self.client.get(SUMMARY_URL, headers=self.headers,
+                                   query_string={'department': 'Computer Science', 'format': 'csv'})
+        self.assertEqual(response.mimetype, 'text/csv')
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(rows[0][-2:], ["GPA 2019/2020 FIRST", "GPA 2020/2021 FIRST"])
+        self.assertEqual(rows[1][:2], ["1", "2019/240000"])
+        self.assertEqual(len(rows), 5)
+
+    def test_endpoint_requires_department(self):
+        response = self.client.get(SUMMARY_URL, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
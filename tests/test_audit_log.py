@@ -0,0 +1,58 @@
+from .base import DatabaseTestCase
+from app import db
+from app.audit import ActionLogWriter
+from app.models import ActionLog
+
+
+class TestActionLogWriter(DatabaseTestCase):
+    def async_writer(self, **config):
+        self.app.config.update(ACTION_LOG_ASYNC=True, **config)
+        writer = ActionLogWriter(self.app)
+        self.addCleanup(writer.shutdown)
+        return writer
+
+    def record(self, writer, count):
+        for i in range(count):
+            writer.record(user_id=self.lecturer.id, action="view_profile", resource="User", resource_id=i)
+
+    def test_sync_mode_writes_during_request(self):
+        response = self.client.get('/api/v1/auth/me', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ActionLog.query.filter_by(action="view_profile").count(), 1)
+
+    def test_entries_are_written_in_batches(self):
+        writer = self.async_writer(ACTION_LOG_BATCH_SIZE=3, ACTION_LOG_FLUSH_INTERVAL=60)
+        self.record(writer, 7)
+        writer.flush()
+
+        self.assertEqual(ActionLog.query.count(), 7)
+        metrics = writer.metrics()
+        self.assertEqual(metrics["written"], 7)
+        self.assertEqual(metrics["batches"], 3)
+        self.assertEqual(metrics["queue_depth"], 0)
+
+    def test_shutdown_flushes_pending_entries(self):
+        writer = self.async_writer(ACTION_LOG_BATCH_SIZE=100, ACTION_LOG_FLUSH_INTERVAL=60)
+        self.record(writer, 3)
+        writer.shutdown()
+        self.assertEqual(ActionLog.query.count(), 3)
+
+    def test_full_queue_falls_back_to_synchronous_write(self):
+        writer = self.async_writer(ACTION_LOG_QUEUE_SIZE=1)
+        writer.shutdown()  # Nothing drains the queue from here on
+        self.record(writer, 2)
+
+        metrics = writer.metrics()
+        self.assertEqual(metrics["enqueued"], 1)
+        self.assertEqual(metrics["overflows"], 1)
+        self.assertEqual(ActionLog.query.count(), 1)
+
+    def test_metrics_endpoint_requires_hod_or_admin(self):
+        response = self.client.get('/api/v1/security/action-logs/metrics', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 403)
+
+        self.lecturer.role = 'hod'
+        db.session.commit()
+        response = self.client.get('/api/v1/security/action-logs/metrics', headers=self.auth_headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["mode"], "sync")
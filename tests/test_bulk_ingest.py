@@ -0,0 +1,84 @@
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from app import db
+from app.models import Result, Score, Student
+from app.utils import bulk_upsert_scores, save_results_to_db
+
+
+HEADER_INFO = {
+    "course_title": "COMPUTING PRACTICE",
+    "course_code": "COS102",
+    "course_unit": 2,
+    "department": "COMPUTER SCIENCE",
+    "faculty": "PHYSICAL SCIENCE",
+    "semester": "SECOND",
+    "session": "2019/2020",
+    "lecturers": ""
+}
+
+
+def make_rows(count, exam_score=50):
+    return [{
+        "name": f"STUDENT {i}",
+        "registration_number": f"2019/{240000 + i}",
+        "department": "COMPUTER SCIENCE",
+        "level": "100",
+        "continuous_assessment": 20.0,
+        "exam_score": float(exam_score),
+        "total_score": 20.0 + exam_score,
+        "grade": "B"
+    } for i in range(count)]
+
+
+class TestBulkIngest(DatabaseTestCase):
+    def save(self, rows, **header_overrides):
+        file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        return save_results_to_db(dict(HEADER_INFO, **header_overrides), rows, file_info)
+
+    def test_first_upload_inserts_every_row(self):
+        success, _, counts = self.save(make_rows(30))
+        self.assertTrue(success)
+        self.assertEqual(counts, {"inserted": 30, "updated": 0, "unchanged": 0})
+        self.assertEqual(Student.query.count(), 30)
+        self.assertEqual(Score.query.count(), 30)
+
+    def test_reupload_reports_updates_and_unchanged(self):
+        self.save(make_rows(10))
+        rows = make_rows(12)
+        rows[0]["exam_score"] = 70.0
+        rows[0]["total_score"] = 90.0
+        rows[0]["grade"] = "A"
+
+        success, _, counts = self.save(rows)
+        self.assertTrue(success)
+        self.assertEqual(counts, {"inserted": 2, "updated": 1, "unchanged": 9})
+        self.assertEqual(Score.query.count(), 12)
+        student = Student.query.filter_by(registration_number="2019/240000").first()
+        self.assertEqual(Score.query.filter_by(student_id=student.id).one().grade, "A")
+
+    def test_statement_count_does_not_grow_with_rows(self):
+        self.save([], course_code="COS101")
+        self.save([], course_code="COS102")
+        small_result, large_result = Result.query.order_by(Result.id).all()
+
+        def count_statements(result, rows):
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                bulk_upsert_scores(result, rows)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", listener)
+            return len(statements)
+
+        self.assertEqual(count_statements(small_result, make_rows(5)),
+                         count_statements(large_result, make_rows(400)[5:]))
+
+    def test_lazy_records_are_saved_in_chunks(self):
+        file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        rows = iter(make_rows(25))
+        success, _, counts = save_results_to_db(HEADER_INFO, rows, file_info, chunk_size=10)
+        self.assertTrue(success)
+        self.assertEqual(counts, {"inserted": 25, "updated": 0, "unchanged": 0})
+        self.assertEqual(Score.query.count(), 25)
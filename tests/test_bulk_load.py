@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from sqlalchemy import text
+
+from .base import DatabaseTestCase
+from app import db
+from app.bulk_load import bulk_load, find_result_files
+from app.models import Result, Score, Student, StudentSemesterSummary
+
+SAMPLE_DOCS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extraction-test-docs')
+
+
+def write_sheet(path, course_code, session, students, semester="FIRST"):
+    lines = [
+        f"Title of Course:,{course_code} TITLE,,,,,Course Code:,{course_code}",
+        "Examination Date:,2021,,,,,Course Unit:,2",
+        "Department:,COMPUTER SCIENCE,,,,,Semester:," + semester,
+        f"Faculty:,PHYSICAL SCIENCE,,,,,Session:,{session}",
+        "Names,Reg.No,Department,Lev,C.A.,Ex.,Tot,Gr",
+    ] + [f"STUDENT {i},2019/{240000 + i},COMPUTER SCIENCE,100,20,50,70,A" for i in students]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+class TestBulkLoad(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.archive = tempfile.TemporaryDirectory()
+        root = self.archive.name
+        write_sheet(os.path.join(root, '2019', 'cos101.csv'), 'COS101', '2019/2020', range(0, 30))
+        write_sheet(os.path.join(root, '2019', 'mth101.csv'), 'MTH101', '2019/2020', range(10, 40))
+        write_sheet(os.path.join(root, '2020', 'cos201.csv'), 'COS201', '2020/2021', range(0, 20))
+        with open(os.path.join(root, '2020', 'broken.csv'), 'w') as f:
+            f.write("not,a,result,sheet\n")
+        with open(os.path.join(root, 'README.txt'), 'w') as f:
+            f.write("ignored")
+
+    def tearDown(self):
+        self.archive.cleanup()
+        super().tearDown()
+
+    def test_finds_sheets_in_subdirectories(self):
+        names = [os.path.relpath(path, self.archive.name) for path in find_result_files(self.archive.name)]
+        self.assertEqual(names, ['2019/cos101.csv', '2019/mth101.csv', '2020/broken.csv', '2020/cos201.csv'])
+
+    def test_command_loads_sheets_and_reports_errors(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=['results', 'bulk-load', self.archive.name,
+                                     '--uploader', 'lecturer1', '--workers', '2'])
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("Loaded 80 rows from 3 of 4 files", result.output)
+        self.assertIn("rows/s", result.output)
+        self.assertIn("2020/broken.csv: Missing header fields", result.output)
+
+        db.session.remove()
+        self.assertEqual((Result.query.count(), Score.query.count(), Student.query.count()), (3, 80, 40))
+        self.assertEqual(StudentSemesterSummary.query.filter_by(student_id=Student.query.filter_by(
+            registration_number="2019/240000").one().id).count(), 2)
+        # The search index is rebuilt with everything loaded
+        self.assertEqual(db.session.execute(text(
+            "SELECT count(*) FROM student_search WHERE student_search MATCH '\"2019/2400\"'")).scalar(), 40)
+
+    def test_students_are_created_once_across_sheets(self):
+        paths = find_result_files(self.archive.name)
+        report = bulk_load(paths, self.lecturer.id)
+        self.assertEqual((report["students"], report["new_students"], report["inserted"]), (40, 40, 80))
+
+        again = bulk_load(paths, self.lecturer.id)
+        self.assertEqual((again["new_students"], again["inserted"], again["unchanged"]), (0, 0, 80))
+        self.assertEqual(Student.query.count(), 40)
+
+    def test_unknown_uploader_is_rejected(self):
+        result = self.app.test_cli_runner().invoke(args=['results', 'bulk-load', self.archive.name,
+                                                         '--uploader', 'nobody'])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("No user named 'nobody'", result.output)
+
+    def test_search_survives_an_interrupted_load(self):
+        self.lecturer.role = 'hod'
+        db.session.commit()
+        headers = self.auth_headers()
+
+        # A load killed before it rebuilds the index (SIGKILL, OOM) never runs its cleanup
+        with mock.patch('app.bulk_load.reindex_search'):
+            bulk_load(find_result_files(self.archive.name), self.lecturer.id)
+        response = self.client.get('/api/v1/results/list', headers=headers, query_string={'course_code': 'COS'})
+        self.assertEqual(response.status_code, 200)
+
+        result = self.app.test_cli_runner().invoke(args=['results', 'reindex'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        response = self.client.get('/api/v1/results/list', headers=headers, query_string={'course_code': 'COS'})
+        self.assertEqual(sorted(item["course_code"] for item in response.json["results"]), ["COS101", "COS201"])
+
+        # Writes after the rebuild are indexed again
+        bulk_load([os.path.join(self.archive.name, '2019', 'mth101.csv')], self.lecturer.id)
+        db.session.add(Student(registration_number="2021/999999", name="LATE STUDENT", department="CS"))
+        db.session.commit()
+        self.assertEqual(db.session.execute(text(
+            "SELECT count(*) FROM student_search WHERE student_search MATCH '\"LATE STUDENT\"'")).scalar(), 1)
+
+    def test_docx_and_pdf_sheets_load_quietly(self):
+        with tempfile.TemporaryDirectory() as root:
+            # The same COS102 sheet as a Word document and as a PDF
+            for name in ('example-doc.docx', 'example-doc.pdf'):
+                shutil.copy(os.path.join(SAMPLE_DOCS, name), root)
+            result = self.app.test_cli_runner().invoke(args=['results', 'bulk-load', root,
+                                                             '--uploader', 'lecturer1', '--workers', '1'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        lines = result.output.splitlines()
+        self.assertEqual(len(lines), 2, result.output)
+        self.assertTrue(lines[0].startswith("Loaded 20 rows from 2 of 2 files"), lines[0])
+        self.assertEqual(lines[1], "Students: 10 (10 new). Scores: 10 inserted, 0 updated, 10 unchanged")
+
+        db.session.remove()
+        result = Result.query.one()
+        self.assertEqual((result.course.code, result.semester.term), ("COS102", "SECOND"))
+        self.assertEqual(Score.query.count(), 10)
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import time
+import unittest
+
+from app.cache import DiskLRUCache
+
+
+class TestDiskLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = DiskLRUCache(self.tmpdir.name, max_bytes=250)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def age(self, key, seconds):
+        path = os.path.join(self.tmpdir.name, key)
+        past = time.time() - seconds
+        os.utime(path, (past, past))
+
+    def test_round_trip(self):
+        self.cache.set('abc', b'payload')
+        self.assertEqual(self.cache.get('abc'), b'payload')
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_entries_written_in_pieces_appear_on_commit(self):
+        writer = self.cache.writer('streamed')
+        writer.write(b'one\n')
+        writer.write(b'two\n')
+        self.assertIsNone(self.cache.open('streamed'))
+        writer.commit()
+        with self.cache.open('streamed') as f:
+            self.assertEqual(f.readlines(), [b'one\n', b'two\n'])
+
+        abandoned = self.cache.writer('abandoned')
+        abandoned.write(b'partial')
+        abandoned.discard()
+        self.assertIsNone(self.cache.get('abandoned'))
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['streamed'])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set('first', b'x' * 100)
+        self.age('first', 30)
+        self.cache.set('second', b'x' * 100)
+        self.age('second', 20)
+
+        # Reading "first" makes "second" the least recently used entry
+        self.cache.get('first')
+        self.cache.set('third', b'x' * 100)
+
+        self.assertIsNotNone(self.cache.get('first'))
+        self.assertIsNone(self.cache.get('second'))
+        self.assertIsNotNone(self.cache.get('third'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+from datetime import datetime
+
+from sqlalchemy import update
+
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.models import IngestionJob, Result, Score
+from app.utils import IngestionInProgress, patch_result_scores, save_results_to_db
+
+FILE_INFO = {'filename': 'sheet.csv', 'file_hash': 'a' * 64}
+
+
+def failing_after(rows, count):
+    """Yield `count` rows, then fail the way a broken connection or a killed worker would."""
+    for i, row in enumerate(rows):
+        if i == count:
+            raise RuntimeError("connection lost")
+        yield row
+
+
+class TestChunkedIngest(DatabaseTestCase):
+    def save(self, rows, **kwargs):
+        file_info = dict(FILE_INFO, uploader_id=self.lecturer.id)
+        return save_results_to_db(HEADER_INFO, rows, file_info, commit_chunk_size=10, **kwargs)
+
+    def test_each_chunk_is_committed_and_checkpointed(self):
+        progress = []
+        success, _, counts = self.save(make_rows(25), on_progress=progress.append)
+        self.assertTrue(success)
+        self.assertEqual(counts, {"inserted": 25, "updated": 0, "unchanged": 0})
+        self.assertEqual([p["inserted"] for p in progress], [10, 20, 25])
+
+        job = IngestionJob.query.one()
+        self.assertEqual((job.status, job.rows_committed, job.inserted), ('completed', 25, 25))
+        self.assertEqual(Result.query.one().file_hash, FILE_INFO['file_hash'])
+
+    def test_failed_upload_keeps_committed_chunks(self):
+        success, message, _ = self.save(failing_after(make_rows(25), 15))
+        self.assertFalse(success)
+        self.assertEqual(message, "connection lost")
+
+        self.assertEqual(Score.query.count(), 10)
+        job = IngestionJob.query.one()
+        self.assertEqual((job.status, job.rows_committed, job.error), ('failed', 10, "connection lost"))
+        # The file is not recorded as applied, so uploading it again is not skipped as a no-op
+        self.assertIsNone(Result.query.one().file_hash)
+
+    def test_retry_resumes_after_the_checkpoint(self):
+        self.save(failing_after(make_rows(25), 15))
+
+        # Committed rows are skipped, not rewritten: their changed grades never reach the table
+        rows = make_rows(25)
+        for row in rows:
+            row["grade"] = "A"
+        success, _, counts = self.save(rows)
+        self.assertTrue(success)
+        self.assertEqual(counts, {"inserted": 25, "updated": 0, "unchanged": 0})
+        self.assertEqual(Score.query.count(), 25)
+        self.assertEqual(Score.query.filter_by(grade="A").count(), 15)
+
+        job = IngestionJob.query.one()
+        self.assertEqual((job.status, job.rows_committed), ('completed', 25))
+
+    def test_checkpoint_is_discarded_after_other_writes(self):
+        self.save(failing_after(make_rows(25), 15))
+        patch_result_scores(Result.query.one(), [{"registration_number": "2019/240000", "grade": "F"}])
+        db.session.commit()
+
+        # The retry writes the whole file again, so the patched row is restored too
+        success, _, counts = self.save(make_rows(25))
+        self.assertTrue(success)
+        self.assertEqual(counts, {"inserted": 15, "updated": 1, "unchanged": 9})
+        self.assertEqual(Score.query.filter_by(grade="F").count(), 0)
+        self.assertEqual(Result.query.one().file_hash, FILE_INFO['file_hash'])
+
+    def test_running_job_is_not_resumed_by_another_upload(self):
+        self.save(failing_after(make_rows(25), 15))
+        job = IngestionJob.query.one()
+        job.status, job.updated_at = 'running', datetime.utcnow()
+        db.session.commit()
+
+        with self.assertRaises(IngestionInProgress):
+            self.save(make_rows(25))
+        self.assertEqual(Score.query.count(), 10)
+        self.assertEqual(db.session.get(IngestionJob, job.id).status, 'running')
+
+    def test_abandoned_running_job_is_taken_over(self):
+        self.save(failing_after(make_rows(25), 15))
+        # A worker that died mid-upload leaves its job running, with the last checkpoint's time
+        db.session.execute(update(IngestionJob).values(status='running', updated_at=IngestionJob.updated_at))
+        db.session.commit()
+        self.app.config['INGEST_JOB_LEASE_SECONDS'] = 0
+
+        success, _, counts = self.save(make_rows(25))
+        self.assertTrue(success)
+        self.assertEqual(counts, {"inserted": 25, "updated": 0, "unchanged": 0})
+        self.assertEqual(Score.query.count(), 25)
+        self.assertEqual(IngestionJob.query.one().status, 'completed')
+
+    def test_single_transaction_by_default(self):
+        file_info = dict(FILE_INFO, uploader_id=self.lecturer.id)
+        success, _, _ = save_results_to_db(HEADER_INFO, failing_after(make_rows(25), 15), file_info, chunk_size=10)
+        self.assertFalse(success)
+        self.assertEqual((Score.query.count(), IngestionJob.query.count()), (0, 0))
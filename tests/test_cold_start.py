@@ -0,0 +1,32 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys
+from app import create_app
+create_app()
+print(json.dumps([m for m in ('pypdf', 'docx', 'openpyxl', 'fpdf', 'numpy') if m in sys.modules]))
+"""
+
+
+class TestColdStart(unittest.TestCase):
+    """Booting the app must not load the file readers, the PDF writer or NumPy, nor touch the schema."""
+
+    def test_create_app_is_lazy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = os.path.join(tmp, 'boot.db')
+            env = dict(os.environ, FLASK_ENV='development', DEV_DATABASE_URL=f'sqlite:///{database}')
+            output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            self.assertEqual(json.loads(output.strip().splitlines()[-1]), [])
+
+            if os.path.exists(database):
+                with sqlite3.connect(database) as connection:
+                    self.assertEqual(connection.execute("SELECT name FROM sqlite_master").fetchall(), [])
@@ -0,0 +1,58 @@
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from app import db
+from app.utils import user_claims
+
+JOB_URL = '/api/v1/results/upload/missing-job'
+
+
+class TestCurrentUser(DatabaseTestCase):
+    def user_queries(self, fn):
+        db.session.expunge_all()  # Start from an empty identity map, as a fresh request would
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        return response, [s for s in statements if 'FROM users' in s]
+
+    def claims_headers(self, **claims):
+        token = create_access_token(identity=self.lecturer.id,
+                                    additional_claims=dict(user_claims(self.lecturer), **claims))
+        return {'Authorization': f'Bearer {token}'}
+
+    def test_role_check_loads_user_once(self):
+        headers = self.auth_headers()
+        response, queries = self.user_queries(lambda: self.client.get(JOB_URL, headers=headers))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(queries), 1)
+
+    def test_fresh_role_claims_skip_database(self):
+        self.app.config['JWT_ROLE_CLAIMS_TTL'] = 300
+        headers = self.claims_headers()
+        response, queries = self.user_queries(lambda: self.client.get(JOB_URL, headers=headers))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(queries, [])
+
+    def test_claims_ignored_without_ttl(self):
+        # The database role wins when claim caching is off
+        self.lecturer.role = 'student'
+        db.session.commit()
+        headers = self.claims_headers(role='lecturer')
+        self.assertEqual(self.client.get(JOB_URL, headers=headers).status_code, 403)
+
+    def test_login_token_carries_role_claims(self):
+        response = self.client.post('/api/v1/auth/login', json={'username': 'lecturer1', 'password': 'password'})
+        self.app.config['JWT_ROLE_CLAIMS_TTL'] = 300
+        headers = {'Authorization': f"Bearer {response.json['access_token']}"}
+        _, queries = self.user_queries(lambda: self.client.get(JOB_URL, headers=headers))
+        self.assertEqual(queries, [])
+
+    def test_revoked_token_rejected_on_role_routes(self):
+        headers = self.auth_headers()
+        self.assertEqual(self.client.post('/api/v1/auth/logout', headers=headers).status_code, 200)
+        self.assertEqual(self.client.get(JOB_URL, headers=headers).status_code, 401)
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from app.database import engine_options, init_app
+from config import Config, ProductionConfig
+
+SQLITE_SETTINGS = {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_SYNCHRONOUS': 'NORMAL',
+                   'SQLITE_BUSY_TIMEOUT_MS': 15000, 'SQLITE_MMAP_SIZE': 1024 * 1024}
+
+
+class TestDatabaseTuning(unittest.TestCase):
+    def test_pool_options_are_kept_for_server_databases(self):
+        options = engine_options({'SQLALCHEMY_DATABASE_URI': 'postgresql://u:p@db/results',
+                                  'SQLALCHEMY_ENGINE_OPTIONS': ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS})
+        self.assertEqual(options['pool_size'], int(os.getenv('DB_POOL_SIZE', 10)))
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertEqual(options['pool_recycle'], 1800)
+
+    def test_pool_options_are_dropped_for_sqlite(self):
+        options = engine_options({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                                  'SQLALCHEMY_ENGINE_OPTIONS': dict(Config.SQLALCHEMY_ENGINE_OPTIONS, echo=False)})
+        self.assertEqual(options, {'echo': False})
+
+    def test_sqlite_connections_use_wal_and_a_busy_timeout(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = Flask(__name__)
+            app.config.update(SQLITE_SETTINGS, SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(tmp, 'tuned.db')}",
+                              SQLALCHEMY_ENGINE_OPTIONS=Config.SQLALCHEMY_ENGINE_OPTIONS)
+            db = SQLAlchemy()
+            init_app(app, db)
+            with app.app_context():
+                with db.engine.connect() as connection:
+                    pragmas = [connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+                               for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size')]
+                db.engine.dispose()
+            self.assertEqual(pragmas, ['wal', 1, 15000, 1024 * 1024])
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import GeneratorType
+from unittest import mock
+
+from fpdf import FPDF
+
+from app import extraction
+from app.extraction import extract_csv_data, extract_docx_data, extract_pdf_data, extract_xlsx_data, iter_csv_data, iter_xlsx_data
+
+DOCS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extraction-test-docs')
+
+
+class TestStreamingExtraction(unittest.TestCase):
+    def test_csv_iterator_yields_header_then_records(self):
+        records = iter_csv_data(os.path.join(DOCS_DIR, 'example-doc.csv'))
+        self.assertIsInstance(records, GeneratorType)
+
+        header_info = next(records)
+        self.assertEqual(header_info['course_title'], 'COMPUTING PRACTICE')
+        first = next(records)
+        self.assertEqual(first['registration_number'], '2019/241036')
+        self.assertEqual(len(list(records)), 9)
+
+    def test_xlsx_iterator_matches_eager_extraction(self):
+        path = os.path.join(DOCS_DIR, 'example-doc.xlsx')
+        records = iter_xlsx_data(path)
+        streamed_header = next(records)
+        streamed_rows = list(records)
+
+        header_info, results_data = extract_xlsx_data(path)
+        self.assertEqual(streamed_header, header_info)
+        self.assertEqual(streamed_rows, results_data)
+        self.assertEqual(len(results_data), 10)
+
+    def test_all_formats_agree(self):
+        csv_header, csv_rows = extract_csv_data(os.path.join(DOCS_DIR, 'example-doc.csv'))
+        docx_header, docx_rows = extract_docx_data(os.path.join(DOCS_DIR, 'example-doc.docx'))
+        xlsx_header, xlsx_rows = extract_xlsx_data(os.path.join(DOCS_DIR, 'example-doc.xlsx'))
+        self.assertEqual(csv_header['course_code'], 'COS102')
+        self.assertEqual(csv_header['session'], '2019/2020')
+        self.assertEqual(csv_header, docx_header)
+        self.assertEqual(csv_header, xlsx_header)
+        self.assertEqual(csv_rows, docx_rows)
+        self.assertEqual(csv_rows, xlsx_rows)
+
+    def test_eager_csv_extraction_still_returns_lists(self):
+        header_info, results_data = extract_csv_data(os.path.join(DOCS_DIR, 'example-doc.csv'))
+        self.assertIsInstance(results_data, list)
+        self.assertEqual(results_data[-1]['grade'], 'A')
+
+
+def write_multi_page_pdf(path, pages, rows_per_page):
+    pdf = FPDF()
+    pdf.set_font('Arial', size=10)
+    row = 0
+    for page in range(pages):
+        pdf.add_page()
+        if page == 0:
+            pdf.cell(0, 6, 'Department: COMPUTER SCIENCE Semester: SECOND', ln=True)
+            pdf.cell(0, 6, 'Faculty: PHYSICAL SCIENCE Session: 2019/2020', ln=True)
+        pdf.cell(0, 6, 'Names Reg.No Department Lev C.A. Ex. Tot Gr', ln=True)
+        for _ in range(rows_per_page):
+            pdf.cell(0, 6, f'STUDENT NO{row} 2019/{240000 + row} COMPUTER SCIENCE 100 10 50 60 B', ln=True)
+            row += 1
+    pdf.output(path)
+
+
+class TestPdfExtraction(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'sheet.pdf')
+        write_multi_page_pdf(self.path, pages=5, rows_per_page=4)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_every_page_is_extracted_in_order(self):
+        header_info, results_data = extract_pdf_data(self.path, max_workers=3)
+        self.assertEqual(header_info['faculty'], 'PHYSICAL SCIENCE')
+        self.assertEqual([row['registration_number'] for row in results_data],
+                         [f'2019/{240000 + i}' for i in range(20)])
+
+    def test_process_pool_matches_inline_extraction(self):
+        with mock.patch.object(extraction, 'PDF_PARALLEL_MIN_PAGES', 2):
+            pooled = extract_pdf_data(self.path, max_workers=4)
+        self.assertEqual(pooled, extract_pdf_data(self.path, max_workers=1))
+
+    def test_short_pdfs_stay_in_process(self):
+        with mock.patch.object(extraction, '_get_pdf_pool', side_effect=AssertionError("pool used")):
+            self.assertEqual(len(extract_pdf_data(self.path, max_workers=4)[1]), 20)
+
+    def test_failed_page_batch_fails_the_extraction(self):
+        read_pages = extraction._extract_pdf_page_rows
+
+        def flaky(filepath, page_numbers, reg_pattern):
+            if 3 in page_numbers:
+                raise ValueError("unreadable page")
+            return read_pages(filepath, page_numbers, reg_pattern)
+
+        # A thread pool runs the patched batch reader; worker errors surface the same way
+        with ThreadPoolExecutor(2) as pool, \
+                mock.patch.object(extraction, 'PDF_PARALLEL_MIN_PAGES', 2), \
+                mock.patch.object(extraction, '_get_pdf_pool', return_value=pool), \
+                mock.patch.object(extraction, '_extract_pdf_page_rows', side_effect=flaky):
+            with self.assertRaisesRegex(ValueError, "unreadable page"):
+                extract_pdf_data(self.path, max_workers=2)
+
+        with mock.patch.object(extraction, '_extract_pdf_page_rows', side_effect=flaky):
+            with self.assertRaisesRegex(ValueError, "unreadable page"):
+                extract_pdf_data(self.path, max_workers=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import text
+
+from .base import DatabaseTestCase
+from app import db
+from app.search import drop_search_index, include_object
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+INITIAL_SCHEMA = '3f1c2a9d0b7e'
+HOT_PATH_INDEXES = '8b4e6d21c5a3'
+
+
+class TestMigrations(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.session.remove()
+        db.drop_all()
+        with db.engine.begin() as connection:
+            for table in ('courses', 'students'):
+                drop_search_index(connection, table)
+
+    def tearDown(self):
+        db.session.remove()
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        super().tearDown()
+
+    def execute(self, sql):
+        with db.engine.begin() as connection:
+            result = connection.execute(text(sql))
+            return result.all() if result.returns_rows else None
+
+    def test_upgraded_schema_matches_the_models(self):
+        upgrade(directory=MIGRATIONS)
+        with db.engine.connect() as connection:
+            context = MigrationContext.configure(connection, opts={'include_object': include_object})
+            self.assertEqual(compare_metadata(context, db.metadata), [])
+
+        downgrade(directory=MIGRATIONS, revision='base')
+        self.assertEqual(self.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'alembic_version'"), [])
+
+    def test_duplicates_are_merged_before_constraints(self):
+        upgrade(directory=MIGRATIONS, revision=INITIAL_SCHEMA)
+        self.execute("INSERT INTO users (id, username, email, password, role, department) "
+                     "VALUES (1, 'u', 'u@example.com', 'x', 'hod', 'CS')")
+        self.execute("INSERT INTO courses (id, code, title, unit, department, faculty, level) "
+                     "VALUES (1, 'COS101', 'Intro', 2, 'CS', 'SCI', '100')")
+        self.execute("INSERT INTO semesters (id, name) VALUES (1, '2019/2020 FIRST')")
+        self.execute("INSERT INTO students (id, registration_number, name, department) VALUES (1, '2019/1', 'A', 'CS')")
+        self.execute("INSERT INTO results (id, course_id, semester_id, uploader_lecturer_id) VALUES (1, 1, 1, 1), (2, 1, 1, 1)")
+        self.execute("INSERT INTO scores (id, result_id, student_id, continuous_assessment, exam_score, total_score, grade) "
+                     "VALUES (1, 1, 1, 10, 40, 50, 'C'), (2, 2, 1, 20, 50, 70, 'A')")
+
+        upgrade(directory=MIGRATIONS)
+        self.assertEqual(self.execute("SELECT id FROM results"), [(1,)])
+        self.assertEqual(self.execute("SELECT id, result_id, grade FROM scores"), [(2, 1, 'A')])
+
+    def test_semester_names_are_split_into_session_and_term(self):
+        upgrade(directory=MIGRATIONS, revision=HOT_PATH_INDEXES)
+        self.execute("INSERT INTO semesters (id, name) VALUES (1, '2019/2020 First'), (2, '2020/2021 SECOND')")
+
+        upgrade(directory=MIGRATIONS)
+        self.assertEqual(self.execute("SELECT name, session, term FROM semesters ORDER BY id"),
+                         [('2019/2020 First', '2019/2020', 'FIRST'), ('2020/2021 SECOND', '2020/2021', 'SECOND')])
+
+    def test_existing_rows_are_indexed_for_search(self):
+        upgrade(directory=MIGRATIONS, revision='c72d5e0f9a14')
+        self.execute("INSERT INTO courses (id, code, title, unit, department, faculty, level) "
+                     "VALUES (1, 'COS101', 'Introduction to Computing', 2, 'CS', 'SCI', '100')")
+
+        upgrade(directory=MIGRATIONS)
+        self.assertEqual(self.execute("SELECT rowid FROM course_search WHERE course_search MATCH 'comput'"), [(1,)])
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.models import ActionLog
+from app.utils import save_results_to_db
+
+LOGS_URL = '/api/v1/security/action-logs'
+
+
+class TestCursorPagination(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'hod'
+        db.session.commit()
+        self.headers = self.auth_headers()
+        # Pairs of entries share a timestamp, so the id must break ties
+        for i in range(10):
+            db.session.add(ActionLog(action=f"action_{i}", timestamp=datetime(2024, 1, 1, 12, i // 2)))
+        db.session.commit()
+
+    def get(self, url, **params):
+        return self.client.get(url, headers=self.headers, query_string=params)
+
+    def walk(self, **params):
+        pages, cursor = [], None
+        while True:
+            response = self.get(LOGS_URL, per_page=3, pagination='cursor', **dict(params, cursor=cursor or ''))
+            pages.append(response.json)
+            cursor = response.json["next_cursor"]
+            if not cursor:
+                return pages
+
+    def test_per_page_is_clamped(self):
+        self.app.config['PAGINATION_MAX_PER_PAGE'] = 4
+        for mode in ({}, {'pagination': 'cursor'}):
+            for per_page, expected in ((-1, 1), (0, 1), (1000000, 4)):
+                response = self.get(LOGS_URL, per_page=per_page, **mode)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json["per_page"], expected)
+                self.assertEqual(len(response.json["action_logs"]), expected)
+
+    def test_cursor_pages_cover_every_log_once_in_order(self):
+        pages = self.walk()
+        actions = [log["action"] for page in pages for log in page["action_logs"]]
+        self.assertEqual(len(pages), 4)
+        self.assertEqual(actions, [f"action_{i}" for i in reversed(range(10))])
+        self.assertIsNone(pages[0]["prev_cursor"])
+        self.assertIsNone(pages[0]["total_results"])
+
+    def test_prev_cursor_returns_the_previous_page(self):
+        pages = self.walk()
+        response = self.get(LOGS_URL, per_page=3, cursor=pages[2]["prev_cursor"])
+        self.assertEqual(response.json["action_logs"], pages[1]["action_logs"])
+        response = self.get(LOGS_URL, per_page=3, cursor=response.json["prev_cursor"])
+        self.assertEqual(response.json["action_logs"], pages[0]["action_logs"])
+        self.assertIsNone(response.json["prev_cursor"])
+
+    def test_deep_pages_use_neither_offset_nor_count(self):
+        pages = self.walk()
+        statements = []
+        listener = lambda *args: statements.append((args[2], args[3]))
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            self.get(LOGS_URL, per_page=3, cursor=pages[2]["next_cursor"])
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertFalse([sql for sql, _ in statements if "count(" in sql.lower()])
+        # SQLite always renders "LIMIT ? OFFSET ?"; the offset must stay 0
+        (page_sql, page_params), = [(sql, params) for sql, params in statements if "FROM action_logs" in sql]
+        self.assertEqual(tuple(page_params[-2:]), (4, 0))
+
+    def test_total_is_optional_and_cached(self):
+        response = self.get(LOGS_URL, pagination='cursor', include_total='true')
+        self.assertEqual(response.json["total_results"], 10)
+
+        db.session.add(ActionLog(action="late", timestamp=datetime(2024, 1, 2)))
+        db.session.commit()
+        response = self.get(LOGS_URL, pagination='cursor', include_total='true')
+        self.assertEqual(response.json["total_results"], 10)
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.get(LOGS_URL, cursor='not-a-cursor').status_code, 400)
+        self.assertEqual(self.get('/api/v1/results/list', cursor='not-a-cursor').status_code, 400)
+
+    def test_offset_mode_is_unchanged(self):
+        response = self.get(LOGS_URL, page=2, per_page=3)
+        self.assertEqual(response.json["total_results"], 10)
+        self.assertEqual(response.json["current_page"], 2)
+        self.assertNotIn("next_cursor", response.json)
+
+    def test_results_list_cursor_mode(self):
+        file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        for code in ("COS101", "COS102", "COS103"):
+            save_results_to_db(dict(HEADER_INFO, course_code=code), make_rows(2), file_info)
+
+        first = self.get('/api/v1/results/list', per_page=2, pagination='cursor').json
+        second = self.get('/api/v1/results/list', per_page=2, cursor=first["next_cursor"]).json
+        codes = [row["course_code"] for row in first["results"] + second["results"]]
+        self.assertEqual(codes, ["COS101", "COS102", "COS103"])
+        self.assertIsNone(second["next_cursor"])
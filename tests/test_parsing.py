@@ -0,0 +1,80 @@
+import unittest
+
+from app.parsing import (RegistrationPatterns, empty_header_info, iter_table_records, parse_header_cells,
+                         parse_lines)
+
+
+class TestHeaderParsing(unittest.TestCase):
+    def test_line_with_several_labels(self):
+        header_info = empty_header_info()
+        parse_lines(["Title of Course: COMPUTING PRACTICE Course Code: COS102",
+                     "Examination Date: 2021 Course Unit: 2"], header_info)
+        self.assertEqual(header_info["course_title"], "COMPUTING PRACTICE")
+        self.assertEqual(header_info["course_code"], "COS102")
+        self.assertEqual(header_info["course_unit"], 2)
+
+    def test_cells_with_merged_values(self):
+        header_info = empty_header_info()
+        parse_header_cells(["Department:", "COMPUTER SCIENCE", "COMPUTER SCIENCE", "Semester:", "SECOND"], header_info)
+        parse_header_cells(["Faculty:", "PHYSICAL SCIENCE", None, None, "Session:", "2019/2020"], header_info)
+        self.assertEqual(header_info["department"], "COMPUTER SCIENCE")
+        self.assertEqual(header_info["semester"], "SECOND")
+        self.assertEqual(header_info["faculty"], "PHYSICAL SCIENCE")
+        self.assertEqual(header_info["session"], "2019/2020")
+
+
+class TestRowParsing(unittest.TestCase):
+    def test_pdf_line(self):
+        [record] = parse_lines(["AGAGWU CHIBI OBINNA 2019/245012 COMPUTER SCIENCE 100 14 66 80 B"])
+        self.assertEqual(record["name"], "AGAGWU CHIBI OBINNA")
+        self.assertEqual(record["department"], "COMPUTER SCIENCE")
+        self.assertEqual(record["level"], "100")
+        self.assertEqual((record["continuous_assessment"], record["exam_score"], record["total_score"]), (14, 66, 80))
+
+    def test_header_lines_are_not_students(self):
+        self.assertEqual(parse_lines(["Faculty: PHYSICAL SCIENCE Session: 2019/2020"]), [])
+
+    def test_table_stream(self):
+        rows = [
+            ("Course Unit:", 3.0),
+            ("Names", "Reg.No", "Department", "Lev", "C.A.", "Ex.", "Tot", "Gr"),
+            ("ALI CHIDI", "2019/244754", "COMPUTER SCIENCE", 100.0, 11.0, 34.0, 45.0, "D"),
+            ("not a student row",),
+        ]
+        records = iter_table_records(rows)
+        self.assertEqual(next(records)["course_unit"], 3)
+        self.assertEqual([r["level"] for r in records], ["100"])
+
+
+
+SHEET = [
+    ("Faculty:", "ENGINEERING", None, None, None, None, "Session:", "2021/2022"),
+    ("Names", "Reg.No", "Department", "Lev", "C.A.", "Ex.", "Tot", "Gr"),
+    ("ADA OBI", "2019/241036", "CIVIL", 300.0, 10.0, 62.0, 72.0, "A"),
+    ("EZE OKAFOR", "2021/300001", "CIVIL", 100.0, 11.0, 34.0, 45.0, "D"),
+]
+
+
+class TestRegistrationPatterns(unittest.TestCase):
+    def test_default_accepts_every_intake_year(self):
+        records = list(iter_table_records(SHEET))[1:]
+        self.assertEqual([r["registration_number"] for r in records], ["2019/241036", "2021/300001"])
+
+    def test_faculty_specific_patterns(self):
+        patterns = RegistrationPatterns({"engineering": [r"2021/\d{6}"]})
+        records = list(iter_table_records(SHEET, patterns))[1:]
+        self.assertEqual([r["registration_number"] for r in records], ["2021/300001"])
+
+        # Other faculties keep using the default set
+        self.assertTrue(patterns.for_faculty("SCIENCE").fullmatch("2019/241036"))
+
+    def test_column_found_without_column_header(self):
+        patterns = RegistrationPatterns()
+        rows = [("Names",), ("ADA OBI", "CIVIL", "2019/241036", "CIVIL", 300, 10, 62, 72, "A")]
+        [record] = list(iter_table_records(rows, patterns))[1:]
+        self.assertEqual(record["registration_number"], "2019/241036")
+        self.assertEqual(record["grade"], "A")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import re
+
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.utils import save_results_to_db
+
+SCAN = re.compile(r"^SCAN (\w+)\b(?! VIRTUAL TABLE INDEX)")  # FTS lookups show as virtual-table scans
+
+
+class TestQueryPlans(DatabaseTestCase):
+    """The hot paths must reach scores, students and semesters through indexes, never a full scan."""
+
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'hod'
+        db.session.commit()
+        self.headers = self.auth_headers()
+        self.file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        for code in ("COS101", "COS102"):
+            save_results_to_db(dict(HEADER_INFO, course_code=code), make_rows(20), self.file_info)
+        self.client.get('/api/v1/results/list', headers=self.headers)  # Warm up the revocation filter
+
+    def scanned_tables(self, action):
+        """Run `action` and return the tables any of its SELECTs would read in full."""
+        statements = []
+        listener = lambda *args: statements.append((args[2], args[3]))
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            action()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+
+        scanned = set()
+        connection = db.session.connection()
+        for sql, params in statements:
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params):
+                match = SCAN.match(row[-1])
+                if match:
+                    scanned.add(re.sub(r"_\d+$", "", match.group(1)))
+        self.assertTrue(statements)
+        return scanned
+
+    def get(self, url, **params):
+        return lambda: self.client.get(url, headers=self.headers, query_string=params)
+
+    def test_by_registration_uses_index_lookups(self):
+        scanned = self.scanned_tables(self.get('/api/v1/results/by-registration', registration_number="2019/240003"))
+        self.assertEqual(scanned, set())
+
+    def test_list_only_walks_the_paged_results(self):
+        self.assertEqual(self.scanned_tables(self.get('/api/v1/results/list')), {"results"})
+
+    def test_search_reaches_results_through_the_index(self):
+        scanned = self.scanned_tables(self.get('/api/v1/results/search', course_code="COS101",
+                                               registration_number="2019/240003"))
+        self.assertEqual(scanned, set())
+
+    def test_upload_upsert_uses_index_lookups(self):
+        scanned = self.scanned_tables(
+            lambda: save_results_to_db(dict(HEADER_INFO, course_code="COS101"), make_rows(25, 60), self.file_info))
+        self.assertEqual(scanned, set())
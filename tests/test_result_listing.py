@@ -0,0 +1,82 @@
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.utils import save_results_to_db
+
+
+class TestResultListing(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'hod'
+        db.session.commit()
+
+    def save(self, rows, **header_overrides):
+        file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        save_results_to_db(dict(HEADER_INFO, **header_overrides), rows, file_info)
+
+    def get(self, url):
+        headers = self.auth_headers()
+        db.session.expunge_all()
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.get(url, headers=headers)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        return response, statements
+
+    def test_list_counts_scores_without_loading_them(self):
+        self.save(make_rows(40), course_code="COS101")
+        self.save(make_rows(5), course_code="COS102")
+
+        response, statements = self.get('/api/v1/results/list')
+        self.assertEqual(response.status_code, 200)
+        counts = {row["course_code"]: row["num_scores"] for row in response.json["results"]}
+        self.assertEqual(counts, {"COS101": 40, "COS102": 5})
+        self.assertFalse([s for s in statements if s.lstrip().startswith("SELECT scores.")])
+
+    def test_list_statement_count_does_not_grow_with_results(self):
+        self.save(make_rows(3), course_code="COS101")
+        self.get('/api/v1/results/list')  # Loads the token revocation filter
+        _, few = self.get('/api/v1/results/list')
+
+        for code in ("COS102", "COS103", "COS104"):
+            self.save(make_rows(10), course_code=code)
+        response, many = self.get('/api/v1/results/list')
+        self.assertEqual(len(response.json["results"]), 4)
+        self.assertEqual(len(few), len(many))
+
+    def test_list_filters_can_be_combined(self):
+        self.save(make_rows(3), course_code="COS101")
+        self.save(make_rows(3), course_code="MTH101")
+
+        response, _ = self.get('/api/v1/results/list?department=computer&course_code=COS')
+        self.assertEqual([row["course_code"] for row in response.json["results"]], ["COS101"])
+
+    def test_search_returns_each_result_once(self):
+        self.save(make_rows(25), course_code="COS101")
+        self.save(make_rows(2), course_code="COS102")
+
+        response, _ = self.get('/api/v1/results/search?course_code=COS')
+        self.assertEqual(response.json["total_results"], 2)
+        counts = {row["course_code"]: row["num_scores"] for row in response.json["search_results"]}
+        self.assertEqual(counts, {"COS101": 25, "COS102": 2})
+
+        response, _ = self.get('/api/v1/results/search?registration_number=2019/240020')
+        self.assertEqual([row["course_code"] for row in response.json["search_results"]], ["COS101"])
+
+    def test_session_and_semester_filters_match_exactly(self):
+        self.save(make_rows(2), course_code="COS101", semester="First")
+        self.save(make_rows(2), course_code="COS102", session="2020/2021", semester="FIRST")
+        self.save(make_rows(2), course_code="COS103", semester="SECOND")
+
+        response, _ = self.get('/api/v1/results/list?session=2019/2020&semester=first')
+        self.assertEqual([(row["course_code"], row["session"], row["semester"]) for row in response.json["results"]],
+                         [("COS101", "2019/2020", "FIRST")])
+        response, _ = self.get('/api/v1/results/list?session=2019')
+        self.assertEqual(response.json["results"], [])
+        response, _ = self.get('/api/v1/results/search?session=2020/2021&semester_name=FIRST')
+        self.assertEqual([row["course_code"] for row in response.json["search_results"]], ["COS102"])
@@ -0,0 +1,71 @@
+import unittest
+
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from app import db
+from app.models import TokenBlacklist
+from app.revocation import BloomFilter, revocation_cache
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_members_are_always_found(self):
+        bloom = BloomFilter(capacity=1000)
+        jtis = [f"jti-{i}" for i in range(1000)]
+        for jti in jtis:
+            bloom.add(jti)
+        self.assertTrue(all(jti in bloom for jti in jtis))
+        false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class TestRevocationCache(DatabaseTestCase):
+    def blacklist_queries(self, fn):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        return response, [s for s in statements if 'token_blacklist' in s]
+
+    def test_authenticated_requests_skip_blacklist_query(self):
+        headers = self.auth_headers()
+        self.client.get('/api/v1/auth/protected', headers=headers)  # First request loads the filter
+
+        response, queries = self.blacklist_queries(
+            lambda: self.client.get('/api/v1/auth/protected', headers=headers))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_logged_out_token_is_rejected(self):
+        headers = self.auth_headers()
+        self.assertEqual(self.client.post('/api/v1/auth/logout', headers=headers).status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/auth/protected', headers=headers).status_code, 401)
+
+    def test_revocations_from_other_workers_are_picked_up(self):
+        self.assertFalse(revocation_cache.is_revoked('revoked-elsewhere'))
+
+        # Simulate another worker writing the blacklist row directly
+        db.session.add(TokenBlacklist(jti='revoked-elsewhere', token_type='access'))
+        db.session.commit()
+        revocation_cache._refresh(force=True)
+        self.assertTrue(revocation_cache.is_revoked('revoked-elsewhere'))
+
+    def test_refreshes_only_count_new_revocations(self):
+        db.session.add_all([TokenBlacklist(jti=f'revoked-{i}', token_type='access') for i in range(3)])
+        db.session.commit()
+        revocation_cache._refresh(force=True)
+        count = revocation_cache._bloom.count
+
+        # The overlap window re-reads the same rows on every refresh
+        for _ in range(5):
+            revocation_cache._refresh(force=True)
+        self.assertEqual(revocation_cache._bloom.count, count)
+
+        revocation_cache.revoke('revoked-locally')
+        db.session.add(TokenBlacklist(jti='revoked-locally', token_type='access'))
+        db.session.commit()
+        revocation_cache._refresh(force=True)
+        self.assertEqual(revocation_cache._bloom.count, count + 1)
@@ -0,0 +1,102 @@
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.models import Result, Score, Student
+from app.utils import save_results_to_db
+
+
+class TestScorePatch(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'hod'
+        db.session.commit()
+        self.headers = self.auth_headers()
+        save_results_to_db(HEADER_INFO, make_rows(3), {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id})
+        self.result_id = Result.query.one().id
+
+    def patch(self, payload):
+        return self.client.patch(f'/api/v1/results/{self.result_id}/update-scores', headers=self.headers, json=payload)
+
+    def score(self, registration_number):
+        return Score.query.join(Score.student).filter(Student.registration_number == registration_number).one()
+
+    def test_reports_each_row_outcome(self):
+        response = self.patch([
+            {"registration_number": "2019/240000", "exam_score": 60, "grade": "A"},
+            {"registration_number": "2019/240001", "grade": "B"},
+            {"registration_number": "2019/249999", "student_name": "NEW STUDENT",
+             "ca_score": 10, "exam_score": 30, "grade": "D"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json["inserted"], response.json["updated"], response.json["unchanged"]), (1, 1, 1))
+        self.assertEqual([row["status"] for row in response.json["rows"]], ["updated", "unchanged", "inserted"])
+
+        self.assertEqual((self.score("2019/240000").total_score, self.score("2019/240000").grade), (80.0, "A"))
+        self.assertEqual(self.score("2019/249999").total_score, 40.0)
+        self.assertEqual(Student.query.filter_by(registration_number="2019/249999").one().department,
+                         "COMPUTER SCIENCE")
+
+    def test_repeated_rows_apply_in_order(self):
+        response = self.patch([
+            {"registration_number": "2019/240000", "ca_score": 30},
+            {"registration_number": "2019/240000", "exam_score": 40, "grade": "B"},
+        ])
+        self.assertEqual([row["status"] for row in response.json["rows"]], ["updated", "updated"])
+        self.assertEqual(self.score("2019/240000").total_score, 70.0)
+
+    def test_invalid_row_rejects_the_whole_patch(self):
+        response = self.patch([
+            {"registration_number": "2019/240000", "grade": "A"},
+            {"registration_number": "2019/249999", "ca_score": 10, "exam_score": 30, "grade": "D"},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Student name is required", response.json["error"])
+        self.assertEqual(self.score("2019/240000").grade, "B")
+
+        response = self.patch([{"registration_number": "2019/249999", "student_name": "NEW", "grade": "D"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(Student.query.filter_by(registration_number="2019/249999").first())
+
+    def test_non_numeric_scores_reject_the_whole_patch(self):
+        for bad in ("abc", None, [1], True, "nan"):
+            response = self.patch([
+                {"registration_number": "2019/240000", "exam_score": 60},
+                {"registration_number": "2019/240001", "ca_score": bad},
+            ])
+            self.assertEqual(response.status_code, 400, bad)
+            self.assertIn("ca_score must be a number", response.json["error"])
+        self.assertEqual(self.score("2019/240000").exam_score, 50.0)
+
+        response = self.patch([{"registration_number": "2019/240000", "grade": 5}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_numeric_strings_are_coerced(self):
+        response = self.patch([{"registration_number": "2019/240000", "ca_score": "25", "exam_score": "55.5"}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.score("2019/240000").total_score, 80.5)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        save_results_to_db(dict(HEADER_INFO, course_code="COS201"), make_rows(200),
+                           {'filename': 'big.csv', 'uploader_id': self.lecturer.id})
+        result_id = Result.query.join(Result.course).filter_by(code="COS201").one().id
+
+        def count_statements(rows):
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                payload = [{"registration_number": f"2019/{240000 + i}", "exam_score": 60 + rows, "grade": "A"}
+                           for i in range(rows)]
+                payload.append({"registration_number": f"2019/{250000 + rows}", "student_name": "NEW",
+                                "ca_score": 1, "exam_score": 1, "grade": "F"})
+                response = self.client.patch(f'/api/v1/results/{result_id}/update-scores',
+                                             headers=self.headers, json=payload)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", listener)
+            self.assertEqual(response.json["updated"], rows)
+            return len(statements)
+
+        count_statements(5)  # Warm up the revocation filter
+        self.assertEqual(count_statements(10), count_statements(200))
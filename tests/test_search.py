@@ -0,0 +1,66 @@
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.models import Course, Student
+from app.utils import save_results_to_db
+
+SEARCH_URL = '/api/v1/results/search'
+
+
+class TestSearchIndex(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'hod'
+        db.session.commit()
+        self.headers = self.auth_headers()
+
+        file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        save_results_to_db(dict(HEADER_INFO, course_code="COS101", course_title="INTRODUCTION TO COMPUTING"),
+                           make_rows(3), file_info)
+        save_results_to_db(dict(HEADER_INFO, course_code="MTH101", course_title="ELEMENTARY MATHEMATICS",
+                                department="MATHEMATICS"), make_rows(2), file_info)
+        save_results_to_db(dict(HEADER_INFO, course_code="COS201", course_title="COMPUTER PROGRAMMING"),
+                           make_rows(1), file_info)
+
+    def search(self, **params):
+        response = self.client.get(SEARCH_URL, headers=self.headers, query_string=params)
+        self.assertEqual(response.status_code, 200)
+        return [row["course_code"] for row in response.json["search_results"]]
+
+    def test_substring_filters_match_like_ilike(self):
+        self.assertEqual(self.search(course_code="cos"), ["COS101", "COS201"])
+        self.assertEqual(self.search(course_code="101"), ["COS101", "MTH101"])
+        self.assertEqual(self.search(department="mathem"), ["MTH101"])
+        self.assertEqual(self.search(course_code="M"), ["MTH101"])  # Too short for trigrams
+
+    def test_free_text_ranks_closest_match_first(self):
+        self.assertEqual(self.search(q="COS101")[0], "COS101")
+        self.assertEqual(self.search(q="computing")[0], "COS101")
+        self.assertEqual(self.search(q="mathematics"), ["MTH101"])
+
+    def test_free_text_tolerates_typos(self):
+        self.assertEqual(self.search(q="mathamatics")[0], "MTH101")
+        self.assertEqual(self.search(q="progamming")[0], "COS201")
+
+    def test_free_text_matches_students(self):
+        # Student 2 sat COS101 and MTH101; only student 0, a near match, sat COS201
+        self.assertEqual(self.search(q="2019/240002"), ["COS101", "MTH101", "COS201"])
+        self.assertEqual(sorted(self.search(q="STUDENT 0")), ["COS101", "COS201", "MTH101"])
+
+    def test_index_follows_writes(self):
+        course = Course.query.filter_by(code="MTH101").one()
+        course.title = "LINEAR ALGEBRA"
+        Student.query.filter_by(registration_number="2019/240001").one().name = "ADA LOVELACE"
+        db.session.commit()
+        self.assertEqual(self.search(q="algebra"), ["MTH101"])
+        self.assertEqual(self.search(q="mathematics"), [])
+        self.assertEqual(self.search(q="lovelace"), ["COS101", "MTH101"])
+
+    def test_cursor_pages_follow_relevance(self):
+        first = self.client.get(SEARCH_URL, headers=self.headers,
+                                query_string={'q': 'computing', 'per_page': 1, 'pagination': 'cursor'}).json
+        second = self.client.get(SEARCH_URL, headers=self.headers,
+                                 query_string={'q': 'computing', 'per_page': 1, 'cursor': first["next_cursor"]}).json
+        self.assertEqual(first["search_results"][0]["course_code"], "COS101")
+        self.assertEqual(second["search_results"][0]["course_code"], "COS201")
+        self.assertIsNone(second["next_cursor"])
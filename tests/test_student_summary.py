@@ -0,0 +1,92 @@
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.models import Result, StudentSemesterSummary
+from app.utils import save_results_to_db
+
+REG_NO = "2019/240000"
+BY_REGISTRATION_URL = '/api/v1/results/by-registration'
+
+
+class TestStudentSemesterSummary(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'hod'
+        db.session.commit()
+        self.headers = self.auth_headers()
+
+        file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        first = make_rows(3)
+        second = make_rows(3)
+        for row in second:
+            row.update(grade="A", exam_score=60.0, total_score=80.0)
+        save_results_to_db(dict(HEADER_INFO, course_code="COS101", course_unit=2, semester="FIRST"), first, file_info)
+        save_results_to_db(dict(HEADER_INFO, course_code="COS102", course_unit=3, semester="SECOND"), second, file_info)
+
+    def summaries(self):
+        return {summary.semester.name: summary for summary in StudentSemesterSummary.query.join(
+            StudentSemesterSummary.student).filter_by(registration_number=REG_NO)}
+
+    def test_upload_maintains_gpa_and_running_cgpa(self):
+        summaries = self.summaries()
+        first, second = summaries["2019/2020 FIRST"], summaries["2019/2020 SECOND"]
+        self.assertEqual((first.total_credit_earned, first.total_grade_point, first.gpa), (2, 8, 4.0))
+        self.assertEqual((second.total_credit_earned, second.total_grade_point, second.gpa), (3, 15, 5.0))
+        self.assertEqual(first.cgpa, 4.0)
+        self.assertAlmostEqual(second.cgpa, 23 / 5)
+
+    def test_by_registration_reads_summaries(self):
+        response = self.client.get(BY_REGISTRATION_URL, headers=self.headers,
+                                   query_string={'registration_number': REG_NO})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["total_credit_earned"], 5)
+        self.assertEqual(response.json["total_grade_point"], 23)
+        self.assertEqual(response.json["cgpa"], 4.6)
+        semesters = response.json["results"][0]["results_by_semester"]
+        self.assertEqual([course["course_code"] for course in semesters["SECOND"]["courses"]], ["COS102"])
+
+    def test_summary_only_request_skips_score_rows(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.get(BY_REGISTRATION_URL, headers=self.headers,
+                                       query_string={'registration_number': REG_NO, 'detail': 'false'})
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertEqual(response.json["cgpa"], 4.6)
+        self.assertNotIn("courses", response.json["results"][0]["results_by_semester"]["FIRST"])
+        self.assertFalse([s for s in statements if "FROM scores" in s])
+
+    def test_update_scores_refreshes_summary(self):
+        result = Result.query.join(Result.course).filter_by(code="COS101").one()
+        response = self.client.patch(f'/api/v1/results/{result.id}/update-scores', headers=self.headers,
+                                     json=[{"registration_number": REG_NO, "grade": "A"}])
+        self.assertEqual(response.status_code, 200)
+        summaries = self.summaries()
+        self.assertEqual(summaries["2019/2020 FIRST"].gpa, 5.0)
+        self.assertEqual(summaries["2019/2020 SECOND"].cgpa, 5.0)
+
+    def test_delete_result_removes_its_semester(self):
+        result = Result.query.join(Result.course).filter_by(code="COS101").one()
+        response = self.client.delete(f'/api/v1/results/delete/{result.id}', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        summaries = self.summaries()
+        self.assertEqual(list(summaries), ["2019/2020 SECOND"])
+        self.assertEqual(summaries["2019/2020 SECOND"].cgpa, 5.0)
+
+    def test_missing_summaries_are_backfilled_on_read(self):
+        StudentSemesterSummary.query.delete()
+        db.session.commit()
+        response = self.client.get(BY_REGISTRATION_URL, headers=self.headers,
+                                   query_string={'registration_number': REG_NO})
+        self.assertEqual(response.json["cgpa"], 4.6)
+        self.assertEqual(len(self.summaries()), 2)
+
+    def test_transcript_uses_summaries(self):
+        response = self.client.get(f'{BY_REGISTRATION_URL}/download', headers=self.headers,
+                                   query_string={'registration_number': REG_NO})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
@@ -0,0 +1,90 @@
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from app import db
+from app.models import Course, Score, Student, StudentSemesterSummary
+from app.utils import IN_CLAUSE_CHUNK_SIZE
+
+SUBMIT_URL = '/api/v1/results/submit'
+
+
+def make_payload(count, grade="B", exam_score=50, **overrides):
+    payload = {
+        "course_code": "COS101",
+        "course_title": "INTRODUCTION TO COMPUTING",
+        "course_unit": 2,
+        "level": "100",
+        "faculty": "PHYSICAL SCIENCE",
+        "department": "COMPUTER SCIENCE",
+        "semester_name": "FIRST",
+        "session": "2019/2020",
+        "lecturers": ["lecturer1"],
+        "results": [{
+            "student_name": f"STUDENT {i}",
+            "registration_number": f"2019/{240000 + i}",
+            "ca_score": 20,
+            "exam_score": exam_score,
+            "total_score": 20 + exam_score,
+            "grade": grade
+        } for i in range(count)]
+    }
+    payload.update(overrides)
+    return payload
+
+
+class TestSubmitBatch(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.headers = self.auth_headers()
+
+    def submit(self, payload):
+        return self.client.post(SUBMIT_URL, headers=self.headers, json=payload)
+
+    def test_resubmission_replaces_scores(self):
+        self.assertEqual(self.submit(make_payload(5)).status_code, 200)
+        response = self.submit(make_payload(6, grade="A", exam_score=60))
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(Score.query.count(), 6)
+        self.assertEqual({score.grade for score in Score.query}, {"A"})
+        self.assertEqual({score.total_score for score in Score.query}, {80.0})
+        self.assertEqual({summary.gpa for summary in StudentSemesterSummary.query}, {5.0})
+
+    def test_existing_students_need_no_name(self):
+        self.submit(make_payload(2))
+        payload = make_payload(2, grade="C")
+        for row in payload["results"]:
+            del row["student_name"]
+        self.assertEqual(self.submit(payload).status_code, 200)
+        self.assertEqual(Student.query.count(), 2)
+
+    def test_invalid_row_writes_nothing(self):
+        payload = make_payload(3)
+        del payload["results"][2]["student_name"]
+        response = self.submit(payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("2019/240002", response.json["error"])
+
+        payload = make_payload(3)
+        del payload["results"][1]["grade"]
+        self.assertEqual(self.submit(payload).status_code, 400)
+        self.assertEqual((Course.query.count(), Student.query.count(), Score.query.count()), (0, 0, 0))
+
+    def test_statement_count_does_not_grow_with_rows(self):
+        def count_statements(rows):
+            statements = []
+            listener = lambda *args: statements.append(args[2])
+            event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                response = self.submit(make_payload(rows, course_code=f"COS{rows}"))
+            finally:
+                event.remove(db.engine, "before_cursor_execute", listener)
+            self.assertEqual(response.status_code, 200)
+            return len(statements)
+
+        count_statements(1)  # Warm up the revocation filter
+        baseline = count_statements(10)
+        self.assertEqual(count_statements(IN_CLAUSE_CHUNK_SIZE), baseline)
+        # Beyond that, only the chunked IN lookups repeat: a few statements per 500 students
+        self.assertLessEqual(count_statements(4 * IN_CLAUSE_CHUNK_SIZE), baseline + 4 * 3)
+        self.assertEqual(Score.query.count(), 1 + 10 + 5 * IN_CLAUSE_CHUNK_SIZE)
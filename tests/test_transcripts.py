@@ -0,0 +1,145 @@
+import io
+import zipfile
+
+from sqlalchemy import event
+
+from .base import DatabaseTestCase
+from .test_bulk_ingest import HEADER_INFO, make_rows
+from app import db
+from app.models import Score, Student
+from app.transcripts import department_students, stream_department_transcripts, transcript_etag, transcript_version
+from app.utils import get_student_results, get_students_results, save_results_to_db
+
+BULK_URL = '/api/v1/results/transcripts/bulk'
+
+
+class TestBulkTranscripts(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'exam_officer'
+        db.session.commit()
+        self.headers = self.auth_headers()
+
+        file_info = {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id}
+        save_results_to_db(dict(HEADER_INFO, course_code="COS101", semester="FIRST"), make_rows(5), file_info)
+        # Only the first three students have results in the next session
+        save_results_to_db(dict(HEADER_INFO, course_code="COS201", session="2020/2021", semester="FIRST"),
+                           make_rows(3), file_info)
+
+    def archive(self, chunks):
+        return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+    def test_endpoint_streams_one_pdf_per_student(self):
+        response = self.client.get(BULK_URL, headers=self.headers, query_string={'department': 'Computer Science'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'application/zip')
+
+        archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+        self.assertEqual(archive.namelist(), [f"2019_{240000 + i}_transcript.pdf" for i in range(5)])
+        self.assertTrue(archive.read("2019_240000_transcript.pdf").startswith(b"%PDF"))
+        self.assertIsNone(archive.testzip())
+
+    def test_session_skips_students_without_results(self):
+        response = self.client.get(BULK_URL, headers=self.headers,
+                                   query_string={'department': 'Computer Science', 'session': '2020/2021'})
+        self.assertEqual(len(zipfile.ZipFile(io.BytesIO(response.get_data())).namelist()), 3)
+
+    def test_missing_or_unknown_department(self):
+        self.assertEqual(self.client.get(BULK_URL, headers=self.headers).status_code, 400)
+        response = self.client.get(BULK_URL, headers=self.headers, query_string={'department': 'Botany'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_process_pool_matches_inline_rendering(self):
+        students = department_students("computer science")
+        inline = self.archive(stream_department_transcripts(students, workers=1))
+        pooled = self.archive(stream_department_transcripts(students, workers=2, batch_size=2))
+        self.assertEqual(pooled.namelist(), inline.namelist())
+        self.assertEqual(len(pooled.namelist()), 5)
+
+    def test_score_data_is_prefetched_per_batch(self):
+        students = department_students("computer science")
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            for _ in stream_department_transcripts(students, batch_size=2):
+                pass
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        # Three batches: one summary query and one course-line query each
+        self.assertEqual(len([s for s in statements if "FROM student_semester_summary" in s]), 3)
+        self.assertEqual(len([s for s in statements if "FROM scores" in s]), 3)
+
+    def test_bulk_results_match_single_student(self):
+        students = department_students("computer science")
+        bulk = get_students_results([student_id for student_id, _, _ in students])
+        for student_id, _, _ in students:
+            self.assertEqual(bulk[student_id], get_student_results(student_id))
+
+
+class TestTranscriptCache(DatabaseTestCase):
+    REG_NO = "2019/240000"
+    DOWNLOAD_URL = '/api/v1/results/by-registration/download'
+
+    def setUp(self):
+        super().setUp()
+        self.lecturer.role = 'hod'
+        db.session.commit()
+        self.headers = self.auth_headers()
+        save_results_to_db(HEADER_INFO, make_rows(2), {'filename': 'sheet.csv', 'uploader_id': self.lecturer.id})
+
+    def download(self, headers=None, **params):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            response = self.client.get(self.DOWNLOAD_URL, headers=dict(self.headers, **(headers or {})),
+                                       query_string=dict(registration_number=self.REG_NO, **params))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        return response, [s for s in statements if "FROM scores" in s]
+
+    def test_conditional_request_returns_304(self):
+        response, _ = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.last_modified)
+        etag = response.get_etag()[0]
+
+        response, score_reads = self.download({'If-None-Match': f'"{etag}"'})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+        self.assertFalse(score_reads)
+
+    def test_repeat_download_is_served_from_cache(self):
+        first, _ = self.download()
+        second, score_reads = self.download()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_data(), first.get_data())
+        self.assertFalse(score_reads)
+
+    def test_score_write_changes_the_version(self):
+        first, _ = self.download()
+        etag = first.get_etag()[0]
+        result_id = db.session.query(Score.result_id).first()[0]
+        response = self.client.patch(f'/api/v1/results/{result_id}/update-scores', headers=self.headers,
+                                     json=[{"registration_number": self.REG_NO, "grade": "A"}])
+        self.assertEqual(response.status_code, 200)
+
+        response, score_reads = self.download({'If-None-Match': f'"{etag}"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.get_etag()[0], etag)
+        self.assertTrue(score_reads)
+
+    def test_session_filter_has_its_own_etag(self):
+        everything, _ = self.download()
+        one_session, _ = self.download(session="2019/2020")
+        self.assertNotEqual(everything.get_etag()[0], one_session.get_etag()[0])
+
+    def test_conditional_request_for_a_session_without_results_returns_404(self):
+        student = Student.query.filter_by(registration_number=self.REG_NO).one()
+        etag = transcript_etag(student, "2030/2031", transcript_version(student.id))
+        for if_none_match in (f'"{etag}"', '*'):
+            response, _ = self.download({'If-None-Match': if_none_match}, session="2030/2031")
+            self.assertEqual(response.status_code, 404)
+            self.assertIn('error', response.json)
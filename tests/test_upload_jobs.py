@@ -0,0 +1,139 @@
+import os
+from unittest import mock
+
+import redis
+
+from .base import DatabaseTestCase
+from app import db
+from app.jobs import InMemoryJobStore, upload_jobs
+from app.models import Score, User
+from app import utils
+from app.utils import parsed_upload_key
+
+DOCS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extraction-test-docs')
+
+
+class TestUploadJobs(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hod = User(username='hod1', email='hod1@example.com', role='hod', department='Computer Science')
+        self.hod.set_password('password')
+        db.session.add(self.hod)
+        db.session.commit()
+
+    def upload(self, query='', filename='example-doc.xlsx'):
+        with open(os.path.join(DOCS_DIR, 'example-doc.xlsx'), 'rb') as f:
+            return self.client.post(
+                f'/api/v1/results/upload{query}',
+                data={'file': (f, filename)},
+                headers=self.auth_headers(self.hod),
+                content_type='multipart/form-data'
+            )
+
+    def test_testing_config_uses_in_memory_store(self):
+        self.assertIsInstance(upload_jobs.store, InMemoryJobStore)
+
+    def test_async_upload_returns_job_and_reports_completion(self):
+        response = self.upload('?async=true')
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json['job_id']
+
+        job = upload_jobs.wait(job_id, timeout=30)
+        self.assertEqual(job['status'], 'completed', job['error'])
+        self.assertEqual(job['inserted'], 10)
+
+        status = self.client.get(f'/api/v1/results/upload/{job_id}', headers=self.auth_headers(self.hod))
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.json['records_processed'], 10)
+        self.assertEqual(Score.query.count(), 10)
+
+    def test_sync_upload_is_still_the_default(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['inserted'], 10)
+
+    def test_non_ascii_filename_is_accepted(self):
+        response = self.upload(filename='結果.xlsx')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['inserted'], 10)
+
+    def test_identical_reupload_short_circuits(self):
+        first = self.upload()
+        self.assertEqual(first.json['inserted'], 10)
+
+        second = self.upload()
+        self.assertEqual(second.status_code, 200)
+        self.assertIn('No changes', second.json['message'])
+        self.assertEqual((second.json['records'], second.json['unchanged']), (10, 10))
+
+    def test_reupload_restores_scores_changed_since(self):
+        self.upload()
+        score = Score.query.first()
+        original_grade = score.grade
+        registration_number = score.student.registration_number
+        patch = self.client.patch(f'/api/v1/results/{score.result_id}/update-scores', headers=self.auth_headers(self.hod),
+                                  json=[{"registration_number": registration_number, "grade": "F"}])
+        self.assertEqual(patch.json['updated'], 1)
+
+        again = self.upload()
+        self.assertEqual(again.status_code, 200)
+        self.assertNotIn('No changes', again.json['message'])
+        self.assertEqual((again.json['updated'], again.json['unchanged']), (1, 9))
+        self.assertEqual(db.session.get(Score, score.id).grade, original_grade)
+
+        # Applied in full again, so the next identical upload is skipped
+        self.assertIn('No changes', self.upload().json['message'])
+
+    def test_rows_stream_to_the_writer_and_into_the_cache(self):
+        received = []
+        save_results_to_db = utils.save_results_to_db
+
+        def spy(header_info, results_data, *args, **kwargs):
+            received.append(results_data)
+            return save_results_to_db(header_info, results_data, *args, **kwargs)
+
+        with mock.patch('app.utils.save_results_to_db', side_effect=spy):
+            self.assertEqual(self.upload().json['inserted'], 10)
+        # An iterator, not a list: rows reach the writer as they are parsed
+        self.assertEqual(len(received), 1)
+        self.assertIs(iter(received[0]), received[0])
+        cache_dir = self.app.config['UPLOAD_CACHE_FOLDER']
+        entries = [name for name in os.listdir(cache_dir) if not name.startswith('.')]
+        self.assertEqual(len(entries), 1)
+
+        # Once the stored scores change, the same file is applied again from the cache, unparsed
+        score = Score.query.first()
+        self.client.patch(f'/api/v1/results/{score.result_id}/update-scores', headers=self.auth_headers(self.hod),
+                          json=[{"registration_number": score.student.registration_number, "grade": "F"}])
+        with mock.patch('app.utils.stream_uploaded_file', side_effect=AssertionError("parsed again")):
+            again = self.upload()
+        self.assertEqual((again.status_code, again.json['updated'], again.json['unchanged']), (200, 1, 9))
+
+    def test_parse_cache_is_keyed_by_registration_patterns(self):
+        with self.app.test_request_context():
+            key = parsed_upload_key('abc')
+            self.app.config['REGISTRATION_NUMBER_PATTERNS'] = [r'\d{4}/\d{6}']
+            self.assertNotEqual(parsed_upload_key('abc'), key)
+
+    def test_finished_jobs_release_their_future(self):
+        job_id = self.upload('?async=true').json['job_id']
+        upload_jobs.wait(job_id, timeout=30)
+        self.assertNotIn(job_id, upload_jobs._futures)
+        self.assertEqual(upload_jobs.wait(job_id)['status'], 'completed')
+
+    def test_unreachable_job_store_returns_503_and_removes_the_file(self):
+        with mock.patch.object(upload_jobs.store, 'create', side_effect=redis.ConnectionError('refused')):
+            response = self.upload('?async=true')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('error', response.json)
+        self.assertEqual([name for name in os.listdir(self.upload_dir.name) if not name.startswith('.')], [])
+
+    def test_unreachable_job_store_returns_503_for_status(self):
+        with mock.patch.object(upload_jobs.store, 'get', side_effect=redis.ConnectionError('refused')):
+            response = self.client.get('/api/v1/results/upload/some-job', headers=self.auth_headers(self.hod))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('error', response.json)
+
+    def test_unknown_job_returns_404(self):
+        response = self.client.get('/api/v1/results/upload/missing', headers=self.auth_headers(self.hod))
+        self.assertEqual(response.status_code, 404)